@@ -8,6 +8,112 @@ COINBASE_KEY_NAME = os.getenv("COINBASE_KEY_NAME")
 COINBASE_KEY_PRIVATE_KEY = os.getenv("COINBASE_KEY_PRIVATE_KEY")
 CMC_KEY= os.getenv("CMC_KEY")
 X_BEARER_TOKEN= os.getenv("X_BEARER_TOKEN")
+# unset: nothing is stored, trades are fetched from BitQuery on every request
 DB_CONNECTION_URL = os.getenv("DB_CONNECTION_URL")
 SECRET_KEY= os.getenv("SECRET_KEY")
 BITQUERY_TOKEN = os.getenv("BITQUERY_TOKEN")
+
+# Shared HTTP client pool (GeckoTerminal service layer)
+GECKOTERMINAL_BASE_URL = os.getenv("GECKOTERMINAL_BASE_URL", "https://api.geckoterminal.com/api/v2")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# BitQuery aiohttp session
+BITQUERY_URL = os.getenv("BITQUERY_URL", "https://streaming.bitquery.io/eap")
+BITQUERY_CONNECTION_LIMIT = int(os.getenv("BITQUERY_CONNECTION_LIMIT", "50"))
+BITQUERY_DNS_CACHE_TTL = int(os.getenv("BITQUERY_DNS_CACHE_TTL", "300"))
+BITQUERY_KEEPALIVE_TIMEOUT = float(os.getenv("BITQUERY_KEEPALIVE_TIMEOUT", "30"))
+BITQUERY_CONNECT_TIMEOUT = float(os.getenv("BITQUERY_CONNECT_TIMEOUT", "5"))
+BITQUERY_READ_TIMEOUT = float(os.getenv("BITQUERY_READ_TIMEOUT", "20"))
+
+# Token Metrics
+TOKEN_METRICS_API_KEY = os.getenv("TOKEN_METRICS_API_KEY")
+TOKEN_METRICS_BASE_URL = os.getenv("TOKEN_METRICS_BASE_URL", "https://api.tokenmetrics.com/v2")
+TOKEN_METRICS_MAX_WORKERS = int(os.getenv("TOKEN_METRICS_MAX_WORKERS", "16"))
+TOKEN_METRICS_METHOD_CONCURRENCY = int(os.getenv("TOKEN_METRICS_METHOD_CONCURRENCY", "4"))
+TOKEN_METRICS_AI_AGENT_CONCURRENCY = int(os.getenv("TOKEN_METRICS_AI_AGENT_CONCURRENCY", "2"))
+
+# Response cache (CACHE_BACKEND is memory or redis, a memory:// REDIS_URL runs the Redis backend on an in-process fake)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "dashmetrics:cache:")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+CACHE_COMPRESS_LEVEL = int(os.getenv("CACHE_COMPRESS_LEVEL", "1"))
+CACHE_TTL_TRENDING_POOLS = float(os.getenv("CACHE_TTL_TRENDING_POOLS", "60"))
+CACHE_TTL_FIND_POOL = float(os.getenv("CACHE_TTL_FIND_POOL", "300"))
+CACHE_TTL_TOKEN = float(os.getenv("CACHE_TTL_TOKEN", "60"))
+
+# OHLCV candle store
+CANDLE_STORE_MAX_SERIES = int(os.getenv("CANDLE_STORE_MAX_SERIES", "500"))
+CANDLE_STORE_MAX_CANDLES = int(os.getenv("CANDLE_STORE_MAX_CANDLES", "1000"))
+CANDLE_STORE_MIN_REFRESH = float(os.getenv("CANDLE_STORE_MIN_REFRESH", "5"))
+
+# Technical indicators
+INDICATOR_CACHE_MAX_SERIES = int(os.getenv("INDICATOR_CACHE_MAX_SERIES", "1000"))
+
+# Access log writer
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1"))
+LOG_QUEUE_FULL_POLICY = os.getenv("LOG_QUEUE_FULL_POLICY", "drop")
+LOG_BLOCK_TIMEOUT = float(os.getenv("LOG_BLOCK_TIMEOUT", "0.5"))
+# comma-separated access log destinations, csv and database
+LOG_SINKS = [sink.strip() for sink in os.getenv("LOG_SINKS", "csv").split(",") if sink.strip()]
+LOG_DB_BATCH_SIZE = int(os.getenv("LOG_DB_BATCH_SIZE", "1000"))
+LOG_DB_FLUSH_INTERVAL = float(os.getenv("LOG_DB_FLUSH_INTERVAL", "2"))
+LOG_DB_COPY = os.getenv("LOG_DB_COPY", "true").lower() == "true"
+
+# Access log analytics
+LOG_ANALYTICS_ACCURACY = float(os.getenv("LOG_ANALYTICS_ACCURACY", "0.01"))
+LOG_ANALYTICS_MAX_PATHS = int(os.getenv("LOG_ANALYTICS_MAX_PATHS", "500"))
+LOG_ANALYTICS_CACHE_WEEKS = int(os.getenv("LOG_ANALYTICS_CACHE_WEEKS", "52"))
+
+# Batch token lookup
+BATCH_TOKEN_MAX_ADDRESSES = int(os.getenv("BATCH_TOKEN_MAX_ADDRESSES", "100"))
+BATCH_TOKEN_CONCURRENCY = int(os.getenv("BATCH_TOKEN_CONCURRENCY", "5"))
+
+# Background refresh of the endpoints without parameters
+REFRESH_ENABLED = os.getenv("REFRESH_ENABLED", "true").lower() == "true"
+REFRESH_JITTER = float(os.getenv("REFRESH_JITTER", "0.1"))
+REFRESH_INTERVAL_TOP_MARKET_CAP = float(os.getenv("REFRESH_INTERVAL_TOP_MARKET_CAP", "60"))
+REFRESH_INTERVAL_TOP_TOKEN_CREATORS = float(os.getenv("REFRESH_INTERVAL_TOP_TOKEN_CREATORS", "300"))
+REFRESH_INTERVAL_TRENDING_POOLS = float(os.getenv("REFRESH_INTERVAL_TRENDING_POOLS", "60"))
+
+# Worker processes serving the app, set by run.py. Each has its own schedulers, they split the limits below between them
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+
+# Upstream scheduler (calls per minute and burst per provider, a rate of 0 disables the limit)
+GECKOTERMINAL_RATE_PER_MINUTE = float(os.getenv("GECKOTERMINAL_RATE_PER_MINUTE", "30"))
+GECKOTERMINAL_BURST = int(os.getenv("GECKOTERMINAL_BURST", "5"))
+BITQUERY_RATE_PER_MINUTE = float(os.getenv("BITQUERY_RATE_PER_MINUTE", "60"))
+BITQUERY_BURST = int(os.getenv("BITQUERY_BURST", "10"))
+TOKEN_METRICS_RATE_PER_MINUTE = float(os.getenv("TOKEN_METRICS_RATE_PER_MINUTE", "60"))
+TOKEN_METRICS_BURST = int(os.getenv("TOKEN_METRICS_BURST", "10"))
+# calls allowed to wait for a token and seconds a call may wait, 0 disables the limit
+GECKOTERMINAL_MAX_QUEUE = int(os.getenv("GECKOTERMINAL_MAX_QUEUE", "20"))
+GECKOTERMINAL_MAX_WAIT = float(os.getenv("GECKOTERMINAL_MAX_WAIT", "10"))
+BITQUERY_MAX_QUEUE = int(os.getenv("BITQUERY_MAX_QUEUE", "50"))
+BITQUERY_MAX_WAIT = float(os.getenv("BITQUERY_MAX_WAIT", "10"))
+TOKEN_METRICS_MAX_QUEUE = int(os.getenv("TOKEN_METRICS_MAX_QUEUE", "50"))
+TOKEN_METRICS_MAX_WAIT = float(os.getenv("TOKEN_METRICS_MAX_WAIT", "10"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.5"))
+UPSTREAM_BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", "10"))
+UPSTREAM_MAX_RETRY_AFTER = float(os.getenv("UPSTREAM_MAX_RETRY_AFTER", "30"))
+
+# Metrics (set by run.py when it starts several workers, they share their metrics through this directory)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Tracing (spans of the upstream calls sent in a Server-Timing header, and appended to TRACE_EXPORT_PATH when it is set)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_EXPORT_MIN_DURATION_MS = float(os.getenv("TRACE_EXPORT_MIN_DURATION_MS", "0"))
+TRACE_EXPORT_BATCH_SIZE = int(os.getenv("TRACE_EXPORT_BATCH_SIZE", "200"))
+TRACE_EXPORT_FLUSH_INTERVAL = float(os.getenv("TRACE_EXPORT_FLUSH_INTERVAL", "1"))
+
+# Startup
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1000"))
@@ -1,7 +1,8 @@
-from app.constant.config import BITQUERY_TOKEN
+from app.constant.config import BITQUERY_TOKEN, BITQUERY_URL
+from app.utils.graphql import merge_queries
+from app.utils.projection import Projection, to_float, to_timestamp
 
 
-BITQUERY_URL = "https://streaming.bitquery.io/eap"  
 BITQUERY_HEADERS = {
     "Content-Type": "application/json",
     "Authorization": f"Bearer {BITQUERY_TOKEN}" 
@@ -113,6 +114,13 @@ query MyQuery($time_1h_ago: DateTime, $token: String, $side: String) {
   }
 }
 """
+VOLUME_AND_MARKETCAP_PROJECTION = Projection("data.Solana", {
+    "liquidity_in_usd": "liquidity.0.Pool.Base.PostAmountInUSD",
+    "marketcap_in_usd": "marketcap.0.TokenSupplyUpdate.PostBalanceInUSD",
+    "token_name": "marketcap.0.TokenSupplyUpdate.Currency.Name",
+    "symbol": "marketcap.0.TokenSupplyUpdate.Currency.Symbol",
+    "mint_address": "marketcap.0.TokenSupplyUpdate.Currency.MintAddress",
+})
 
 TOP_MARKET_CAP_PUMPFUN_COIN = """
 query TopMarketCapCoin {
@@ -278,7 +286,7 @@ query MyQuery($token: String!, $since_time: DateTime!) {
 
 
 GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY = """
-query MyQuery($token: String!, $limit: Int) {
+query MyQuery($token: String!, $limit: Int, $since: DateTime!) {
   Solana {
     DEXTrades(
       where: {
@@ -291,10 +299,21 @@ query MyQuery($token: String!, $limit: Int) {
             }
           }
         }
+        Block: {
+          Time: {
+            since: $since
+          }
+        }
       }
       limit: { count: $limit }
       orderBy: { ascending: Block_Time }
     ) {
+      Block {
+        Time
+      }
+      Transaction {
+        Signature
+      }
       Trade {
         Buy {
           Amount
@@ -324,6 +343,9 @@ query pumpfunTokenLatestTrades($token: String, $limit: Int) {
       Block {
         allTime: Time
       }
+      Transaction {
+        Signature
+      }
       Trade {
         Account {
           Address
@@ -348,6 +370,58 @@ query pumpfunTokenLatestTrades($token: String, $limit: Int) {
 }
 """
 
+# Latest trades since a block time, to fetch only what the trade history is missing
+PUMPFUN_TOKEN_TRADES_SINCE_QUERY = """
+query pumpfunTokenTradesSince($token: String, $limit: Int, $since: DateTime!) {
+  Solana {
+    DEXTradeByTokens(
+      orderBy: {descending: Block_Time}
+      limit: {count: $limit}
+      where: {
+        Trade: {Currency: {MintAddress: {is: $token}}, Price: {gt: 0}}, 
+        Transaction: {Result: {Success: true}},
+        Block: {Time: {since: $since}}}
+    ) {
+      Block {
+        allTime: Time
+      }
+      Transaction {
+        Signature
+      }
+      Trade {
+        Account {
+          Address
+          Owner
+        }
+        Side {
+          Type
+          Account {
+            Address
+            Owner
+          }
+        }
+        Price
+        Amount
+        Side {
+          AmountInUSD
+          Amount
+        }
+      }
+    }
+  }
+}
+"""
+
+# Token dashboard: the per-token sections merged into one aliased document
+TOKEN_DASHBOARD_SECTIONS = {
+    "top_holders": TOP_HOLDERS_QUERY,
+    "token_information": GET_TOKEN_INFORMATION,
+    "trading_volume_on_dexs": GET_TRADING_VOLUME_TOKEN_QUERY,
+    "top_traders": GET_TOP_TRADER_TOKEN_PUMPFUN_DEX_QUERY,
+    "latest_trades": PUMPFUN_TOKEN_LATEST_TRADES_QUERY,
+}
+TOKEN_DASHBOARD_QUERY = merge_queries("PumpfunTokenDashboard", TOKEN_DASHBOARD_SECTIONS)
+
 # ===================== NOT USED =====================
 HISTORICAL_PRICE_AND_VOLUME_QUERY="""
 query HistoricalPriceAndVolume($token: String!, $since: DateTime!, $interval_in: OLAP_DateTimeIntervalUnits!, $interval_count: Int!) {
@@ -373,6 +447,27 @@ query HistoricalPriceAndVolume($token: String!, $since: DateTime!, $interval_in:
   }
 }
 """
+HISTORICAL_PRICE_AND_VOLUME_PROJECTION = Projection(
+    "data.Solana.DEXTradeByTokens",
+    {
+        "time": "Block.Timefield",
+        "open": "Trade.open",
+        "high": "Trade.high",
+        "low": "Trade.low",
+        "close": "Trade.close",
+        "volume": "volume",
+        "volume_in_usd": "volume_in_usd",
+    },
+    converters={
+        "time": to_timestamp,
+        "open": to_float,
+        "high": to_float,
+        "low": to_float,
+        "close": to_float,
+        "volume": to_float,
+        "volume_in_usd": to_float,
+    },
+)
 
 TOKEN_CREATION_QUERY="""
 query MyQuery($token: String!) {
@@ -426,4 +521,22 @@ query LastNTransactionsByToken($token: String!, $n: Int!) {
   }
 }
 """
+LAST_N_TRANSACTIONS_PROJECTION = Projection(
+    "data.Solana.DEXTradeByTokens",
+    {
+        "time": "Block.Time",
+        "price_in_usd": "Trade.PriceInUSD",
+        "address": "Trade.Account.Address",
+        "owner": "Trade.Account.Owner",
+        "amount": "Trade.Amount",
+        "price": "Trade.Price",
+        "volume": "volume",
+        "volume_in_usd": "volume_in_usd",
+        "transaction_signature": "Transaction.Signature",
+    },
+    converters={
+        "volume": to_float,
+        "volume_in_usd": to_float,
+    },
+)
 # ===================== NOT USED =====================
@@ -0,0 +1,2 @@
+from app.database.model.access_log import AccessLog
+from app.database.model.trade import Trade, TradeSync
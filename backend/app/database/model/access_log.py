@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
+
+from app.database.database import Base
+
+
+class AccessLog(Base):
+    """An API request, as logged by APIGatewayMiddleware. The columns are the fields of LogModel."""
+
+    __tablename__ = "access_logs"
+    __table_args__ = (
+        Index("ix_access_logs_action_date", "action_date"),
+        Index("ix_access_logs_path_name_action_date", "path_name", "action_date"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    action_date = Column(DateTime, nullable=False)
+    path_name = Column(String(512), nullable=False)
+    method = Column(String(16), nullable=False)
+    ip = Column(String(64), nullable=False)
+    status_response = Column(Integer, nullable=False)
+    response = Column(Text, nullable=False)
+    response_size = Column(Integer)
+    request_query = Column(Text)
+    request_body = Column(Text)
+    description = Column(Text)
+    duration = Column(Float)
@@ -0,0 +1,42 @@
+from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String, UniqueConstraint, func
+
+from app.database.database import Base
+
+
+class Trade(Base):
+    """A Pump Fun trade fetched from BitQuery.
+
+    `kind` is the feed the trade was fetched for, e.g. latest trades or first
+    buyers, whose queries select different fields. A transaction is stored
+    once per feed and token, whatever the number of requests that fetched it;
+    a swap is a trade of both its tokens. `payload` is the BitQuery node as
+    returned, so it is served back unchanged.
+    """
+
+    __tablename__ = "trades"
+    __table_args__ = (
+        UniqueConstraint("kind", "mint", "signature", name="uq_trades_kind_mint_signature"),
+        Index("ix_trades_kind_mint_block_time", "kind", "mint", "block_time"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(32), nullable=False)
+    mint = Column(String(64), nullable=False)
+    signature = Column(String(128), nullable=False)
+    block_time = Column(DateTime, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class TradeSync(Base):
+    """How much of the newest trade history of a token is stored without gaps."""
+
+    __tablename__ = "trade_sync"
+
+    kind = Column(String(32), primary_key=True)
+    mint = Column(String(64), primary_key=True)
+    # number of most recent trades stored with none missing between them
+    depth = Column(Integer, nullable=False, default=0)
+    # every trade of the token up to the last sync is stored
+    complete = Column(Boolean, nullable=False, default=False)
+    synced_at = Column(DateTime, nullable=False)
@@ -2,26 +2,46 @@
 from datetime import datetime
 import json
 import logging
-import sys
-from fastapi import BackgroundTasks, HTTPException, Request, Response, status
+from fastapi import HTTPException, Request, status
 
 from fastapi.responses import JSONResponse
-from requests import Session
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.constant.log import LENGTH_MAX_RESPONSE
 from app.schema.log import LogModel
 from app.utils.logger import write_log
 
-#get logger 
+#get logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-class APIGatewayMiddleware(BaseHTTPMiddleware):
-    def print_log_request(self, 
-        request : Request, 
-        request_body, 
-        original_path, 
+class ResponseCapture:
+    """Keeps the status, total size and first LENGTH_MAX_RESPONSE bytes of a streamed response."""
+
+    def __init__(self):
+        self.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        self.started = False
+        self.size = 0
+        self.head = bytearray()
+
+    def add(self, chunk: bytes):
+        self.size += len(chunk)
+        remaining = LENGTH_MAX_RESPONSE - len(self.head)
+        if remaining > 0:
+            self.head += chunk[:remaining]
+
+    @property
+    def body_str(self) -> str:
+        return self.head.decode('utf-8', errors='replace')
+
+class APIGatewayMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def print_log_request(self,
+        request : Request,
+        request_body,
+        original_path,
         start_time
     ):
         formatted_time = datetime.fromtimestamp(start_time)
@@ -35,7 +55,7 @@ class APIGatewayMiddleware(BaseHTTPMiddleware):
             f"\tQuery Params: {request.query_params}\n"
             f"\tOriginal path: {original_path}\n"
         )
-    
+
     def get_ip(self, request: Request) -> str:
         headers_to_check = [
             "X-Forwarded-For",
@@ -44,15 +64,18 @@ class APIGatewayMiddleware(BaseHTTPMiddleware):
         for header in headers_to_check:
             if header in request.headers:
                 return request.headers[header].split(",")[0].strip()
+        if request.client is None:
+            return ""
         return request.client.host # falls back to the IP of the immediate client (might be proxy)
-    
-    def write_log(self,
+
+    async def write_log(self,
         request: Request,
         request_body: str,
         original_path: str,
         status_code: int,
         body_str: str,
-        process_time: float, 
+        response_size: int,
+        process_time: float,
         error_message = None
     ):
         path_params = request.path_params
@@ -62,7 +85,7 @@ class APIGatewayMiddleware(BaseHTTPMiddleware):
             "query": query_params
         })
         client_ip = self.get_ip(request=request)
-        
+
         try:
             decoded_request_body = request_body
         except UnicodeDecodeError:
@@ -74,130 +97,183 @@ class APIGatewayMiddleware(BaseHTTPMiddleware):
             ip = client_ip,
             status_response= status_code,
             response=body_str,
+            response_size=response_size,
             duration=round(process_time, 3),
             request_body=decoded_request_body,
             request_query = request_params,
             description = None if error_message is None else error_message
         )
-        
-        write_log(request=log_entry)
-        
-    def print_log_response(self, status_code:int, response, error_message: str):
+
+        await write_log(request=log_entry)
+
+    def print_log_response(self, status_code:int, response, response_size: int, error_message: str):
         logger.info(
             f"\nRESPONSE \n"
             f"Status Code: {status_code}\n"
-            f"Response: {response}\n"
+            f"Response ({response_size} bytes): {response}\n"
             f"Error message: {error_message}\n"
         )
-        
+
     async def handle_log(self,
         request: Request,
         request_body: str,
-        response,
+        status_code: int,
         error_message:str,
         original_path:str,
-        start_time, 
-        process_time, 
-        body_str: str
+        start_time,
+        process_time,
+        body_str: str,
+        response_size: int
     ):
         self.print_log_request(
-            request=request, 
-            request_body=request_body, 
-            original_path=original_path, 
+            request=request,
+            request_body=request_body,
+            original_path=original_path,
             start_time=start_time
         )
-        
-        self.write_log(
-            request=request, 
-            request_body=request_body, 
-            original_path=original_path, 
-            status_code=response.status_code,
-            body_str=body_str, 
-            process_time=process_time, 
+
+        await self.write_log(
+            request=request,
+            request_body=request_body,
+            original_path=original_path,
+            status_code=status_code,
+            body_str=body_str,
+            response_size=response_size,
+            process_time=process_time,
             error_message=error_message
         )
         self.print_log_response(
-            status_code=response.status_code, 
-            response=body_str[:LENGTH_MAX_RESPONSE], 
+            status_code=status_code,
+            response=body_str,
+            response_size=response_size,
             error_message=error_message
         )
-    
-    async def dispatch(self, request: Request, call_next):
-        response_time = 0
+
+    async def read_body(self, receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        original_path = request.url.path
+        start_time = datetime.now().timestamp()
         error_message = None
-        body_str = str("")
-        flag = True
+        capture = ResponseCapture()
+        # 500 responses are small and rewritten, so only those are buffered
+        error_chunks = []
+
+        async def send_json(response: JSONResponse):
+            async def send_wrapper_direct(message: Message):
+                if message["type"] == "http.response.start":
+                    capture.started = True
+                    capture.status_code = message["status"]
+                elif message["type"] == "http.response.body":
+                    capture.add(message.get("body", b""))
+                await send(message)
+            await response(scope, receive, send_wrapper_direct)
+
+        async def send_wrapper(message: Message):
+            nonlocal error_message
+            if message["type"] == "http.response.start":
+                capture.status_code = message["status"]
+                if capture.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR:
+                    return
+                capture.started = True
+                await send(message)
+            elif message["type"] == "http.response.body":
+                if capture.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR and not capture.started:
+                    error_chunks.append(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        error_message = b"".join(error_chunks).decode('utf-8', errors='replace')
+                        await send_json(JSONResponse(
+                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            content={"detail": error_message}
+                        ))
+                    return
+                capture.add(message.get("body", b""))
+                await send(message)
+            else:
+                await send(message)
+
+        raw_body = await self.read_body(receive)
+        request_body = raw_body
+        body_sent = False
+
+        # the body was consumed for logging, hand it to the app again
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": raw_body, "more_body": False}
+            return await receive()
+
         try:
-            original_path = request.url.path
-            start_time = datetime.now().timestamp()
-            request_body = await request.body()
-            response = await call_next(request)
-            response_time = datetime.now().timestamp() - start_time
             content_type = request.headers.get('Content-Type', '')
-            
+            valid_body = True
             # serialize to JSon string
             if 'application/json' in content_type and request_body:
                 try:
                     request_body_json = json.loads(request_body)
                     request_body = json.dumps(request_body_json)
                 except json.JSONDecodeError:
-                    flag = False
-                    response = JSONResponse(
+                    valid_body = False
+                    await send_json(JSONResponse(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         content={
                             "detail": "Invalid JSON format"
                         }
-                    )
+                    ))
+            if valid_body:
+                await self.app(scope, replay_receive, send_wrapper)
         # Catch HTTP exceptions
         except HTTPException as http_exception:
-            response = JSONResponse(
+            if capture.started:
+                raise
+            await send_json(JSONResponse(
                 status_code=http_exception.status_code,
-                content={"detail": http_exception.detail}
-            )
-            error_message = None
-            flag = False
+                content={"detail": http_exception.detail},
+                # e.g. the Retry-After of a provider refusing calls
+                headers=getattr(http_exception, "headers", None)
+            ))
         # Catch other exception types
         except Exception as e:
-            response = JSONResponse(
-                status_code= status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": error_message}
-            )
             error_message = str(e)
-            flag = False
+            if capture.started:
+                raise
+            await send_json(JSONResponse(
+                status_code= status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": "Internal Server Error"}
+            ))
         finally:
-            if flag:
-                # retrieves an async body iterator of the response
-                body_iterator = response.body_iterator
-                response_body = [chunk async for chunk in body_iterator]
-                body_str = b"".join(response_body).decode('utf-8', errors='replace')
-                response = Response(
-                    content = body_str,
-                    status_code=response.status_code,
-                    headers = dict(response.headers)
-                )
-            if response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR:
-                error_message = body_str
+            response_time = datetime.now().timestamp() - start_time
+            body_str = capture.body_str
+            if capture.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR:
                 body_str = str({
                     "detail": "Internal Server Error"
                 })
-                response = JSONResponse(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    #content={"detail": "Internal Server Error"}
-                    content={"detail": str(response.body)}
+            # the response is fully sent at this point, logging never delays it
+            try:
+                await self.handle_log(
+                    request,
+                    request_body,
+                    capture.status_code,
+                    error_message,
+                    original_path,
+                    start_time,
+                    response_time,
+                    body_str,
+                    capture.size
                 )
-            # run background task to write log
-            background_tasks = BackgroundTasks() 
-            background_tasks.add_task(
-                self.handle_log, 
-                request,
-                request_body,
-                response,
-                error_message,
-                original_path,
-                start_time, 
-                response_time, 
-                body_str
-            ) 
-            response.background = background_tasks
-            return response
-            
\ No newline at end of file
+            except Exception as e:
+                logger.error(f"Failed to write access log: {e}")
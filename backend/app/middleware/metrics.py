@@ -0,0 +1,42 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import REQUESTS_IN_FLIGHT, UNMATCHED_ROUTE, observe_request
+
+
+class MetricsMiddleware:
+    """Records the latency, status and response size of every request, and the requests in flight, for /metrics.
+
+    Requests are labelled with the template of the route that served them,
+    e.g. /tools/pump-first-latest-trades/{token_mint_address}, which FastAPI
+    stores in the scope while routing, so path parameters do not create series.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            observe_request(scope["method"], route, status_code, time.perf_counter() - start, size)
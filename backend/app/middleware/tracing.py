@@ -0,0 +1,43 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.tracing import Trace, current_trace, export_trace
+
+
+class TracingMiddleware:
+    """Traces every request and returns its spans in a Server-Timing header.
+
+    The trace is set in a context variable that the upstream clients, the
+    schedulers and the response serializer record their spans into, e.g.
+    `bitquery-queue`, `bitquery-connect`, `bitquery-ttfb`, `bitquery-body` and
+    `bitquery-decode`. Finished traces are also exported when TRACE_EXPORT_PATH is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # spans ending after the headers, e.g. of a streamed body, are only exported
+                MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            await export_trace(trace, scope["method"], route, status_code, time.perf_counter() - trace.start)
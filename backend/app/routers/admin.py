@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from app.service.log_analytics import LogAnalytics, local_time, route_templates
+from app.utils.auth import verify_bearer_token
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Dashmetrics - Admin"],
+    dependencies=[Depends(verify_bearer_token)],
+    responses={
+        401: {"description": "Invalid or missing bearer token"},
+        404: {"description": "Not found"},
+    },
+)
+
+_analytics: Optional[LogAnalytics] = None
+
+def get_log_analytics(request: Request) -> LogAnalytics:
+    """The analytics of this app, created on first use once the routes are all registered."""
+    global _analytics
+    if _analytics is None:
+        _analytics = LogAnalytics(normalize=route_templates(request.app.routes))
+    return _analytics
+
+@router.get(
+    "/latency",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get latency analytics",
+    description="Returns request counts, error rates and p50/p95/p99 latency per route over a time window, read from the access logs"
+)
+async def latency(
+    since: Optional[datetime] = Query(
+        None,
+        description="Start of the window in the server's local time, e.g. 2024-05-01T00:00:00, or with a UTC offset, e.g. 2024-05-01T00:00:00Z. `hours` before `until` by default"
+    ),
+    until: Optional[datetime] = Query(
+        None,
+        description="End of the window, now by default"
+    ),
+    hours: float = Query(
+        24,
+        gt=0,
+        description="Window length when `since` is not given"
+    ),
+    path: Optional[str] = Query(
+        None,
+        description="Only report the routes starting with this prefix, e.g. /tools"
+    ),
+    analytics: LogAnalytics = Depends(get_log_analytics),
+) -> Dict[str, Any]:
+    """
+    Get per-route latency analytics from the weekly CSV access logs.
+
+    Args:
+        since: Start of the window, in the server's local time like the logs unless it has a UTC offset
+        until: End of the window
+        hours: Window length when `since` is not given
+        path: Route prefix filter
+
+    Returns:
+        Totals and per-route requests, error rates and latency percentiles
+    """
+    until = local_time(until) if until else datetime.now()
+    since = local_time(since) if since else until - timedelta(hours=hours)
+    if since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be before until")
+    # the log files are read in a worker thread, never on the event loop
+    report = await run_in_threadpool(analytics.report, since, until, path)
+    return {"data": report, "cache": analytics.stats()}
@@ -1,11 +1,17 @@
-import time
 from typing import Optional, Dict, List, Any
 from fastapi import APIRouter, Query, status, HTTPException
 
-from app.service.search.coingeckco import find_liquidity_pool_by_token, get_ohlcv_data, get_sorted_trending_pools, get_specific_token
+from app.constant.config import BATCH_TOKEN_MAX_ADDRESSES
+from app.service.search.candle_store import candle_store, max_resampled_limit
+from app.service.search.coingeckco import find_liquidity_pool_by_token, get_specific_token, get_tokens_batch, get_trending_pools
+from app.service.search.indicators import indicator_cache
+from app.utils.json_response import FastJSONRoute
+from app.utils.ohlcv import parse_interval
 
+# endpoints return upstream payloads as Dict[str, Any], they are serialized without re-validation
 router = APIRouter(
     prefix="/coins",
+    route_class=FastJSONRoute,
     tags=["Dashmetrics - CoinGecko"],
     responses={
         404: {"description": "Not found"},
@@ -46,7 +52,7 @@ async def trending_pools(
     Returns:
         List of trending liquidity pools with the requested attributes
     """
-    return await get_sorted_trending_pools(include=include, page=page, duration=duration)
+    return await get_trending_pools(include=include, page=page, duration=duration)
 
 @router.get(
     "/ohlcv",
@@ -86,6 +92,14 @@ async def ohlcv_data(
     token: str = Query(
         "base", 
         description="Token to get data for. Options: base, quote"
+    ),
+    interval: Optional[str] = Query(
+        None, 
+        description="Custom candle size, e.g. 3m, 7m, 2h, 4h. Overrides timeframe and aggregate. The limit is then at most what one upstream page covers, e.g. 141 candles of 7m"
+    ),
+    fill_gaps: bool = Query(
+        False, 
+        description="With interval, return flat zero-volume candles for periods without trades"
     )
 ):
     """
@@ -99,17 +113,114 @@ async def ohlcv_data(
         limit: Number of results to return
         currency: Currency for price data
         token: Token to get data for
+        interval: Custom candle size resampled from finer candles
+        fill_gaps: Fill periods without trades when resampling
         
     Returns:
         OHLCV data for the specified pool
     """
-    before_timestamp = int(time.time())
-    return await get_ohlcv_data(
+    if interval is not None:
+        try:
+            bucket_seconds = parse_interval(interval)
+            max_limit = max_resampled_limit(bucket_seconds)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if limit > max_limit:
+            raise HTTPException(status_code=400, detail=f"At most {max_limit} candles of {interval} can be returned")
+        return await candle_store.get_resampled(
+            network=network,
+            pool_address=pool_address,
+            bucket_seconds=bucket_seconds,
+            limit=limit,
+            currency=currency,
+            token=token,
+            fill_gaps=fill_gaps,
+        )
+
+    return await candle_store.get_candles(
+        network=network,
+        pool_address=pool_address,
+        timeframe=timeframe,
+        aggregate=aggregate,
+        limit=limit,
+        currency=currency,
+        token=token,
+    )
+
+@router.get(
+    "/indicators",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get technical indicators",
+    description="Computes technical indicators (SMA, EMA, RSI, VWAP, Bollinger Bands) over the OHLCV candles of a liquidity pool via Dashmetrics"
+)
+async def indicators(
+    network: str = Query(
+        ..., 
+        description="Network identifier, e.g., ethereum, sui-network"
+    ),
+    pool_address: str = Query(
+        ..., 
+        description="Liquidity pool contract address"
+    ),
+    indicators: str = Query(
+        "ema:20,rsi:14", 
+        description="Comma-separated indicators with optional colon-separated parameters: sma:period, ema:period, rsi:period, vwap, bbands:period:width"
+    ),
+    timeframe: str = Query(
+        "hour", 
+        description="Timeframe for OHLCV data. Options: minute, hour, day"
+    ),
+    aggregate: int = Query(
+        1, 
+        ge=1, 
+        description="Aggregation period for the data"
+    ),
+    limit: int = Query(
+        100, 
+        ge=1, 
+        le=1000, 
+        description="Number of candles to return indicator values for (max 1000)"
+    ),
+    currency: str = Query(
+        "usd", 
+        description="Currency for price data. Options: usd, quote"
+    ),
+    token: str = Query(
+        "base", 
+        description="Token to get data for. Options: base, quote"
+    )
+):
+    """
+    Get technical indicators of a liquidity pool using Dashmetrics analytics.
+    
+    Args:
+        network: Network identifier
+        pool_address: Liquidity pool contract address
+        indicators: Indicators to compute, e.g. "ema:20,rsi:14,vwap,bbands:20:2"
+        timeframe: Timeframe for OHLCV data
+        aggregate: Aggregation period
+        limit: Number of candles to return values for
+        currency: Currency for price data
+        token: Token to get data for
+        
+    Returns:
+        Indicator names and, per candle, its timestamp, close and indicator values
+    """
+    # the indicator math loads numpy, keep it out of startup
+    from app.utils.indicators import parse_indicators
+
+    try:
+        parsed = parse_indicators(indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await indicator_cache.get_indicators(
+        parsed,
         network=network,
         pool_address=pool_address,
         timeframe=timeframe,
         aggregate=aggregate,
-        before_timestamp=before_timestamp,
         limit=limit,
         currency=currency,
         token=token,
@@ -196,4 +307,50 @@ async def specific_token(
         token_address=token_address,
         network=network,
         include=include,
-    )
\ No newline at end of file
+    )
+
+@router.get(
+    "/tokens",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get details of many tokens",
+    description="Get detailed information about many tokens of a network in one call, with per-token errors"
+)
+async def tokens_batch(
+    token_addresses: str = Query(
+        ..., 
+        description="Comma-separated token contract addresses"
+    ),
+    network: str = Query(
+        "sui-network", 
+        description="Network ID, e.g., ethereum, sui-network"
+    ),
+    include: str = Query(
+        "top_pools", 
+        description="Comma-separated attributes to include, such as 'top_pools'"
+    )
+):
+    """
+    Get detailed information about many tokens using Dashmetrics analytics.
+    
+    Args:
+        token_addresses: Comma-separated token contract addresses
+        network: Network identifier
+        include: Attributes to include in the response
+        
+    Returns:
+        One entry per address with either its token details or the error for that address
+    """
+    addresses = [address for address in token_addresses.split(",") if address.strip()]
+    if not addresses:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No token address provided")
+    if len(addresses) > BATCH_TOKEN_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_TOKEN_MAX_ADDRESSES} token addresses are allowed per request"
+        )
+    return await get_tokens_batch(
+        token_addresses=addresses,
+        network=network,
+        include=include,
+    )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Response, status
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.metrics import CONTENT_TYPE, MULTIPROCESS, render
+
+router = APIRouter(
+    tags=["Dashmetrics - Metrics"],
+)
+
+@router.get(
+    "/metrics",
+    response_class=Response,
+    status_code=status.HTTP_200_OK,
+    summary="Get Prometheus metrics",
+    description="Returns request latency and response size histograms per route, requests in flight, and upstream latency and errors per provider, in the Prometheus text format"
+)
+async def metrics() -> Response:
+    """
+    Get the metrics of every worker in the Prometheus text exposition format.
+
+    Returns:
+        The metrics, to be scraped by Prometheus
+    """
+    # merging the workers' files reads the disk, it runs off the event loop
+    content = await run_in_threadpool(render) if MULTIPROCESS else render()
+    # passed as a header, as media_type would get a second charset appended
+    return Response(content, headers={"Content-Type": CONTENT_TYPE})
@@ -0,0 +1,190 @@
+from fastapi import APIRouter, status
+from typing import Dict, List, Any
+
+from app.constant.config import DB_CONNECTION_URL
+from app.service.cache import response_cache
+from app.service.http_client import bitquery_session, geckoterminal_client, tokenmetrics_client
+from app.service.refresher import refresher
+from app.service.scheduler import bitquery_scheduler, geckoterminal_scheduler, tokenmetrics_scheduler
+from app.service.search.candle_store import candle_store
+from app.service.search.pumpfun import bitquery_flight
+from app.service.search.indicators import indicator_cache
+from app.service.token_metrics.token_metrics_service import token_metrics_executor
+from app.utils.logger import log_writers
+
+router = APIRouter(
+    prefix="/system",
+    tags=["Dashmetrics - System"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get(
+    "/http-pools",
+    response_model=Dict[str, List[Dict[str, Any]]],
+    status_code=status.HTTP_200_OK,
+    summary="Get HTTP connection pool statistics",
+    description="Returns in-use, idle and waiting counts for every shared upstream HTTP client"
+)
+async def http_pools() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get connection pool statistics for the shared upstream HTTP clients.
+    
+    Returns:
+        Pool usage for each client, used to size the connection limits
+    """
+    return {
+        "data": [
+            geckoterminal_client.pool_stats(),
+            bitquery_session.pool_stats(),
+            tokenmetrics_client.pool_stats(),
+        ]
+    }
+
+@router.get(
+    "/executors",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get thread pool executor statistics",
+    description="Returns per-method waiting, active and completed calls of the blocking client thread pools"
+)
+async def executors() -> Dict[str, Any]:
+    """
+    Get usage statistics for the thread pools running blocking upstream clients.
+    
+    Returns:
+        Pool size and per-method counters of each executor
+    """
+    return {"data": [token_metrics_executor.stats()]}
+
+@router.get(
+    "/cache",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get response cache statistics",
+    description="Returns hit, miss, coalesced and eviction counters of the upstream response cache"
+)
+async def cache_stats() -> Dict[str, Any]:
+    """
+    Get counters of the in-process upstream response cache.
+    
+    Returns:
+        Entry count, byte usage and hit/miss/eviction counters
+    """
+    return {"data": response_cache.stats()}
+
+@router.get(
+    "/candle-store",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get OHLCV candle store statistics",
+    description="Returns the number of stored series and candles, and how many full and tail fetches were made"
+)
+async def candle_store_stats() -> Dict[str, Any]:
+    """
+    Get counters of the local OHLCV candle store.
+    
+    Returns:
+        Stored series and candles, and full versus incremental upstream fetches
+    """
+    return {"data": candle_store.stats()}
+
+@router.get(
+    "/indicators",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get technical indicator cache statistics",
+    description="Returns how many indicator series are cached and how often they were fully recomputed or updated incrementally"
+)
+async def indicator_cache_stats() -> Dict[str, Any]:
+    """
+    Get counters of the incremental technical indicator cache.
+    
+    Returns:
+        Cached series, and full versus incremental computations
+    """
+    return {"data": indicator_cache.stats()}
+
+@router.get(
+    "/log-writer",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get access log writer statistics",
+    description="Returns queued, written and dropped counters of the background access log writer of every sink"
+)
+async def log_writer_stats() -> Dict[str, Any]:
+    """
+    Get counters of the background access log writers, one per sink in LOG_SINKS.
+    
+    Returns:
+        Queue depth and written, dropped and batch counters
+    """
+    return {"data": [writer.stats() for writer in log_writers]}
+
+@router.get(
+    "/schedulers",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get upstream scheduler statistics",
+    description="Returns the rate limit, queue depth, wait times and retries of every upstream provider"
+)
+async def scheduler_stats() -> Dict[str, Any]:
+    """
+    Get counters of the per-provider upstream schedulers.
+    
+    Returns:
+        Queue depth, wait times per priority, and throttled, retried and failed calls per provider
+    """
+    return {"data": [scheduler.stats() for scheduler in (geckoterminal_scheduler, bitquery_scheduler, tokenmetrics_scheduler)]}
+
+@router.get(
+    "/single-flight",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get in-flight request de-duplication statistics",
+    description="Returns how many identical concurrent upstream calls were coalesced into one"
+)
+async def single_flight_stats() -> Dict[str, Any]:
+    """
+    Get counters of the in-flight de-duplication of BitQuery queries.
+    
+    Returns:
+        Calls, upstream calls actually made and the coalescing ratio
+    """
+    return {"data": [bitquery_flight.stats()]}
+
+@router.get(
+    "/refresher",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get background refresh statistics",
+    description="Returns the age, refresh counters and last error of every value kept fresh in memory"
+)
+async def refresher_stats() -> Dict[str, Any]:
+    """
+    Get the state of the values refreshed in the background.
+    
+    Returns:
+        Age, staleness, refresh and failure counters and the last error per value
+    """
+    return {"data": refresher.stats()}
+
+@router.get(
+    "/trade-history",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get trade history statistics",
+    description="Returns how many trades were fetched from BitQuery and how many of them were new to the database"
+)
+async def trade_history_stats() -> Dict[str, Any]:
+    """
+    Get counters of the persisted Pump Fun trade history.
+    
+    Returns:
+        Database dialect, trades fetched and inserted, and the coalescing of concurrent syncs
+    """
+    if not DB_CONNECTION_URL:
+        return {"data": {"database": None}}
+    # imported here to keep SQLAlchemy out of the boot path
+    from app.service.search.trade_history import trade_history, trade_history_flight
+
+    return {"data": {**trade_history.stats(), "single_flight": trade_history_flight.stats()}}
@@ -47,7 +47,7 @@ async def get_tokens(
         Detailed information about the specified tokens
     """
     service = get_token_metrics_service()
-    return service.get_tokens(symbols=symbols)
+    return await service.get_tokens(symbols=symbols)
 
 @router.get(
     "/trader-grades/{symbols}",
@@ -89,7 +89,7 @@ async def get_trader_grades(
     if not end_date:
         end_date = datetime.now().strftime("%Y-%m-%d")
     
-    return service.get_trader_grades(symbols=symbols, start_date=start_date, end_date=end_date)
+    return await service.get_trader_grades(symbols=symbols, start_date=start_date, end_date=end_date)
 
 @router.get(
     "/investor-grades/{symbols}",
@@ -131,7 +131,7 @@ async def get_investor_grades(
     if not end_date:
         end_date = datetime.now().strftime("%Y-%m-%d")
     
-    return service.get_investor_grades(symbols=symbols, start_date=start_date, end_date=end_date)
+    return await service.get_investor_grades(symbols=symbols, start_date=start_date, end_date=end_date)
 
 @router.get(
     "/daily-ohlcv/{symbols}",
@@ -173,7 +173,7 @@ async def get_daily_ohlcv(
     if not end_date:
         end_date = datetime.now().strftime("%Y-%m-%d")
     
-    return service.get_daily_ohlcv(symbols=symbols, start_date=start_date, end_date=end_date)
+    return await service.get_daily_ohlcv(symbols=symbols, start_date=start_date, end_date=end_date)
 
 @router.get(
     "/hourly-ohlcv/{symbols}",
@@ -215,7 +215,7 @@ async def get_hourly_ohlcv(
     if not end_date:
         end_date = datetime.now().strftime("%Y-%m-%d")
     
-    return service.get_hourly_ohlcv(symbols=symbols, start_date=start_date, end_date=end_date)
+    return await service.get_hourly_ohlcv(symbols=symbols, start_date=start_date, end_date=end_date)
 
 @router.get(
     "/market-metrics",
@@ -252,7 +252,7 @@ async def get_market_metrics(
     if not end_date:
         end_date = datetime.now().strftime("%Y-%m-%d")
     
-    return service.get_market_metrics(start_date=start_date, end_date=end_date)
+    return await service.get_market_metrics(start_date=start_date, end_date=end_date)
 
 @router.get(
     "/ai-reports/{symbols}",
@@ -277,7 +277,7 @@ async def get_ai_reports(
         AI-generated reports for the specified tokens
     """
     service = get_token_metrics_service()
-    return service.get_ai_report(symbols=symbols)
+    return await service.get_ai_report(symbols=symbols)
 
 @router.get(
     "/trading-signals/{symbols}",
@@ -324,7 +324,7 @@ async def get_trading_signals(
     if not end_date:
         end_date = datetime.now().strftime("%Y-%m-%d")
     
-    return service.get_trading_signals(
+    return await service.get_trading_signals(
         symbols=symbols, 
         start_date=start_date, 
         end_date=end_date, 
@@ -354,7 +354,7 @@ async def ask_ai_agent(
         The AI agent's answer
     """
     service = get_token_metrics_service()
-    answer = service.ask_ai_agent(question=question)
+    answer = await service.ask_ai_agent(question=question)
     return {"question": question, "answer": answer}
 
 @router.get(
@@ -392,7 +392,7 @@ async def get_trader_indices(
     if not end_date:
         end_date = datetime.now().strftime("%Y-%m-%d")
     
-    return service.get_trader_indices(start_date=start_date, end_date=end_date)
+    return await service.get_trader_indices(start_date=start_date, end_date=end_date)
 
 @router.get(
     "/sentiment",
@@ -422,7 +422,7 @@ async def get_all_sentiment(
         Sentiment data for all tokens
     """
     service = get_token_metrics_service()
-    return service.get_sentiment(symbols=None, limit=limit, page=page)
+    return await service.get_sentiment(symbols=None, limit=limit, page=page)
 
 @router.get(
     "/sentiment/{symbols}",
@@ -457,4 +457,4 @@ async def get_token_sentiment(
         Sentiment data for the specified tokens
     """
     service = get_token_metrics_service()
-    return service.get_sentiment(symbols=symbols, limit=limit, page=page) 
\ No newline at end of file
+    return await service.get_sentiment(symbols=symbols, limit=limit, page=page) 
\ No newline at end of file
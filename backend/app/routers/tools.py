@@ -3,15 +3,20 @@ from typing import Dict, List, Any, Optional
 from fastapi import APIRouter, Query, status, HTTPException, Path
 
 from app.service.search.pumpfun import (
-    fetch_top_token_creators, get_dev_holdings, get_first_buyers, 
+    get_dev_holdings, get_first_buyers, 
     get_historical_price_and_volume, get_last_n_transactions, get_latest_trades, 
-    get_token_creation_info, get_token_information, get_top_market_cap_pumpfun_coin, 
+    get_token_creation_info, get_token_dashboard, get_token_information, 
     get_top_token_holders, get_top_traders, get_trading_volume_on_dexs, 
     get_volume_and_marketcap
 )
+from app.service.refresher import refresher
+from app.service.scheduler import UpstreamOverloadedError
+from app.utils.json_response import FastJSONRoute
 
+# endpoints return upstream payloads as Dict[str, Any], they are serialized without re-validation
 router = APIRouter(
     prefix="/tools",
+    route_class=FastJSONRoute,
     tags=["Dashmetrics - Tools"],
     responses={
         404: {"description": "Not found"},
@@ -116,7 +121,7 @@ async def top_market_cap_pumpfun_coin():
     Returns:
         List of tokens sorted by market capitalization
     """
-    return await get_top_market_cap_pumpfun_coin()
+    return await refresher.get("pump_top_market_cap")
     
 @router.get(
     "/pump-info/{token}",
@@ -161,7 +166,7 @@ async def top_token_creators():
     Returns:
         List of top token creators with their statistics
     """
-    return await fetch_top_token_creators()
+    return await refresher.get("pump_top_token_creators")
 
 @router.get(
     "/pump-top-traders-token/{token_mint_address}",
@@ -285,6 +290,55 @@ async def get_latest_trades_(
     """
     return await get_latest_trades(token_address=token_mint_address, limit=limit)
 
+@router.get(
+    "/pump-token-dashboard/{token_mint_address}",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Get token dashboard",
+    description="Dashmetrics analytics: Retrieves top holders, token information, trading volume on DEXes, top traders and latest trades of a token in a single upstream request"
+)
+async def token_dashboard(
+    token_mint_address: str = Path(
+        ..., 
+        description="Token mint address"
+    ),
+    since: Optional[datetime] = Query(
+        None, 
+        description="Start of the window for token information and trading volumes (defaults to 24 hours ago)"
+    ),
+    traders_limit: int = Query(
+        10, 
+        ge=1,
+        description="Number of top traders to return"
+    ),
+    trades_limit: int = Query(
+        10, 
+        ge=1,
+        description="Number of latest trades to return"
+    ),
+):
+    """
+    Get every section of the token view with one aliased GraphQL request using Dashmetrics.
+    
+    Args:
+        token_mint_address: Token mint address
+        since: Start of the window for token information and trading volumes
+        traders_limit: Number of top traders to return
+        trades_limit: Number of latest trades to return
+        
+    Returns:
+        Top holders, token information, trading volume on DEXes, top traders and latest trades,
+        each shaped like the response of its own endpoint
+    """
+    if since is None:
+        since = datetime.utcnow() - timedelta(hours=24)
+    return await get_token_dashboard(
+        token_mint_address=token_mint_address,
+        since=since,
+        traders_limit=traders_limit,
+        trades_limit=trades_limit
+    )
+
 ################################ NOT USED ################################
     
 @router.get(
@@ -314,6 +368,10 @@ async def historical_price_and_volume(
         ge=1,
         description="Number of interval units to aggregate"
     ),
+    fill_gaps: bool = Query(
+        False, 
+        description="Return flat zero-volume candles for intervals without trades"
+    ),
 ):
     """
     Get historical price and volume data for a specific token using Dashmetrics.
@@ -323,6 +381,7 @@ async def historical_price_and_volume(
         since: Start timestamp for historical data
         interval_in: Interval unit for data aggregation
         interval_count: Number of interval units to aggregate
+        fill_gaps: Fill intervals without trades
         
     Returns:
         Historical price and volume data for the specified token
@@ -331,7 +390,9 @@ async def historical_price_and_volume(
         HTTPException: If there's an error retrieving the data
     """
     try:
-        return await get_historical_price_and_volume(token_mint_address, since, interval_in, interval_count)
+        return await get_historical_price_and_volume(token_mint_address, since, interval_in, interval_count, fill_gaps)
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -369,6 +430,8 @@ async def last_n_transactions(
     """
     try:
         return await get_last_n_transactions(token_mint_address, n)
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
     
@@ -400,5 +463,7 @@ async def token_creation_info(
     """
     try:
         return await get_token_creation_info(token_mint_address)
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
\ No newline at end of file
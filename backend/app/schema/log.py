@@ -11,6 +11,7 @@ class LogModel(BaseModel):
     ip: str
     status_response: int
     response: str
+    response_size: Optional[int] = None
     request_query: Optional[str] = None
     request_body: Optional[Union[str, bytes]] = None
     description: Optional[str] = None
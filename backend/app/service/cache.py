@@ -0,0 +1,123 @@
+import functools
+import inspect
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.service.cache_backend import CacheBackend, create_backend
+from app.service.single_flight import SingleFlight
+from app.utils.json_response import RawJSON, dumps
+
+
+class ResponseCache:
+    """TTL cache for upstream responses, stored in a pluggable backend.
+
+    Concurrent misses for the same key share a single upstream call. The
+    backend is in-process by default, or Redis so every worker shares one copy.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        """Initialize the cache.
+
+        Args:
+            backend: Where values are stored, the CACHE_BACKEND one by default
+        """
+        self.backend = backend or create_backend()
+        self._flight = SingleFlight("response_cache")
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Look up a fresh value.
+
+        Returns:
+            (found, value) tuple
+        """
+        return await self.backend.get(key)
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a value for `ttl` seconds."""
+        await self.backend.set(key, value, ttl)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    async def close(self) -> None:
+        """Release the backend connections. Called once from the app lifespan."""
+        await self.backend.close()
+
+    async def get_or_load(self, key: Hashable, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value or load it, coalescing concurrent misses.
+
+        The upstream call runs in its own task, so a caller that is cancelled
+        does not cancel the call for the other callers waiting on it.
+
+        Args:
+            key: Cache key
+            ttl: Seconds the loaded value stays fresh
+            loader: Coroutine function performing the upstream call
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        found, value = await self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return await self._flight.do(key, lambda: self._load(key, ttl, loader))
+
+    async def _load(self, key: Hashable, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # stored before the shared call completes, so no caller starts a second load in between
+        value = await loader()
+        await self.set(key, value, ttl)
+        return value
+
+    def cached(self, namespace: str, ttl: float, raw: bool = False) -> Callable:
+        """Decorator caching an async function by its bound arguments.
+
+        Args:
+            namespace: Prefix separating the keys of each endpoint
+            ttl: Seconds a result stays fresh
+            raw: Serialize the result once when it is loaded and return it as RawJSON.
+                Only for functions whose result goes straight into a response
+        """
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (namespace, json.dumps(bound.arguments, sort_keys=True, default=str))
+                if raw:
+                    return await self.get_or_load(key, ttl, lambda: self._load_raw(func, *args, **kwargs))
+                return await self.get_or_load(key, ttl, lambda: func(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    async def _load_raw(func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> RawJSON:
+        return RawJSON(dumps(await func(*args, **kwargs)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache counters.
+
+        Returns:
+            Backend size counters, and hit, miss and coalesced counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "inflight": self._flight.inflight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "coalesced": self._flight.coalesced,
+            "errors": self._flight.errors,
+        }
+
+
+response_cache = ResponseCache()
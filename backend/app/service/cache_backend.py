@@ -0,0 +1,319 @@
+import abc
+import fnmatch
+import importlib.util
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from app.constant.config import (
+    CACHE_BACKEND,
+    CACHE_COMPRESS_LEVEL,
+    CACHE_COMPRESS_MIN_BYTES,
+    CACHE_KEY_PREFIX,
+    CACHE_MAX_BYTES,
+    REDIS_URL,
+)
+from app.utils.json_response import RawJSON, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# first byte of an encoded value
+_FLAG_ZLIB = 0x01
+_FLAG_RAW = 0x02
+
+
+def encode(value: Any, compress_min_bytes: int = CACHE_COMPRESS_MIN_BYTES, level: int = CACHE_COMPRESS_LEVEL) -> bytes:
+    """Serialize a cached value to bytes.
+
+    The value is encoded as compact UTF-8 JSON, with orjson when installed,
+    and compressed with zlib when it is at least `compress_min_bytes` long.
+    A one-byte header records the compression and whether the value was
+    RawJSON, so it is decoded back to the same type.
+
+    Args:
+        value: JSON-compatible value or RawJSON
+        compress_min_bytes: Smallest encoding compressed, 0 disables compression
+        level: zlib compression level
+
+    Returns:
+        Header byte followed by the payload
+    """
+    return _pack(dumps(value), isinstance(value, RawJSON), compress_min_bytes, level)
+
+
+def _pack(payload: bytes, raw: bool, compress_min_bytes: int, level: int) -> bytes:
+    flags = _FLAG_RAW if raw else 0
+    if compress_min_bytes and len(payload) >= compress_min_bytes:
+        flags |= _FLAG_ZLIB
+        payload = zlib.compress(payload, level)
+    return bytes((flags,)) + payload
+
+
+def decode(data: bytes) -> Any:
+    """Deserialize a value written by `encode`."""
+    flags, payload = data[0], data[1:]
+    if flags & _FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    if flags & _FLAG_RAW:
+        return RawJSON(payload)
+    return loads(payload)
+
+
+def key_string(key: Hashable) -> str:
+    """Flatten a cache key such as ("ohlcv", '{"network": ...}') to a string key."""
+    if isinstance(key, tuple):
+        return ":".join(str(part) for part in key)
+    return str(key)
+
+
+class CacheBackend(abc.ABC):
+    """Storage of the response cache. Values are JSON-compatible or RawJSON."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Look up a fresh value.
+
+        Returns:
+            (found, value) tuple
+        """
+
+    @abc.abstractmethod
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a value for `ttl` seconds."""
+
+    @abc.abstractmethod
+    async def clear(self) -> None:
+        """Drop every value of this cache."""
+
+    async def close(self) -> None:
+        """Release the connections. Called once from the app lifespan."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the storage counters."""
+        return {"backend": self.name}
+
+
+class CacheEntry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: Any, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class InProcessBackend(CacheBackend):
+    """Memory-bounded TTL/LRU storage in this worker. Values are kept as Python objects, never copied."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        """Initialize the storage.
+
+        Args:
+            max_bytes: Maximum total size of the cached values, in bytes of their JSON encoding
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, RawJSON):
+            return len(value)
+        return len(dumps(value))
+
+    async def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry.value
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a value, evicting the least recently used entries to stay within budget."""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CacheEntry(value, size, time.monotonic() + ttl)
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class MemoryRedis:
+    """In-process stand-in for the few `redis.asyncio.Redis` commands RedisBackend uses.
+
+    Selected with a `memory://` URL, to run RedisBackend, its encoding and
+    key layout without a Redis server, e.g. locally or in benchmarks.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    async def set(self, key: str, value: bytes, px: Optional[int] = None) -> bool:
+        self._data[key] = (bytes(value), None if px is None else time.monotonic() + px / 1000)
+        return True
+
+    async def delete(self, *keys: Any) -> int:
+        keys = [key.decode() if isinstance(key, bytes) else key for key in keys]
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def scan_iter(self, match: str = "*", count: Optional[int] = None):
+        for key in list(self._data):
+            if self._live(key) is not None and fnmatch.fnmatchcase(key, match):
+                yield key.encode()
+
+    async def aclose(self) -> None:
+        self._data.clear()
+
+
+class RedisBackend(CacheBackend):
+    """Storage in Redis, shared by every worker. Values are stored encoded and compressed by `encode`."""
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str = REDIS_URL,
+        prefix: str = CACHE_KEY_PREFIX,
+        compress_min_bytes: int = CACHE_COMPRESS_MIN_BYTES,
+        compress_level: int = CACHE_COMPRESS_LEVEL,
+    ):
+        """Initialize the backend. The connection pool is opened on first use.
+
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379/0, or memory:// for an in-process fake
+            prefix: Prepended to every key, so several apps can share a database
+            compress_min_bytes: Smallest encoded value compressed, 0 disables compression
+            compress_level: zlib compression level
+        """
+        if not url.startswith("memory://") and importlib.util.find_spec("redis") is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the `redis` package, or a memory:// REDIS_URL")
+        self.url = url
+        self.prefix = prefix
+        self.compress_min_bytes = compress_min_bytes
+        self.compress_level = compress_level
+        self._client = None
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_stored = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            if self.url.startswith("memory://"):
+                self._client = MemoryRedis()
+            else:
+                import redis.asyncio
+
+                self._client = redis.asyncio.Redis.from_url(self.url)
+        return self._client
+
+    def _key(self, key: Hashable) -> str:
+        return self.prefix + key_string(key)
+
+    async def get(self, key: Hashable) -> Tuple[bool, Any]:
+        # a cache failure must not fail the request, it is a miss
+        try:
+            data = await self.client.get(self._key(key))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache read failed: {e}")
+            return False, None
+        if data is None:
+            return False, None
+        return True, decode(data)
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        payload = dumps(value)
+        data = _pack(payload, isinstance(value, RawJSON), self.compress_min_bytes, self.compress_level)
+        try:
+            await self.client.set(self._key(key), data, px=max(int(ttl * 1000), 1))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache write failed: {e}")
+            return
+        self.bytes_in += len(payload)
+        self.bytes_stored += len(data)
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}*", count=500)]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        parts = urlsplit(self.url)
+        # never report the password
+        url = urlunsplit((parts.scheme, parts.netloc.rsplit("@", 1)[-1], parts.path, "", "")) if parts.netloc else self.url
+        return {
+            "backend": self.name,
+            "url": url,
+            "prefix": self.prefix,
+            "backend_errors": self.errors,
+            "bytes_in": self.bytes_in,
+            "bytes_stored": self.bytes_stored,
+            "compression_ratio": round(self.bytes_stored / self.bytes_in, 4) if self.bytes_in else None,
+        }
+
+
+def create_backend(kind: str = CACHE_BACKEND) -> CacheBackend:
+    """Create the backend selected by CACHE_BACKEND, "memory" or "redis"."""
+    if kind == "memory":
+        return InProcessBackend()
+    if kind == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND '{kind}', expected memory or redis")
@@ -0,0 +1,252 @@
+import importlib.util
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.constant.config import (
+    BITQUERY_CONNECT_TIMEOUT,
+    BITQUERY_CONNECTION_LIMIT,
+    BITQUERY_DNS_CACHE_TTL,
+    BITQUERY_KEEPALIVE_TIMEOUT,
+    BITQUERY_READ_TIMEOUT,
+    HTTP2_ENABLED,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT,
+)
+from app.utils.tracing import aiohttp_trace_config, httpx_trace_hook
+
+# httpx and aiohttp are imported on first use, they are slow to import and not needed to boot
+if TYPE_CHECKING:
+    import aiohttp
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientManager:
+    """Owns a single pooled httpx.AsyncClient, created on first use and closed with the app."""
+
+    def __init__(
+        self,
+        name: str,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        timeout: float = HTTP_TIMEOUT,
+        http2: bool = HTTP2_ENABLED,
+    ):
+        """Initialize the client manager.
+
+        Args:
+            name: Name used in logs and pool statistics
+            max_connections: Maximum number of concurrent connections
+            max_keepalive_connections: Maximum number of idle connections kept alive
+            keepalive_expiry: Seconds an idle connection is kept before being closed
+            timeout: Default timeout in seconds for every request
+            http2: Negotiate HTTP/2 when the `h2` package is installed
+        """
+        self.name = name
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.http2 = http2
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    async def start(self) -> None:
+        """Create the pooled client ahead of the first request."""
+        self._create()
+
+    def _create(self) -> "httpx.AsyncClient":
+        if self._client is not None:
+            return self._client
+
+        import httpx
+
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(f"HTTP/2 requested for {self.name} but `h2` is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self._client = httpx.AsyncClient(
+            limits=limits,
+            timeout=httpx.Timeout(self.timeout),
+            http2=http2,
+            event_hooks={"request": [httpx_trace_hook(self.name)]},
+        )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the pooled client and every open connection."""
+        if self._client is None:
+            return
+
+        await self._client.aclose()
+        self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        return self._create()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get a snapshot of the connection pool usage.
+
+        Returns:
+            Number of connections in use and idle, and requests waiting for a connection
+        """
+        stats = {
+            "name": self.name,
+            "started": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "in_use": 0,
+            "idle": 0,
+            "waiting": 0,
+        }
+        if self._client is None:
+            return stats
+
+        # httpx does not expose pool usage publicly, read it from the httpcore pool
+        pool = getattr(self._client._transport, "_pool", None)
+        if pool is None:
+            return stats
+
+        for connection in pool.connections:
+            if connection.is_idle():
+                stats["idle"] += 1
+            else:
+                stats["in_use"] += 1
+        stats["waiting"] = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+        return stats
+
+
+class AiohttpSessionManager:
+    """Owns a single long-lived aiohttp.ClientSession, created on first use and closed with the app."""
+
+    def __init__(
+        self,
+        name: str,
+        limit: int = BITQUERY_CONNECTION_LIMIT,
+        dns_cache_ttl: int = BITQUERY_DNS_CACHE_TTL,
+        keepalive_timeout: float = BITQUERY_KEEPALIVE_TIMEOUT,
+        connect_timeout: float = BITQUERY_CONNECT_TIMEOUT,
+        read_timeout: float = BITQUERY_READ_TIMEOUT,
+    ):
+        """Initialize the session manager.
+
+        Args:
+            name: Name used in logs and pool statistics
+            limit: Maximum number of concurrent connections
+            dns_cache_ttl: Seconds resolved host names are cached
+            keepalive_timeout: Seconds an idle connection is kept before being closed
+            connect_timeout: Seconds allowed to acquire and open a connection
+            read_timeout: Seconds allowed between two reads of the response
+        """
+        self.name = name
+        self.limit = limit
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def start(self) -> None:
+        """Create the session and its connector ahead of the first request."""
+        self._create()
+
+    def _create(self) -> "aiohttp.ClientSession":
+        if self._session is not None:
+            return self._session
+
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(total=None, connect=self.connect_timeout, sock_read=self.read_timeout)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trace_configs=[aiohttp_trace_config(self.name)],
+        )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session and every open connection."""
+        if self._session is None:
+            return
+
+        await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        """The shared session. Must be first used from inside the running event loop."""
+        return self._create()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get a snapshot of the connector usage.
+
+        Returns:
+            Number of connections in use and idle, and requests waiting for a connection
+        """
+        stats = {
+            "name": self.name,
+            "started": self._session is not None,
+            "http2": False,
+            "max_connections": self.limit,
+            "max_keepalive_connections": self.limit,
+            "in_use": 0,
+            "idle": 0,
+            "waiting": 0,
+        }
+        if self._session is None:
+            return stats
+
+        # aiohttp does not expose connector usage publicly, read it from the connector
+        connector = self._session.connector
+        stats["in_use"] = len(getattr(connector, "_acquired", ()))
+        stats["idle"] = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        stats["waiting"] = sum(len(waiters) for waiters in getattr(connector, "_waiters", {}).values())
+        return stats
+
+
+geckoterminal_client = HTTPClientManager(name="geckoterminal")
+tokenmetrics_client = HTTPClientManager(name="tokenmetrics")
+bitquery_session = AiohttpSessionManager(name="bitquery")
+
+
+def get_geckoterminal_client() -> "httpx.AsyncClient":
+    """Get the shared GeckoTerminal HTTP client.
+
+    Returns:
+        The pooled httpx.AsyncClient, closed by the app lifespan
+    """
+    return geckoterminal_client.client
+
+
+def get_tokenmetrics_client() -> "httpx.AsyncClient":
+    """Get the shared Token Metrics HTTP client.
+
+    Returns:
+        The pooled httpx.AsyncClient, closed by the app lifespan
+    """
+    return tokenmetrics_client.client
+
+
+def get_bitquery_session() -> "aiohttp.ClientSession":
+    """Get the shared BitQuery aiohttp session.
+
+    Returns:
+        The long-lived aiohttp.ClientSession, closed by the app lifespan
+    """
+    return bitquery_session.session
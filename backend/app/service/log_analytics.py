@@ -0,0 +1,337 @@
+"""Latency analytics over the weekly CSV access logs.
+
+Run from the backend directory:
+    python -m app.service.log_analytics --hours 24
+    python -m app.service.log_analytics --since 2024-05-01 --until 2024-06-01 --top 20
+"""
+import argparse
+import csv
+import functools
+import glob
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.constant.config import LOG_ANALYTICS_ACCURACY, LOG_ANALYTICS_CACHE_WEEKS, LOG_ANALYTICS_MAX_PATHS
+from app.utils.ddsketch import DDSketch
+from app.utils.logger import CSV_HEADER, LOG_DIR, get_csv_filename
+
+QUANTILES = (0.5, 0.95, 0.99)
+OTHER_PATHS = "(other)"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_WEEK_FILE = re.compile(r"log_week_(\d+)_(\d+)\.csv$")
+
+_COLUMN = {name: index for index, name in enumerate(CSV_HEADER)}
+
+
+def local_time(value: datetime) -> datetime:
+    """Convert a timezone-aware datetime to the naive local time the logs are written in, naive ones are kept."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def week_span(year: int, week: int) -> Optional[Tuple[datetime, datetime]]:
+    """Time range of the rows `get_csv_filename` puts in a weekly file.
+
+    Files are named after the ISO week and the calendar year of a date, so
+    the rows of a week spanning New Year are split between two files.
+    """
+    days = []
+    for iso_year in (year - 1, year, year + 1):
+        try:
+            monday = date.fromisocalendar(iso_year, week, 1)
+        except ValueError:
+            continue
+        days += [day for day in (monday + timedelta(days=i) for i in range(7)) if day.year == year]
+    if not days:
+        return None
+    return datetime.combine(min(days), time()), datetime.combine(max(days) + timedelta(days=1), time())
+
+
+class PathStats:
+    """Requests, errors and latency sketch of one path."""
+
+    __slots__ = ("requests", "errors", "client_errors", "latency")
+
+    def __init__(self, relative_accuracy: float):
+        self.requests = 0
+        self.errors = 0
+        self.client_errors = 0
+        self.latency = DDSketch(relative_accuracy)
+
+    def add(self, status_code: int, duration_ms: float) -> None:
+        self.requests += 1
+        if status_code >= 500:
+            self.errors += 1
+        elif status_code >= 400:
+            self.client_errors += 1
+        self.latency.add(duration_ms)
+
+    def merge(self, other: "PathStats") -> None:
+        self.requests += other.requests
+        self.errors += other.errors
+        self.client_errors += other.client_errors
+        self.latency.merge(other.latency)
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50, p95, p99 = self.latency.quantiles(QUANTILES)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else None,
+            "client_errors": self.client_errors,
+            "p50_ms": None if p50 is None else round(p50, 1),
+            "p95_ms": None if p95 is None else round(p95, 1),
+            "p99_ms": None if p99 is None else round(p99, 1),
+            "mean_ms": None if self.latency.mean is None else round(self.latency.mean, 1),
+        }
+
+
+class Summary:
+    """Per-path statistics of a set of log rows, capped to `max_paths` distinct paths."""
+
+    def __init__(self, relative_accuracy: float, max_paths: int):
+        self.relative_accuracy = relative_accuracy
+        self.max_paths = max_paths
+        self.paths: Dict[str, PathStats] = {}
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    def _stats(self, path: str) -> PathStats:
+        stats = self.paths.get(path)
+        if stats is None:
+            if len(self.paths) >= self.max_paths:
+                path = OTHER_PATHS
+                stats = self.paths.get(path)
+            if stats is None:
+                stats = self.paths[path] = PathStats(self.relative_accuracy)
+        return stats
+
+    def add(self, path: str, action_date: datetime, status_code: int, duration_ms: float) -> None:
+        self._stats(path).add(status_code, duration_ms)
+        if self.first is None or action_date < self.first:
+            self.first = action_date
+        if self.last is None or action_date > self.last:
+            self.last = action_date
+
+    def merge(self, other: "Summary") -> None:
+        for path, stats in other.paths.items():
+            self._stats(path).merge(stats)
+        for moment in (other.first, other.last):
+            if moment is not None:
+                self.first = moment if self.first is None else min(self.first, moment)
+                self.last = moment if self.last is None else max(self.last, moment)
+
+
+class LogAnalytics:
+    """Request counts, error rates and latency percentiles per path, read from the weekly CSV logs.
+
+    Files are streamed row by row, so memory is bounded by the number of
+    distinct paths and the size of their sketches, not by the log size.
+    Paths are grouped by route template, e.g. /tools/pump-first-latest-trades/{token_mint_address}.
+    The summary of a past week is cached, since its file no longer changes,
+    and reused by every window covering the whole file, so long windows
+    merge one sketch per week. Only the current week and the weeks cut by
+    the window edges are read again.
+    """
+
+    def __init__(
+        self,
+        log_dir: str = LOG_DIR,
+        normalize: Optional[Callable[[str], str]] = None,
+        relative_accuracy: float = LOG_ANALYTICS_ACCURACY,
+        max_paths: int = LOG_ANALYTICS_MAX_PATHS,
+        cache_weeks: int = LOG_ANALYTICS_CACHE_WEEKS,
+    ):
+        """Initialize the analytics.
+
+        Args:
+            log_dir: Directory of the weekly CSV files
+            normalize: Maps a request path to the path it is reported under, e.g. its route template
+            relative_accuracy: Relative error of the latency percentiles
+            max_paths: Distinct paths reported, the others are grouped under "(other)"
+            cache_weeks: Summaries of past weeks kept in memory
+        """
+        self.log_dir = log_dir
+        self.normalize = normalize or (lambda path: path)
+        self.relative_accuracy = relative_accuracy
+        self.max_paths = max_paths
+        self.cache_weeks = cache_weeks
+        self._cache: "OrderedDict[str, Tuple[Tuple[int, int], Summary]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.files_read = 0
+        self.rows_read = 0
+
+    def _summary(self) -> Summary:
+        return Summary(self.relative_accuracy, self.max_paths)
+
+    def files(self, since: datetime, until: datetime) -> List[str]:
+        """Weekly files whose name allows rows in [since, until)."""
+        selected = []
+        for filename in sorted(glob.glob(os.path.join(self.log_dir, "log_week_*.csv"))):
+            match = _WEEK_FILE.search(filename)
+            span = week_span(int(match.group(2)), int(match.group(1))) if match else None
+            if span is None or (span[0] < until and since < span[1]):
+                selected.append(filename)
+        return selected
+
+    def rows(self, filename: str) -> Iterator[Tuple[str, datetime, int, float]]:
+        """Stream (path, time, status code, duration in ms) of a file, skipping malformed rows."""
+        with open(filename, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            for row in reader:
+                try:
+                    parsed = (
+                        self.normalize(row[_COLUMN["path_name"]]),
+                        datetime.fromisoformat(row[_COLUMN["action_datetime"]]),
+                        int(row[_COLUMN["status_response"]]),
+                        float(row[_COLUMN["duration"]] or 0) * 1000,
+                    )
+                except (IndexError, ValueError):
+                    # the header, or a row cut by a crash
+                    continue
+                yield parsed
+
+    def _read(self, filename: str, since: datetime, until: datetime, whole: bool = False) -> Tuple[Optional[Summary], Summary]:
+        """Summarize the rows of a file in [since, until), and all its rows too when `whole` is set."""
+        week = self._summary() if whole else None
+        window = self._summary()
+        rows = 0
+        for path, action_date, status_code, duration_ms in self.rows(filename):
+            rows += 1
+            if week is not None:
+                week.add(path, action_date, status_code, duration_ms)
+            if since <= action_date < until:
+                window.add(path, action_date, status_code, duration_ms)
+        with self._lock:
+            self.files_read += 1
+            self.rows_read += rows
+        return week, window
+
+    @staticmethod
+    def _version(filename: str) -> Tuple[int, int]:
+        stat = os.stat(filename)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _cached(self, filename: str, version: Tuple[int, int]) -> Optional[Summary]:
+        with self._lock:
+            cached = self._cache.get(filename)
+            if cached is None or cached[0] != version:
+                return None
+            self._cache.move_to_end(filename)
+            self.cache_hits += 1
+            return cached[1]
+
+    def _store(self, filename: str, version: Tuple[int, int], summary: Summary) -> None:
+        with self._lock:
+            self._cache[filename] = (version, summary)
+            self._cache.move_to_end(filename)
+            while len(self._cache) > self.cache_weeks:
+                self._cache.popitem(last=False)
+
+    def summarize(self, since: datetime, until: datetime) -> Summary:
+        """Merge the statistics of the rows logged in [since, until). Blocking, reads files."""
+        since, until = local_time(since), local_time(until)
+        current = os.path.abspath(get_csv_filename(datetime.now()))
+        total = self._summary()
+        for filename in self.files(since, until):
+            if os.path.abspath(filename) == current:
+                # the week being written, always read again
+                total.merge(self._read(filename, since, until)[1])
+                continue
+
+            # a past week: its summary is cached and reused when the window covers the whole file
+            version = self._version(filename)
+            week, window = self._cached(filename, version), None
+            if week is None:
+                week, window = self._read(filename, since, until, whole=True)
+                self._store(filename, version, week)
+            if week.first is None or (since <= week.first and week.last < until):
+                total.merge(week)
+            else:
+                total.merge(window if window is not None else self._read(filename, since, until)[1])
+        return total
+
+    def report(self, since: datetime, until: datetime, path_prefix: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get per-path request counts, error rates and latency percentiles.
+
+        Args:
+            since: Start of the window, inclusive
+            until: End of the window, exclusive
+            path_prefix: Only report the paths starting with it
+
+        Returns:
+            The window, totals over every path and the statistics of each path, busiest first
+        """
+        since, until = local_time(since), local_time(until)
+        summary = self.summarize(since, until)
+        total = PathStats(self.relative_accuracy)
+        paths = []
+        for path, stats in summary.paths.items():
+            if path_prefix and not path.startswith(path_prefix):
+                continue
+            total.merge(stats)
+            paths.append({"path": path, **stats.to_dict()})
+        paths.sort(key=lambda item: item["requests"], reverse=True)
+        return {
+            "since": since.strftime(TIME_FORMAT),
+            "until": until.strftime(TIME_FORMAT),
+            "relative_accuracy": self.relative_accuracy,
+            "total": total.to_dict(),
+            "paths": paths,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_weeks": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "files_read": self.files_read,
+            "rows_read": self.rows_read,
+        }
+
+
+def route_templates(routes: Iterable[Any]) -> Callable[[str], str]:
+    """Map request paths to the path template of the route they match, e.g. /tools/x/{token_mint_address}."""
+    patterns = [(route.path_regex, route.path) for route in routes if hasattr(route, "path_regex")]
+
+    @functools.lru_cache(maxsize=4096)
+    def normalize(path: str) -> str:
+        for regex, template in patterns:
+            if regex.match(path):
+                return template
+        return path
+
+    return normalize
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Report request counts, error rates and latency percentiles per path from the CSV access logs")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Start of the window, e.g. 2024-05-01 or 2024-05-01T12:00")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="End of the window, now by default")
+    parser.add_argument("--hours", type=float, default=24, help="Window length when --since is not given")
+    parser.add_argument("--path", type=str, default=None, help="Only report the paths starting with this prefix")
+    parser.add_argument("--top", type=int, default=30, help="Number of paths printed")
+    parser.add_argument("--log-dir", type=str, default=LOG_DIR, help="Directory of the weekly CSV files")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    until = args.until or datetime.now()
+    since = args.since or until - timedelta(hours=args.hours)
+    # imported here so only the CLI loads the whole app, for its route templates
+    from main import app
+
+    report = LogAnalytics(args.log_dir, normalize=route_templates(app.routes)).report(since, until, args.path)
+    print(f"{report['since']} to {report['until']}, quantiles within {report['relative_accuracy']:.0%}")
+    print(f"{'path':<60}{'requests':>10}{'5xx %':>8}{'4xx':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for item in [{"path": "(all)", **report["total"]}] + report["paths"][: args.top]:
+        error_rate = "-" if item["error_rate"] is None else f"{item['error_rate']:.2%}"
+        p50, p95, p99 = (("-" if item[key] is None else item[key]) for key in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{item['path'][:59]:<60}{item['requests']:>10}{error_rate:>8}{item['client_errors']:>7}{p50:>9}{p95:>9}{p99:>9}")
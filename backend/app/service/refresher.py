@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.constant.config import REFRESH_ENABLED, REFRESH_JITTER
+from app.service.scheduler import background
+from app.service.single_flight import SingleFlight
+from app.utils.json_response import RawJSON, dumps
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidResult(Exception):
+    """A loader returned a result its validator rejected, e.g. an error payload."""
+
+    def __init__(self, result: Any):
+        self.result = result
+        super().__init__(f"invalid result: {str(result)[:200]}")
+
+
+class RefreshedValue:
+    """The last good result of one loader and the outcome of its refreshes."""
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Awaitable[Any]],
+        interval: float,
+        validate: Optional[Callable[[Any], bool]] = None,
+    ):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.validate = validate
+        self.value: Optional[RawJSON] = None
+        self.updated_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.stale_served = 0
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.updated_at is None else time.time() - self.updated_at
+
+    @property
+    def stale(self) -> bool:
+        return self.updated_at is None or self.age > self.interval
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "age": None if self.age is None else round(self.age, 2),
+            "stale": self.stale,
+            "bytes": None if self.value is None else len(self.value),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "stale_served": self.stale_served,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at,
+        }
+
+
+class BackgroundRefresher:
+    """Keeps the results of parameterless upstream calls precomputed in memory.
+
+    Every registered loader is refreshed on a jittered schedule by a task
+    started with the app, at background priority. Requests are served the
+    last good value, already serialized, even while it is being refreshed. A
+    value older than its interval is served as is and triggers a refresh. A
+    failed refresh keeps the previous value.
+    """
+
+    def __init__(self, enabled: bool = REFRESH_ENABLED, jitter: float = REFRESH_JITTER):
+        """Initialize the refresher.
+
+        Args:
+            enabled: Run the schedule, otherwise values are only refreshed by requests finding them stale
+            jitter: Fraction of the interval each wait is randomly shortened or lengthened by
+        """
+        self.enabled = enabled
+        self.jitter = jitter
+        self._values: Dict[str, RefreshedValue] = {}
+        self._flight = SingleFlight("refresher")
+        self._tasks: List[asyncio.Task] = []
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Awaitable[Any]],
+        interval: float,
+        validate: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        """Register a loader to keep fresh.
+
+        Args:
+            name: Key the value is served under
+            loader: Coroutine function without arguments returning a JSON-compatible result
+            interval: Seconds between refreshes
+            validate: Tells whether a result is good, e.g. not an error payload. A loader raising is always a failure
+        """
+        self._values[name] = RefreshedValue(name, loader, interval, validate)
+
+    async def _load(self, entry: RefreshedValue) -> Any:
+        try:
+            result = await entry.loader()
+            if entry.validate is not None and not entry.validate(result):
+                raise InvalidResult(result)
+        except Exception as e:
+            entry.failures += 1
+            entry.last_error = f"{type(e).__name__}: {e}"
+            entry.last_error_at = time.time()
+            logger.warning(f"Refreshing {entry.name} failed, the previous value is kept: {e}")
+            raise
+
+        entry.value = RawJSON(dumps(result))
+        entry.updated_at = time.time()
+        entry.refreshes += 1
+        return entry.value
+
+    async def refresh(self, name: str) -> RawJSON:
+        """Refresh a value now, joining the refresh already running if any.
+
+        Raises:
+            InvalidResult: If the result failed validation
+            Exception: What the loader raised
+        """
+        entry = self._values[name]
+        return await self._flight.do(name, lambda: self._load(entry))
+
+    async def get(self, name: str) -> RawJSON:
+        """Get the last good value, loading it first if there is none yet.
+
+        Args:
+            name: Name the loader was registered under
+
+        Returns:
+            The serialized value. Without a good value yet, the rejected
+            result of the load, e.g. its error payload, is returned as is
+        """
+        entry = self._values[name]
+        if entry.value is None:
+            try:
+                return await self.refresh(name)
+            except InvalidResult as e:
+                return e.result
+
+        if entry.stale:
+            entry.stale_served += 1
+            with background():
+                # the caller is served the stale value, the refresh runs on behind it
+                task = asyncio.ensure_future(self.refresh(name))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return entry.value
+
+    async def _run(self, entry: RefreshedValue) -> None:
+        while True:
+            with background():
+                try:
+                    await self.refresh(entry.name)
+                except Exception:
+                    pass
+            await asyncio.sleep(entry.interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def start(self) -> None:
+        """Start refreshing every registered value. Called once from the app lifespan."""
+        if not self.enabled or self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run(entry)) for entry in self._values.values()]
+
+    async def stop(self) -> None:
+        """Stop the schedule."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the state of every value.
+
+        Returns:
+            Whether the schedule runs, and the age, errors and counters of each value
+        """
+        return {
+            "running": bool(self._tasks),
+            "values": [entry.to_dict() for entry in self._values.values()],
+        }
+
+
+refresher = BackgroundRefresher()
@@ -0,0 +1,423 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import math
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.constant.config import (
+    BITQUERY_BURST,
+    BITQUERY_MAX_QUEUE,
+    BITQUERY_MAX_WAIT,
+    BITQUERY_RATE_PER_MINUTE,
+    GECKOTERMINAL_BURST,
+    GECKOTERMINAL_MAX_QUEUE,
+    GECKOTERMINAL_MAX_WAIT,
+    GECKOTERMINAL_RATE_PER_MINUTE,
+    TOKEN_METRICS_BURST,
+    TOKEN_METRICS_MAX_QUEUE,
+    TOKEN_METRICS_MAX_WAIT,
+    TOKEN_METRICS_RATE_PER_MINUTE,
+    UPSTREAM_BACKOFF_BASE,
+    UPSTREAM_BACKOFF_MAX,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_MAX_RETRY_AFTER,
+    WEB_CONCURRENCY,
+)
+from app.utils.metrics import track_upstream
+from app.utils.tracing import record, span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# statuses meaning "too many requests, try again later"
+RETRY_STATUSES = frozenset({429, 503})
+
+# number of recent waits kept per priority for the percentiles
+_RECENT_WAITS = 1000
+
+request_priority: ContextVar[int] = ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def background() -> Iterator[None]:
+    """Schedule the upstream calls made inside the block behind interactive ones, e.g. for cache warmers."""
+    token = request_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header, given in seconds or as an HTTP date.
+
+    Returns:
+        Seconds to wait, or None when the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryableUpstreamError(Exception):
+    """The upstream asked to slow down with a 429 or 503 response."""
+
+    def __init__(self, provider: str, status: int, retry_after: Optional[float] = None):
+        self.provider = provider
+        self.status = status
+        self.retry_after = retry_after
+        super().__init__(f"{provider} returned {status}" + (f", retry after {retry_after:.1f}s" if retry_after is not None else ""))
+
+
+class UpstreamOverloadedError(HTTPException):
+    """Too many calls are waiting for a provider, the call is refused with a 503 instead of queued."""
+
+    def __init__(self, provider: str, retry_after: float, reason: str):
+        self.provider = provider
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{provider} is busy ({reason}), retry after {math.ceil(retry_after)}s",
+            headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+        )
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` tokens a minute up to `capacity`. A rate of 0 means no limit."""
+
+    def __init__(self, rate_per_minute: float, capacity: int):
+        self.rate = rate_per_minute / 60
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 when one is available now."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def delay_for(self, count: int) -> float:
+        """Seconds until `count` tokens have been available, e.g. for the calls queued ahead and this one."""
+        now = time.monotonic()
+        paused = max(self.paused_until - now, 0.0)
+        if self.rate <= 0:
+            return paused
+        self._refill(now)
+        return paused + max(count - self.tokens, 0.0) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no token for `seconds`, e.g. after a Retry-After."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class WaitStats:
+    """Queue wait times of one priority."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=_RECENT_WAITS)
+
+    def add(self, wait: float) -> None:
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+        self.recent.append(wait)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+
+        def percentile(q: float) -> float:
+            return round(recent[min(int(q * len(recent)), len(recent) - 1)], 4) if recent else 0.0
+
+        return {
+            "count": self.count,
+            "avg_wait": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50_wait": percentile(0.5),
+            "p95_wait": percentile(0.95),
+            "max_wait": round(self.max, 4),
+        }
+
+
+class ProviderScheduler:
+    """Rate limits the calls to one upstream provider.
+
+    Calls take a token from the provider's bucket. When none is left they wait
+    in a priority queue, so interactive requests go ahead of background work.
+    A call is refused with UpstreamOverloadedError when the queue is full or
+    it would wait longer than `max_wait`, rather than hanging the request.
+    Responses with a status in RETRY_STATUSES are retried after their
+    Retry-After, or a jittered exponential backoff, and a Retry-After pauses
+    the whole provider.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_minute: float,
+        burst: int,
+        max_retries: int = UPSTREAM_MAX_RETRIES,
+        backoff_base: float = UPSTREAM_BACKOFF_BASE,
+        backoff_max: float = UPSTREAM_BACKOFF_MAX,
+        max_retry_after: float = UPSTREAM_MAX_RETRY_AFTER,
+        max_queue: int = 0,
+        max_wait: float = 0,
+        workers: int = 1,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            name: Provider name, used in errors and stats
+            rate_per_minute: Calls allowed per minute, 0 disables the limit
+            burst: Calls allowed at once after an idle period
+            max_retries: Retries of a throttled call before giving up
+            backoff_base: First backoff in seconds when there is no Retry-After, doubled on every retry
+            backoff_max: Longest backoff in seconds
+            max_retry_after: Longest Retry-After honoured, a longer one fails the call at once
+            max_queue: Calls allowed to wait for a token, 0 for no limit
+            max_wait: Seconds a call may wait for a token, 0 for no limit
+            workers: Processes with a scheduler for the same provider, the rate and burst are split between them
+        """
+        self.name = name
+        self.workers = max(workers, 1)
+        self.rate_per_minute = rate_per_minute / self.workers
+        self.bucket = TokenBucket(self.rate_per_minute, max(burst // self.workers, 1))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._queue: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self.max_queue_depth = 0
+        self.waits = {priority: WaitStats() for priority in PRIORITY_NAMES}
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.rejected_queue_full = 0
+        self.rejected_max_wait = 0
+
+    def _wake_head(self) -> None:
+        if self._queue:
+            self._queue[0][2].set()
+
+    async def acquire(self, priority: Optional[int] = None) -> float:
+        """Wait for a token.
+
+        Args:
+            priority: INTERACTIVE or BACKGROUND, the priority of the current context by default
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            UpstreamOverloadedError: If the queue is full, or the call would wait longer than `max_wait`
+        """
+        priority = request_priority.get() if priority is None else priority
+        started = time.monotonic()
+        if not self._queue and self.bucket.delay() <= 0:
+            self.bucket.take()
+            self.waits[priority].add(0.0)
+            return 0.0
+
+        # the calls of the same or a higher priority are served first
+        ahead = sum(1 for queued in self._queue if queued[0] <= priority)
+        expected = self.bucket.delay_for(ahead + 1)
+        if self.max_queue and len(self._queue) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise UpstreamOverloadedError(self.name, expected, "queue full")
+        if self.max_wait and expected > self.max_wait:
+            self.rejected_max_wait += 1
+            raise UpstreamOverloadedError(self.name, expected, "wait too long")
+        deadline = started + self.max_wait if self.max_wait else None
+
+        entry = [priority, next(self._sequence), asyncio.Event()]
+        heapq.heappush(self._queue, entry)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        try:
+            while True:
+                if deadline is not None and time.monotonic() >= deadline:
+                    # overtaken by higher priority calls, or the provider was paused meanwhile
+                    self.rejected_max_wait += 1
+                    raise UpstreamOverloadedError(self.name, self.bucket.delay_for(len(self._queue)), "wait too long")
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if self._queue[0] is not entry:
+                    entry[2].clear()
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(entry[2].wait(), timeout=timeout)
+                    continue
+                delay = self.bucket.delay()
+                if delay <= 0:
+                    break
+                entry[2].clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(entry[2].wait(), timeout=delay if timeout is None else min(delay, timeout))
+        except BaseException:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._wake_head()
+            raise
+
+        heapq.heappop(self._queue)
+        self.bucket.take()
+        self._wake_head()
+        wait = time.monotonic() - started
+        self.waits[priority].add(wait)
+        return wait
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        """Seconds to wait before a retry, None to give up."""
+        if attempt >= self.max_retries:
+            return None
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            self.bucket.pause(retry_after)
+            return retry_after
+        # full jitter spreads the retries of concurrent callers
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _throttled_response(self, result: Any) -> Optional[RetryableUpstreamError]:
+        status = getattr(result, "status_code", None) or getattr(result, "status", None)
+        if status not in RETRY_STATUSES:
+            return None
+        return RetryableUpstreamError(self.name, status, parse_retry_after(result.headers.get("Retry-After")))
+
+    @staticmethod
+    async def _discard(response: Any) -> None:
+        """Give the connection of a throttled response back to its pool before the retry."""
+        try:
+            if hasattr(response, "release"):
+                # aiohttp keeps the connection until the body is read or released
+                response.release()
+            elif hasattr(response, "aclose"):
+                await response.aclose()
+        except Exception as e:
+            logger.debug(f"Closing a throttled response failed: {e}")
+
+    async def call(self, send: Callable[[], Awaitable[T]], priority: Optional[int] = None) -> T:
+        """Make an upstream call once a token is available, retrying it while it is throttled.
+
+        `send` either returns an httpx or aiohttp response, retried when its
+        status is in RETRY_STATUSES, or raises RetryableUpstreamError.
+
+        Args:
+            send: Coroutine function making the call, invoked once per attempt
+            priority: INTERACTIVE or BACKGROUND, the priority of the current context by default
+
+        Returns:
+            The result of the last attempt. A throttled response is returned
+            once the retries are exhausted, so callers report it as before
+
+        Raises:
+            RetryableUpstreamError: If `send` raised it on the last attempt
+            UpstreamOverloadedError: If the call could not be queued
+        """
+        for attempt in itertools.count():
+            record(f"{self.name}-queue", await self.acquire(priority))
+            self.calls += 1
+            try:
+                with span(self.name):
+                    result = await track_upstream(self.name, send)
+            except RetryableUpstreamError as e:
+                throttled, response = e, None
+            else:
+                throttled, response = self._throttled_response(result), result
+                if throttled is None:
+                    return result
+
+            self.throttled += 1
+            delay = self._backoff(attempt, throttled.retry_after)
+            if delay is None:
+                self.gave_up += 1
+                logger.warning(f"{self.name} still throttled after {attempt} retries: {throttled}")
+                if response is not None:
+                    return response
+                raise throttled
+
+            if response is not None:
+                await self._discard(response)
+            self.retries += 1
+            with span(f"{self.name}-backoff"):
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the scheduler counters.
+
+        Returns:
+            Rate, queue depth, wait times per priority and retry counters
+        """
+        return {
+            "name": self.name,
+            "rate_per_minute": self.rate_per_minute,
+            "workers": self.workers,
+            "tokens": round(self.bucket.tokens, 2),
+            "paused_for": round(max(self.bucket.paused_until - time.monotonic(), 0.0), 2),
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_queue_depth,
+            "waits": {PRIORITY_NAMES[priority]: stats.to_dict() for priority, stats in self.waits.items()},
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "rejected": {"queue_full": self.rejected_queue_full, "max_wait": self.rejected_max_wait},
+        }
+
+
+geckoterminal_scheduler = ProviderScheduler(
+    "geckoterminal", GECKOTERMINAL_RATE_PER_MINUTE, GECKOTERMINAL_BURST,
+    max_queue=GECKOTERMINAL_MAX_QUEUE, max_wait=GECKOTERMINAL_MAX_WAIT, workers=WEB_CONCURRENCY,
+)
+bitquery_scheduler = ProviderScheduler(
+    "bitquery", BITQUERY_RATE_PER_MINUTE, BITQUERY_BURST,
+    max_queue=BITQUERY_MAX_QUEUE, max_wait=BITQUERY_MAX_WAIT, workers=WEB_CONCURRENCY,
+)
+tokenmetrics_scheduler = ProviderScheduler(
+    "tokenmetrics", TOKEN_METRICS_RATE_PER_MINUTE, TOKEN_METRICS_BURST,
+    max_queue=TOKEN_METRICS_MAX_QUEUE, max_wait=TOKEN_METRICS_MAX_WAIT, workers=WEB_CONCURRENCY,
+)
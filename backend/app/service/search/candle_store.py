@@ -0,0 +1,279 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from app.constant.config import CANDLE_STORE_MAX_CANDLES, CANDLE_STORE_MAX_SERIES, CANDLE_STORE_MIN_REFRESH
+from app.service.search.coingeckco import get_ohlcv_data
+from app.utils.ohlcv import resample, to_rows
+
+# GeckoTerminal returns at most this many candles per call
+MAX_OHLCV_LIMIT = 1000
+
+TIMEFRAME_SECONDS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+}
+
+# aggregate values GeckoTerminal accepts for each timeframe
+GECKOTERMINAL_AGGREGATES = {
+    "day": (1,),
+    "hour": (12, 4, 1),
+    "minute": (15, 5, 1),
+}
+
+SeriesKey = Tuple[str, str, str, int, str, str]
+
+
+def base_timeframe(bucket_seconds: int) -> Tuple[str, int]:
+    """Pick the coarsest GeckoTerminal timeframe and aggregate that evenly divides a bucket.
+
+    Args:
+        bucket_seconds: Size of the requested candles in seconds
+
+    Returns:
+        (timeframe, aggregate) to fetch before resampling
+    """
+    for timeframe, aggregates in GECKOTERMINAL_AGGREGATES.items():
+        for aggregate in aggregates:
+            if bucket_seconds % (TIMEFRAME_SECONDS[timeframe] * aggregate) == 0:
+                return timeframe, aggregate
+    raise ValueError("Intervals must be a whole number of minutes")
+
+
+def max_resampled_limit(bucket_seconds: int) -> int:
+    """Most candles of `bucket_seconds` that one GeckoTerminal response can be resampled into.
+
+    Raises:
+        ValueError: If the bucket is not a whole number of minutes
+    """
+    timeframe, aggregate = base_timeframe(bucket_seconds)
+    ratio = bucket_seconds // (TIMEFRAME_SECONDS[timeframe] * aggregate)
+    if ratio == 1:
+        return MAX_OHLCV_LIMIT
+    # one extra bucket is fetched, the oldest one is usually only partly covered
+    return MAX_OHLCV_LIMIT // ratio - 1
+
+
+class CandleSeries:
+    """Candles of one pool/timeframe, keyed by their open timestamp."""
+
+    def __init__(self):
+        self.candles: Dict[int, List[Any]] = {}
+        # the last full fetch returned the whole history of the pool
+        self.exhaustive = False
+        self.fetched_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def merge(self, candles: List[List[Any]], max_candles: int) -> None:
+        for candle in candles:
+            self.candles[int(candle[0])] = candle
+
+        if len(self.candles) > max_candles:
+            for timestamp in sorted(self.candles)[:len(self.candles) - max_candles]:
+                del self.candles[timestamp]
+
+    def covers(self, limit: int) -> bool:
+        return len(self.candles) >= limit or (self.exhaustive and bool(self.candles))
+
+    def newest(self) -> int:
+        return max(self.candles) if self.candles else 0
+
+    def latest(self, limit: int) -> List[List[Any]]:
+        """Get the most recent candles, newest first like GeckoTerminal."""
+        return [self.candles[timestamp] for timestamp in sorted(self.candles, reverse=True)[:limit]]
+
+
+class CandleStore:
+    """Local OHLCV store that only fetches the candles missing since the last refresh."""
+
+    def __init__(
+        self,
+        max_series: int = CANDLE_STORE_MAX_SERIES,
+        max_candles: int = CANDLE_STORE_MAX_CANDLES,
+        min_refresh: float = CANDLE_STORE_MIN_REFRESH,
+    ):
+        """Initialize the store.
+
+        Args:
+            max_series: Maximum number of series kept, least recently used are dropped
+            max_candles: Maximum number of candles kept per series, larger requests are fetched without being stored
+            min_refresh: Seconds during which a series is served without asking upstream
+        """
+        self.max_series = max_series
+        self.max_candles = max_candles
+        self.min_refresh = min_refresh
+        self._series: "OrderedDict[SeriesKey, CandleSeries]" = OrderedDict()
+        self.full_fetches = 0
+        self.tail_fetches = 0
+        self.direct_fetches = 0
+        self.fetched_candles = 0
+
+    def _get_series(self, key: SeriesKey) -> CandleSeries:
+        series = self._series.get(key)
+        if series is None:
+            series = CandleSeries()
+            self._series[key] = series
+            if len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        else:
+            self._series.move_to_end(key)
+        return series
+
+    async def get_candles(
+        self,
+        network: str,
+        pool_address: str,
+        timeframe: str = "hour",
+        aggregate: int = 1,
+        limit: int = 100,
+        currency: str = "usd",
+        token: str = "base",
+    ) -> Dict[str, List[List[Any]]]:
+        """Get the latest OHLCV candles of a pool, fetching only the missing tail.
+
+        Args:
+            network: Network ID (e.g., "eth", "sui-network")
+            pool_address: Address of the pool
+            timeframe: Timeframe of the candles ("minute", "hour", "day")
+            aggregate: Aggregation period for each candle
+            limit: Number of candles to return (max 1000)
+            currency: Return data in "usd" or "quote" currency
+            token: Return data for "base" or "quote" token
+
+        Returns:
+            {'data': [[timestamp, open, high, low, close, volume], ...]} newest first
+        """
+        limit = min(limit, MAX_OHLCV_LIMIT)
+        if limit > self.max_candles:
+            # more candles than a series keeps, a stored series could never cover them
+            self.direct_fetches += 1
+            response = await get_ohlcv_data(
+                network=network,
+                pool_address=pool_address,
+                timeframe=timeframe,
+                aggregate=aggregate,
+                before_timestamp=int(time.time()),
+                limit=limit,
+                currency=currency,
+                token=token,
+            )
+            self.fetched_candles += len(response.get("data", []))
+            return response
+
+        key = (network, pool_address.lower(), timeframe, aggregate, currency, token)
+        series = self._get_series(key)
+
+        async with series.lock:
+            now = time.time()
+            full = not series.covers(limit)
+            if not full and now - series.fetched_at < self.min_refresh:
+                return {"data": series.latest(limit)}
+
+            fetch_limit = limit
+            if not full:
+                # refetch the newest stored candle too, it is still open
+                bucket = TIMEFRAME_SECONDS.get(timeframe, 3600) * aggregate
+                fetch_limit = int(now - series.newest()) // bucket + 1
+                full = fetch_limit > MAX_OHLCV_LIMIT
+                if full:
+                    fetch_limit = limit
+
+            response = await get_ohlcv_data(
+                network=network,
+                pool_address=pool_address,
+                timeframe=timeframe,
+                aggregate=aggregate,
+                before_timestamp=int(now),
+                limit=fetch_limit,
+                currency=currency,
+                token=token,
+            )
+            candles = response.get("data", [])
+
+            if full:
+                self.full_fetches += 1
+                series.candles.clear()
+                series.exhaustive = len(candles) < fetch_limit
+            else:
+                self.tail_fetches += 1
+            series.merge(candles, self.max_candles)
+
+            self.fetched_candles += len(candles)
+            series.fetched_at = now
+            return {"data": series.latest(limit)}
+
+    async def get_resampled(
+        self,
+        network: str,
+        pool_address: str,
+        bucket_seconds: int,
+        limit: int = 100,
+        currency: str = "usd",
+        token: str = "base",
+        fill_gaps: bool = False,
+    ) -> Dict[str, List[List[Any]]]:
+        """Get candles of any size, resampled from the stored GeckoTerminal candles.
+
+        Args:
+            network: Network ID (e.g., "eth", "sui-network")
+            pool_address: Address of the pool
+            bucket_seconds: Size of the candles in seconds, a whole number of minutes
+            limit: Number of candles to return, at most max_resampled_limit(bucket_seconds)
+            currency: Return data in "usd" or "quote" currency
+            token: Return data for "base" or "quote" token
+            fill_gaps: Return flat, zero volume candles for buckets without trades
+
+        Returns:
+            {'data': [[timestamp, open, high, low, close, volume], ...]} newest first
+        """
+        timeframe, aggregate = base_timeframe(bucket_seconds)
+        ratio = bucket_seconds // (TIMEFRAME_SECONDS[timeframe] * aggregate)
+        # one extra bucket, the oldest one is usually only partly covered
+        fetch_limit = min(ratio * (limit + 1), MAX_OHLCV_LIMIT)
+
+        response = await self.get_candles(
+            network=network,
+            pool_address=pool_address,
+            timeframe=timeframe,
+            aggregate=aggregate,
+            limit=fetch_limit,
+            currency=currency,
+            token=token,
+        )
+        candles = response.get("data", [])
+        if not candles or (ratio == 1 and not fill_gaps):
+            return {"data": candles[:limit]}
+
+        timestamps, opens, highs, lows, closes, volumes = zip(*candles)
+        columns = resample(
+            timestamps, opens, highs, lows, closes,
+            sums={"volume": volumes},
+            bucket_seconds=bucket_seconds,
+            fill_gaps=fill_gaps,
+        )
+        rows = to_rows(columns, ("open", "high", "low", "close", "volume"), newest_first=True)
+        if ratio > 1 and len(candles) >= fetch_limit and len(rows) > 1:
+            # history goes further back than what was fetched
+            rows.pop()
+        return {"data": rows[:limit]}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the store counters.
+
+        Returns:
+            Series and candle counts, and the number of full, tail and unstored fetches
+        """
+        return {
+            "series": len(self._series),
+            "candles": sum(len(series.candles) for series in self._series.values()),
+            "full_fetches": self.full_fetches,
+            "tail_fetches": self.tail_fetches,
+            "direct_fetches": self.direct_fetches,
+            "fetched_candles": self.fetched_candles,
+        }
+
+
+candle_store = CandleStore()
@@ -1,7 +1,37 @@
+import asyncio
+import functools
+from typing import TYPE_CHECKING, Any, Dict, List
+
 from fastapi import HTTPException
-import httpx
-BASE_URL="https://api.geckoterminal.com/api/v2"
 
+from app.constant.config import (
+    BATCH_TOKEN_CONCURRENCY,
+    CACHE_TTL_FIND_POOL,
+    CACHE_TTL_TOKEN,
+    CACHE_TTL_TRENDING_POOLS,
+    REFRESH_INTERVAL_TRENDING_POOLS,
+    GECKOTERMINAL_BASE_URL,
+)
+from app.service.cache import response_cache
+from app.service.http_client import get_geckoterminal_client
+from app.service.refresher import refresher
+from app.service.scheduler import geckoterminal_scheduler
+from app.utils.tracing import span
+
+# httpx is imported inside the calls, like the client itself it is loaded on first use
+if TYPE_CHECKING:
+    import httpx
+
+BASE_URL = GECKOTERMINAL_BASE_URL
+# GeckoTerminal accepts at most this many addresses in one multi-token lookup
+MAX_MULTI_TOKEN_ADDRESSES = 30
+
+def decode(response: "httpx.Response") -> Any:
+    """Parse a GeckoTerminal response body, timed as the `geckoterminal-decode` span of the request."""
+    with span("geckoterminal-decode"):
+        return response.json()
+
+@response_cache.cached("trending_pools", ttl=CACHE_TTL_TRENDING_POOLS, raw=True)
 async def get_sorted_trending_pools(include: str = "base_token,quote_token", page: int = 1, duration: str = "1h"):
     """
     Fetch trending pools on the Sui network and sort them by `pool_created_at` from the most recent to the least recent.
@@ -22,28 +52,55 @@ async def get_sorted_trending_pools(include: str = "base_token,quote_token", pag
         "duration": duration
     }
 
+    import httpx
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            # Extract 'included' if present
-            included_data = data.get("included", [])
-
-            # Sort the 'data' field based on 'pool_created_at' in descending order
-            sorted_data = sorted(
-                data.get("data", []),
-                key=lambda pool: pool["attributes"].get("pool_created_at", ""),
-                reverse=True
-            )
-
-            return {"data": sorted_data, "included": included_data}
+        client = get_geckoterminal_client()
+        response = await geckoterminal_scheduler.call(lambda: client.get(url, params=params))
+        response.raise_for_status()
+        data = decode(response)
+        # Extract 'included' if present
+        included_data = data.get("included", [])
+
+        # Sort the 'data' field based on 'pool_created_at' in descending order
+        sorted_data = sorted(
+            data.get("data", []),
+            key=lambda pool: pool["attributes"].get("pool_created_at", ""),
+            reverse=True
+        )
+
+        return {"data": sorted_data, "included": included_data}
     except httpx.RequestError as e:
         raise HTTPException(status_code=500, detail=f"Request failed: {e}")
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=response.status_code, detail=f"HTTP error: {e.response.json()}")
     
     
+# the homepage list is kept in memory by the refresher, __wrapped__ skips the response cache
+REFRESHED_TRENDING_POOLS = {"include": "base_token,quote_token", "page": 1, "duration": "1h"}
+refresher.register(
+    "trending_pools",
+    functools.partial(get_sorted_trending_pools.__wrapped__, **REFRESHED_TRENDING_POOLS),
+    REFRESH_INTERVAL_TRENDING_POOLS,
+)
+
+async def get_trending_pools(include: str = "base_token,quote_token", page: int = 1, duration: str = "1h"):
+    """
+    Serve trending pools from memory for the refreshed parameters, and through the response cache otherwise.
+
+    Args:
+        include (str): Related resources to include.
+        page (int): Page number for results.
+        duration (str): Duration for sorting the trending list.
+
+    Returns:
+        JSON response containing trending pools sorted by `pool_created_at`.
+    """
+    if {"include": include, "page": page, "duration": duration} == REFRESHED_TRENDING_POOLS:
+        return await refresher.get("trending_pools")
+    return await get_sorted_trending_pools(include=include, page=page, duration=duration)
+    
+    
 async def get_ohlcv_data(
     network: str,
     pool_address: str,
@@ -79,18 +136,21 @@ async def get_ohlcv_data(
         "token": token,
     }
 
+    import httpx
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            response_data = response.json()
-            data = response_data['data']['attributes']['ohlcv_list']
-            return {'data': data}
+        client = get_geckoterminal_client()
+        response = await geckoterminal_scheduler.call(lambda: client.get(url, params=params))
+        response.raise_for_status()
+        response_data = decode(response)
+        data = response_data['data']['attributes']['ohlcv_list']
+        return {'data': data}
     except httpx.RequestError as e:
         raise HTTPException(status_code=500, detail=f"Request failed: {e}")
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=response.status_code, detail=f"HTTP error: {e.response.json()}")
     
+@response_cache.cached("find_pool", ttl=CACHE_TTL_FIND_POOL, raw=True)
 async def find_liquidity_pool_by_token(
     token_address: str,
     network: str = "sui-network",
@@ -117,27 +177,30 @@ async def find_liquidity_pool_by_token(
         "page": page,
     }
 
+    import httpx
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data
-            # # Extract pool addresses from the response
-            # pools = [
-            #     {
-            #         "name": pool.get("attributes", {}).get("name", "Unknown Pool"),
-            #         "address": pool.get("attributes", {}).get("address", "Unknown Address"),
-            #     }
-            #     for pool in data.get("data", [])
-            # ]
+        client = get_geckoterminal_client()
+        response = await geckoterminal_scheduler.call(lambda: client.get(url, params=params))
+        response.raise_for_status()
+        data = decode(response)
+        return data
+        # # Extract pool addresses from the response
+        # pools = [
+        #     {
+        #         "name": pool.get("attributes", {}).get("name", "Unknown Pool"),
+        #         "address": pool.get("attributes", {}).get("address", "Unknown Address"),
+        #     }
+        #     for pool in data.get("data", [])
+        # ]
             
-            # return {"pools": pools}
+        # return {"pools": pools}
     except httpx.RequestError as e:
         raise HTTPException(status_code=500, detail=f"Request failed: {e}")
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=response.status_code, detail=f"HTTP error: {e.response.json()}")
     
+@response_cache.cached("token", ttl=CACHE_TTL_TOKEN)
 async def get_specific_token(
     token_address: str,
     network: str = "sui-network",
@@ -157,12 +220,139 @@ async def get_specific_token(
     url = f"{BASE_URL}/networks/{network}/tokens/{token_address}"
     params = {"include": include}
 
+    import httpx
+
+    try:
+        client = get_geckoterminal_client()
+        response = await geckoterminal_scheduler.call(lambda: client.get(url, params=params))
+        response.raise_for_status()
+        return decode(response)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"Request failed: {e}")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=response.status_code, detail=f"HTTP error: {e.response.json()}")
+    
+@response_cache.cached("tokens_multi", ttl=CACHE_TTL_TOKEN)
+async def get_multiple_tokens(
+    token_addresses: List[str],
+    network: str = "sui-network",
+    include: str = "top_pools"
+):
+    """
+    Fetch details of up to 30 tokens on a network in a single request.
+
+    Args:
+        token_addresses (List[str]): The addresses of the tokens to fetch details for.
+        network (str): The network ID (e.g., "eth", "sui-network").
+        include (str, optional): Additional attributes to include, such as "top_pools".
+
+    Returns:
+        JSON response with the details of every token found.
+    """
+    url = f"{BASE_URL}/networks/{network}/tokens/multi/{','.join(token_addresses)}"
+    params = {"include": include}
+
+    import httpx
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+        client = get_geckoterminal_client()
+        response = await geckoterminal_scheduler.call(lambda: client.get(url, params=params))
+        response.raise_for_status()
+        return decode(response)
     except httpx.RequestError as e:
         raise HTTPException(status_code=500, detail=f"Request failed: {e}")
     except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=response.status_code, detail=f"HTTP error: {e.response.json()}")
\ No newline at end of file
+        raise HTTPException(status_code=response.status_code, detail=f"HTTP error: {e.response.json()}")
+
+def split_multi_token_response(response: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Split a multi-token response into single-token responses.
+
+    Args:
+        response (dict): Response of the multi-token lookup.
+
+    Returns:
+        Mapping of lower-cased token address to a response shaped like `get_specific_token`.
+    """
+    included_by_key = {
+        (item.get("type"), item.get("id")): item
+        for item in response.get("included", [])
+    }
+    tokens = {}
+    for token in response.get("data", []):
+        address = token.get("attributes", {}).get("address")
+        if not address:
+            continue
+        included = []
+        for relationship in token.get("relationships", {}).values():
+            related = relationship.get("data") or []
+            if isinstance(related, dict):
+                related = [related]
+            for item in related:
+                key = (item.get("type"), item.get("id"))
+                if key in included_by_key:
+                    included.append(included_by_key[key])
+        tokens[address.lower()] = {"data": token, "included": included}
+    return tokens
+
+async def get_tokens_batch(
+    token_addresses: List[str],
+    network: str = "sui-network",
+    include: str = "top_pools"
+):
+    """
+    Fetch details of many tokens on a network.
+
+    Uses the multi-token lookup in chunks of 30 addresses. Addresses the lookup
+    does not return, and chunks whose lookup fails, are fetched one by one with
+    bounded concurrency. Errors are reported per address.
+
+    Args:
+        token_addresses (List[str]): The addresses of the tokens to fetch details for.
+        network (str): The network ID (e.g., "eth", "sui-network").
+        include (str, optional): Additional attributes to include, such as "top_pools".
+
+    Returns:
+        {"data": [{"token_address", "data", "error"}, ...]} in the order of the addresses.
+    """
+    # de-duplicate while keeping the caller's order
+    addresses = list(dict.fromkeys(address.strip() for address in token_addresses if address.strip()))
+    chunks = [
+        addresses[i:i + MAX_MULTI_TOKEN_ADDRESSES]
+        for i in range(0, len(addresses), MAX_MULTI_TOKEN_ADDRESSES)
+    ]
+
+    found: Dict[str, Dict[str, Any]] = {}
+    responses = await asyncio.gather(
+        *(get_multiple_tokens(token_addresses=chunk, network=network, include=include) for chunk in chunks),
+        return_exceptions=True
+    )
+    for response in responses:
+        if isinstance(response, dict):
+            found.update(split_multi_token_response(response))
+
+    semaphore = asyncio.Semaphore(BATCH_TOKEN_CONCURRENCY)
+
+    async def fetch_one(address: str) -> Dict[str, Any]:
+        if address.lower() in found:
+            return {"token_address": address, "data": found[address.lower()], "error": None}
+        async with semaphore:
+            try:
+                data = await get_specific_token(token_address=address, network=network, include=include)
+                return {"token_address": address, "data": data, "error": None}
+            except HTTPException as e:
+                return {
+                    "token_address": address,
+                    "data": None,
+                    "error": {"status_code": e.status_code, "detail": e.detail}
+                }
+            except Exception as e:
+                # e.g. an error body that is not JSON, reported like an upstream failure
+                return {
+                    "token_address": address,
+                    "data": None,
+                    "error": {"status_code": 502, "detail": f"{type(e).__name__}: {e}"}
+                }
+
+    results = await asyncio.gather(*(fetch_one(address) for address in addresses))
+    return {"data": list(results)}
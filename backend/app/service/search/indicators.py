@@ -0,0 +1,186 @@
+import math
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.constant.config import CANDLE_STORE_MAX_CANDLES, INDICATOR_CACHE_MAX_SERIES
+from app.service.search.candle_store import MAX_OHLCV_LIMIT, candle_store
+from app.utils.ohlcv import CLOSE, TIMESTAMP
+
+if TYPE_CHECKING:
+    from app.utils.indicators import Indicator
+
+
+class IndicatorSeries:
+    """Values of one indicator over one candle series, extended as candles close."""
+
+    def __init__(self, factory: Callable[[], "Indicator"], max_values: int):
+        self.factory = factory
+        self.max_values = max_values
+        self.indicator: Optional["Indicator"] = None
+        # timestamp of the last closed candle pushed into the indicator
+        self.closed_at: Optional[int] = None
+        self.values: "OrderedDict[int, Tuple[float, ...]]" = OrderedDict()
+
+    def _store(self, timestamp: int, values: Tuple[float, ...]) -> None:
+        self.values[timestamp] = values
+        if len(self.values) > self.max_values:
+            self.values.popitem(last=False)
+
+    def recompute(self, closed: Sequence[Sequence[float]]) -> None:
+        self.indicator = self.factory()
+        self.values.clear()
+        columns = self.indicator.compute(closed)
+        outputs = [columns[name].tolist() for name in self.indicator.outputs]
+        for index, row in enumerate(closed):
+            self._store(int(row[TIMESTAMP]), tuple(output[index] for output in outputs))
+        self.closed_at = int(closed[-1][TIMESTAMP]) if closed else None
+
+    def update(self, rows: Sequence[Sequence[float]]) -> Tuple[List[Tuple[float, ...]], bool]:
+        """Get the indicator values for candles sorted oldest first.
+
+        Every candle but the newest is closed. Closed candles newer than the
+        last update are pushed one at a time, the newest candle is only peeked.
+
+        Returns:
+            One tuple of outputs per candle, and whether the whole series was recomputed
+        """
+        closed, newest = rows[:-1], rows[-1]
+        if len(closed) > self.max_values:
+            # more values than are kept, computed for this window only and
+            # nothing kept, so the next update of a shorter window recomputes
+            self.indicator = self.factory()
+            self.values.clear()
+            self.closed_at = None
+            columns = self.indicator.compute(closed)
+            values = list(zip(*(columns[name].tolist() for name in self.indicator.outputs)))
+            values.append(self.indicator.peek(newest))
+            return values, True
+
+        oldest = int(rows[0][TIMESTAMP])
+        full = (
+            self.indicator is None
+            or self.closed_at is None
+            # candles between the last update and this window are unknown
+            or self.closed_at < oldest
+            # this window starts before the values still kept
+            or oldest < next(iter(self.values), oldest)
+        )
+        if full:
+            self.recompute(closed)
+        else:
+            for row in closed:
+                if int(row[TIMESTAMP]) > self.closed_at:
+                    self._store(int(row[TIMESTAMP]), self.indicator.push(row))
+                    self.closed_at = int(row[TIMESTAMP])
+
+        nan = tuple(math.nan for _ in self.indicator.outputs)
+        values = [self.values.get(int(row[TIMESTAMP]), nan) for row in closed]
+        values.append(self.indicator.peek(newest))
+        return values, full
+
+
+class IndicatorCache:
+    """Incremental indicator values per candle series and indicator, least recently used are dropped."""
+
+    def __init__(self, max_series: int = INDICATOR_CACHE_MAX_SERIES, max_values: int = CANDLE_STORE_MAX_CANDLES):
+        """Initialize the cache.
+
+        Args:
+            max_series: Maximum number of (candle series, indicator) pairs kept
+            max_values: Maximum number of values kept per pair, longer windows are computed without being kept
+        """
+        self.max_series = max_series
+        self.max_values = max_values
+        self._series: "OrderedDict[Tuple[Any, ...], IndicatorSeries]" = OrderedDict()
+        self.full_computes = 0
+        self.incremental_updates = 0
+
+    def _get_series(self, key: Tuple[Any, ...], factory: Callable[[], "Indicator"]) -> IndicatorSeries:
+        series = self._series.get(key)
+        if series is None:
+            series = IndicatorSeries(factory, self.max_values)
+            self._series[key] = series
+            if len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        else:
+            self._series.move_to_end(key)
+        return series
+
+    async def get_indicators(
+        self,
+        indicators: List[Tuple[str, Callable[[], "Indicator"]]],
+        network: str,
+        pool_address: str,
+        timeframe: str = "hour",
+        aggregate: int = 1,
+        limit: int = 100,
+        currency: str = "usd",
+        token: str = "base",
+    ) -> Dict[str, Any]:
+        """Compute indicators over the latest OHLCV candles of a pool.
+
+        Extra candles are fetched before the window so smoothed indicators
+        are warmed up, as far as the 1000 candle upstream limit allows.
+
+        Args:
+            indicators: Output of `parse_indicators`
+            network: Network ID (e.g., "eth", "sui-network")
+            pool_address: Address of the pool
+            timeframe: Timeframe of the candles ("minute", "hour", "day")
+            aggregate: Aggregation period for each candle
+            limit: Number of candles to return values for
+            currency: Return data in "usd" or "quote" currency
+            token: Return data for "base" or "quote" token
+
+        Returns:
+            {'indicators': [names], 'data': [{'timestamp', 'close', <name>: value}, ...]} newest first
+        """
+        warmup = max(factory().warmup for _, factory in indicators)
+        response = await candle_store.get_candles(
+            network=network,
+            pool_address=pool_address,
+            timeframe=timeframe,
+            aggregate=aggregate,
+            limit=min(limit + warmup, MAX_OHLCV_LIMIT),
+            currency=currency,
+            token=token,
+        )
+        rows = response.get("data", [])[::-1]
+        if not rows:
+            return {"indicators": [], "data": []}
+
+        names: List[str] = []
+        columns: List[List[Tuple[float, ...]]] = []
+        series_key = (network, pool_address.lower(), timeframe, aggregate, currency, token)
+        for spec, factory in indicators:
+            series = self._get_series((*series_key, spec), factory)
+            values, full = series.update(rows)
+            if full:
+                self.full_computes += 1
+            else:
+                self.incremental_updates += 1
+            names.extend(series.indicator.outputs)
+            columns.append(values)
+
+        data = []
+        for index in range(len(rows) - 1, max(len(rows) - limit, 0) - 1, -1):
+            entry = {"timestamp": int(rows[index][TIMESTAMP]), "close": rows[index][CLOSE]}
+            outputs = [value for column in columns for value in column[index]]
+            entry.update({name: None if math.isnan(value) else value for name, value in zip(names, outputs)})
+            data.append(entry)
+        return {"indicators": names, "data": data}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache counters.
+
+        Returns:
+            Cached series count, and the number of full and incremental computations
+        """
+        return {
+            "series": len(self._series),
+            "full_computes": self.full_computes,
+            "incremental_updates": self.incremental_updates,
+        }
+
+
+indicator_cache = IndicatorCache()
@@ -1,26 +1,74 @@
-from datetime import datetime, timedelta
-from typing import Dict, Optional
-import aiohttp
-from app.constant.pumpfun import BITQUERY_HEADERS, BITQUERY_URL, DEV_HOLDINGS_QUERY, GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, GET_TOKEN_INFORMATION, GET_TOP_TRADER_TOKEN_PUMPFUN_DEX_QUERY, GET_TRADING_VOLUME_TOKEN_QUERY, HISTORICAL_PRICE_AND_VOLUME_QUERY, PUMPFUN_TOKEN_LATEST_TRADES_QUERY, TOKEN_CREATION_QUERY, TOP_HOLDERS_QUERY, TOP_MARKET_CAP_PUMPFUN_COIN, TOP_TOKEN_CREATORS_PUMPFUN_QUERY, VOLUME_AND_MARKETCAP_QUERY
-import pandas as pd
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from app.constant.pumpfun import BITQUERY_HEADERS, BITQUERY_URL, DEV_HOLDINGS_QUERY, GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, GET_TOKEN_INFORMATION, GET_TOP_TRADER_TOKEN_PUMPFUN_DEX_QUERY, GET_TRADING_VOLUME_TOKEN_QUERY, HISTORICAL_PRICE_AND_VOLUME_PROJECTION, HISTORICAL_PRICE_AND_VOLUME_QUERY, LAST_N_TRANSACTIONS_PROJECTION, LAST_N_TRANSACTIONS_QUERY, PUMPFUN_TOKEN_LATEST_TRADES_QUERY, TOKEN_CREATION_QUERY, TOKEN_DASHBOARD_QUERY, TOKEN_DASHBOARD_SECTIONS, TOP_HOLDERS_QUERY, TOP_MARKET_CAP_PUMPFUN_COIN, TOP_TOKEN_CREATORS_PUMPFUN_QUERY, VOLUME_AND_MARKETCAP_PROJECTION, VOLUME_AND_MARKETCAP_QUERY
+from app.constant.config import DB_CONNECTION_URL, REFRESH_INTERVAL_TOP_MARKET_CAP, REFRESH_INTERVAL_TOP_TOKEN_CREATORS
+from app.service.http_client import get_bitquery_session
+from app.service.refresher import refresher
+from app.service.scheduler import UpstreamOverloadedError, bitquery_scheduler
+from app.service.search.candle_store import TIMEFRAME_SECONDS
+from app.service.single_flight import SingleFlight
+from app.utils.graphql import merge_variables, split_result
+from app.utils.ohlcv import resample, to_rows
+from app.utils.tracing import span
+
+# concurrent identical queries, e.g. many users opening a trending token, share one POST
+bitquery_flight = SingleFlight("bitquery")
+
+def bitquery_key(query: str, variables: Dict[str, str]) -> Tuple[str, str]:
+    """Identify a GraphQL request by the hash of its query and its canonicalized variables."""
+    return (
+        hashlib.sha256(query.encode()).hexdigest(),
+        json.dumps(variables, sort_keys=True, separators=(",", ":"), default=str),
+    )
 
 async def fetch_bitquery_data(query: str, variables: Dict[str, str]) -> Optional[Dict]:
     """
     Helper function to send a GraphQL request to the BitQuery API.
+
+    Identical requests in flight at the same time share one upstream call,
+    callers must not modify the returned response.
     
     :param query: GraphQL query string.
     :param variables: Variables to be passed into the query.
     :return: Parsed JSON response or None if the request fails.
     """
+    return await bitquery_flight.do(bitquery_key(query, variables), lambda: _post_bitquery(query, variables))
+
+async def _post_bitquery(query: str, variables: Dict[str, str]) -> Optional[Dict]:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(BITQUERY_URL, headers=BITQUERY_HEADERS, json={"query": query, "variables": variables}) as response:
-                if response.status != 200:
-                    return None
+        session = get_bitquery_session()
+        response = await bitquery_scheduler.call(
+            lambda: session.post(BITQUERY_URL, headers=BITQUERY_HEADERS, json={"query": query, "variables": variables})
+        )
+        async with response:
+            if response.status != 200:
+                return None
+            with span("bitquery-body"):
+                await response.read()
+            with span("bitquery-decode"):
                 return await response.json()
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return None
     
+def parse_top_holders(data: Optional[Dict]) -> list[dict[str, str]]:
+    """Extract holder details safely from a TOP_HOLDERS_QUERY response."""
+    if not data:
+        return []
+
+    return [
+        {
+            "holder_address": holder['BalanceUpdate']['Account']['Address'],
+            "percentage": float(holder['BalanceUpdate']['Holding']) / 1e7,
+            "token_name": holder['BalanceUpdate']['Currency']['Name'],
+            "symbol": holder['BalanceUpdate']['Currency']['Symbol']
+        }
+        for holder in data.get('data', {}).get('Solana', {}).get('BalanceUpdates', [])
+    ]
+
 async def get_top_token_holders(token_mint_address: str) -> list[dict[str, str]]:
     """
     Fetches the top 10 holders of a specific token.
@@ -30,22 +78,10 @@ async def get_top_token_holders(token_mint_address: str) -> list[dict[str, str]]
     """
     try:
         data = await fetch_bitquery_data(TOP_HOLDERS_QUERY, {"token": token_mint_address})
-        if not data:
-            holders = []
-
-        # Extract holder details safely
-        holders = [
-            {
-                "holder_address": holder['BalanceUpdate']['Account']['Address'],
-                "percentage": float(holder['BalanceUpdate']['Holding']) / 1e7,
-                "token_name": holder['BalanceUpdate']['Currency']['Name'],
-                "symbol": holder['BalanceUpdate']['Currency']['Symbol']
-            }
-            for holder in data.get('data', {}).get('Solana', {}).get('BalanceUpdates', [])
-        ]
-
-        return {"data": holders}
+        return {"data": parse_top_holders(data)}
 
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -66,6 +102,8 @@ async def get_dev_holdings(dev_address: str, token_mint_address: str) -> int:
         # Extract balance safely
         holdings = data.get('data', {}).get('Solana', {}).get('BalanceUpdates', [])
         return {'data': holdings[0]['BalanceUpdate']['balance'] if holdings else 0}
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -76,24 +114,17 @@ async def get_volume_and_marketcap(token_mint_address: str, side: str) -> list[d
         data = await fetch_bitquery_data(VOLUME_AND_MARKETCAP_QUERY, {"token": token_mint_address, "side":side, "time_1h_ago": time_1h_ago})
         if not data:
             return {"error": "Failed to fetch token creation info"}
-        
-        df = pd.json_normalize(data)
-
-        df.rename(columns={
-            'liquidity.Pool.Base.PostAmountInUSD': 'liquidity_in_usd',
-            'marketcap.TokenSupplyUpdate.PostBalanceInUSD': 'marketcap_in_usd',
-            'marketcap.TokenSupplyUpdate.Currency.Name': 'token_name',
-            'marketcap.TokenSupplyUpdate.Currency.Symbol': 'symbol',
-            'marketcap.TokenSupplyUpdate.Currency.MintAddress': 'mint_address',
-        }, inplace=True)
+
         return {
             "metadata": {
                 "token_mint_address": token_mint_address,
                 "side": side,
                 "time_1h_ago": time_1h_ago
             },
-            "data": df.to_dict(orient='records')
+            "data": VOLUME_AND_MARKETCAP_PROJECTION.records(data)
         }
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -108,6 +139,8 @@ async def get_top_market_cap_pumpfun_coin():
             data = []
             
         return {'data': data}
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -135,6 +168,8 @@ async def get_token_information(
             data = data.get('data', {}).get('Solana', {}).get('DEXTradeByTokens', [])
 
         return {"data": data}
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
@@ -151,8 +186,18 @@ async def fetch_top_token_creators():
             data = data.get('data', {}).get('Solana', {}).get('Instructions', [])
 
         return {"data": data}
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
+
+def has_data(result: dict) -> bool:
+    """Tell whether a result holds rows rather than an error, or nothing because the query failed."""
+    return "error" not in result and bool(result.get("data"))
+
+# served from memory and refreshed in the background, see app.service.refresher
+refresher.register("pump_top_market_cap", get_top_market_cap_pumpfun_coin, REFRESH_INTERVAL_TOP_MARKET_CAP, validate=has_data)
+refresher.register("pump_top_token_creators", fetch_top_token_creators, REFRESH_INTERVAL_TOP_TOKEN_CREATORS, validate=has_data)
     
 async def get_top_traders(token_address: str, limit: int = 10) -> dict:
     """
@@ -171,6 +216,8 @@ async def get_top_traders(token_address: str, limit: int = 10) -> dict:
             traders = data.get('data', {}).get('Solana', {}).get('DEXTradeByTokens', [])
         return {"data": traders}
     
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
     
@@ -204,6 +251,8 @@ async def get_trading_volume_on_dexs(
             data = data.get('data', {}).get('Solana', {}).get('DEXTradeByTokens', [])
 
         return {"data": data}
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
     
@@ -211,24 +260,25 @@ async def get_first_buyers(token_address: str, limit: int = 100):
     """
     Fetches the first 'limit' buyers of a specific token on Pump Fun DEX.
 
+    The buys are stored in the trade history, only the ones missing are fetched.
+    Without DB_CONNECTION_URL they are fetched on every request.
+
     :param token_address: The token's mint address.
     :param limit: The number of first buyers to retrieve (default is 100).
     :return: List of dictionaries containing buyer addresses and their purchase amounts.
     """
     try:
-        variables = {
-            "token": token_address,
-            "limit": limit
-        }
-        
-        data = await fetch_bitquery_data(GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, variables)
-        if not data:
-            data = []
-        else:
-            print(data)
-            data = data.get('data', {}).get('Solana', {}).get('DEXTrades', [])
+        if not DB_CONNECTION_URL:
+            variables = {"token": token_address, "limit": limit, "since": "1970-01-01T00:00:00Z"}
+            data = await fetch_bitquery_data(GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, variables)
+            return {"data": data.get('data', {}).get('Solana', {}).get('DEXTrades', []) if data else []}
 
-        return {"data": data}
+        # imported here to keep SQLAlchemy out of the boot path
+        from app.service.search.trade_history import trade_history
+
+        return {"data": await trade_history.first_buyers(token_address, limit)}
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
     
@@ -237,88 +287,130 @@ async def get_latest_trades(token_address: str, limit: int = 50):
     """
     Fetches the latest trades for a specific token on Pump Fun DEX.
 
+    The trades are stored in the trade history, only the ones newer than the
+    last stored trade are fetched. Without DB_CONNECTION_URL they are fetched
+    on every request.
+
     :param token_address: The token's mint address.
     :param limit: The number of latest trades to retrieve (default is 50).
     :return: List of dictionaries containing trade details.
     """
     try:
-        variables = {
-            "token": token_address,
-            "limit": limit
-        }
-        data = await fetch_bitquery_data(PUMPFUN_TOKEN_LATEST_TRADES_QUERY, variables)
-        if not data:
-            data = []
-        else:
-            print(data)
-            data = data.get('data', {}).get('Solana', {}).get('DEXTradeByTokens', [])
+        if not DB_CONNECTION_URL:
+            data = await fetch_bitquery_data(PUMPFUN_TOKEN_LATEST_TRADES_QUERY, {"token": token_address, "limit": limit})
+            return {"data": data.get('data', {}).get('Solana', {}).get('DEXTradeByTokens', []) if data else []}
 
-        return {"data": data}
+        from app.service.search.trade_history import trade_history
+
+        return {"data": await trade_history.latest_trades(token_address, limit)}
+    except UpstreamOverloadedError:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
     
+async def get_token_dashboard(
+    token_mint_address: str,
+    since: datetime,
+    traders_limit: int = 10,
+    trades_limit: int = 10
+) -> dict:
+    """
+    Fetches top holders, token information, trading volume on DEXs, top traders and
+    latest trades of a token with a single BitQuery request.
+
+    :param token_mint_address: The token's mint address.
+    :param since: Start of the window for token information and trading volume on DEXs.
+    :param traders_limit: The number of top traders to retrieve.
+    :param trades_limit: The number of latest trades to retrieve.
+    :return: One entry per section, shaped like the response of its own endpoint.
+    """
+    try:
+        since = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+        curr_time = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+        if since > curr_time:
+            return {"error": "Invalid timestamp"}
+
+        variables = merge_variables({
+            "top_holders": {"token": token_mint_address},
+            "token_information": {"token": token_mint_address, "before_timestamp": since},
+            "trading_volume_on_dexs": {"token": token_mint_address, "since_time": since},
+            "top_traders": {"token": token_mint_address, "limit": traders_limit},
+            "latest_trades": {"token": token_mint_address, "limit": trades_limit},
+        })
+        data = await fetch_bitquery_data(TOKEN_DASHBOARD_QUERY, variables)
+        sections = split_result(data, TOKEN_DASHBOARD_SECTIONS)
+
+        def solana(section: str) -> dict:
+            return (sections[section] or {}).get('data', {}).get('Solana', {})
+
+        return {
+            "top_holders": {"data": parse_top_holders(sections["top_holders"])},
+            "token_information": {"data": solana("token_information").get('DEXTradeByTokens', [])},
+            "trading_volume_on_dexs": {"data": solana("trading_volume_on_dexs").get('DEXTradeByTokens', [])},
+            "top_traders": {"data": solana("top_traders").get('DEXTradeByTokens', [])},
+            "latest_trades": {"data": solana("latest_trades").get('DEXTradeByTokens', [])},
+        }
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
         return {"error": str(e)}
     
 # ===================== NOT USED =====================
 async def get_last_n_transactions(token_mint_address: str, n: int) -> list[dict[str, str]]:
     
-    data = await fetch_bitquery_data(HISTORICAL_PRICE_AND_VOLUME_QUERY, {"token": token_mint_address, "n": n,})
+    data = await fetch_bitquery_data(LAST_N_TRANSACTIONS_QUERY, {"token": token_mint_address, "n": n,})
     if not data:
         return {"error": "Failed to fetch token creation info"}
 
-    df = pd.json_normalize(data)
-
-    df.rename(columns={
-        'Block.Time': 'time',
-        'Trade.PriceInUSD': 'price_in_usd',
-        'Trade.Account.Address': 'address',
-        'Trade.Account.Owner': 'owner',
-        'Trade.Amount': 'amount',
-        'Trade.Price': 'price',
-        'Transaction.Signature': 'transaction_signature'
-    }, inplace=True)
-
-    df['time'] = pd.to_datetime(df['time'])
-
-    df['volume'] = pd.to_numeric(df['volume'])
-    df['volume_in_usd'] = pd.to_numeric(df['volume_in_usd'])
-
     return {
         "metadata": {
             "token_mint_address": token_mint_address,
             "n": n
         },
-        "data": df.to_dict(orient='records')
+        "data": LAST_N_TRANSACTIONS_PROJECTION.records(data)
     }
     
 
-async def get_historical_price_and_volume(token_mint_address: str, since: datetime, interval_in: str, interval_count: int) -> list[dict[str, str]]:
-    data = await fetch_bitquery_data(HISTORICAL_PRICE_AND_VOLUME_QUERY, {"token": token_mint_address, "since": since, "interval_in": interval_in, "interval_count": interval_count})
-    if not data:
-        return {"error": "Failed to fetch token creation info"}
-
-    df = pd.json_normalize(data)
-
-    df.rename(columns={
-        'Block.Timefield': 'time',
-        'Trade.open': 'open',
-        'Trade.high': 'high',
-        'Trade.low': 'low',
-        'Trade.close': 'close',
-    }, inplace=True)
-
-    df['time'] = pd.to_datetime(df['time'])
+async def get_historical_price_and_volume(token_mint_address: str, since: datetime, interval_in: str, interval_count: int, fill_gaps: bool = False) -> list[dict[str, str]]:
+    """
+    Fetches OHLCV candles of a token since a timestamp.
 
-    df['volume'] = pd.to_numeric(df['volume'])
-    df['volume_in_usd'] = pd.to_numeric(df['volume_in_usd'])
+    BitQuery groups trades by interval but may return several rows per interval, which are
+    merged by the resampler.
 
-    aggregated = df.groupby('time').agg({
-        'open': 'first',   
-        'high': 'max',     
-        'low': 'min',     
-        'close': 'last', 
-        'volume': 'sum',
-        'volume_in_usd': 'sum'
-    })
+    :param token_mint_address: The token's mint address.
+    :param since: Start timestamp of the history.
+    :param interval_in: Interval unit ("minute", "hour", "day" or "week").
+    :param interval_count: Number of interval units per candle.
+    :param fill_gaps: Return flat, zero volume candles for intervals without trades.
+    :return: Candles, oldest first.
+    """
+    bucket_seconds = TIMEFRAME_SECONDS[interval_in] * interval_count
+    variables = {
+        "token": token_mint_address,
+        "since": since.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "interval_in": f"{interval_in}s",
+        "interval_count": interval_count,
+    }
+    data = await fetch_bitquery_data(HISTORICAL_PRICE_AND_VOLUME_QUERY, variables)
+    if not data:
+        return {"error": "Failed to fetch historical price and volume"}
+
+    rows = HISTORICAL_PRICE_AND_VOLUME_PROJECTION.columns(data)
+    columns = resample(
+        timestamps=rows["time"],
+        open=rows["open"],
+        high=rows["high"],
+        low=rows["low"],
+        close=rows["close"],
+        sums={
+            "volume": rows["volume"],
+            "volume_in_usd": rows["volume_in_usd"],
+        },
+        bucket_seconds=bucket_seconds,
+        fill_gaps=fill_gaps,
+    )
+    names = ("open", "high", "low", "close", "volume", "volume_in_usd")
 
     return {
         "metadata": {
@@ -327,7 +419,13 @@ async def get_historical_price_and_volume(token_mint_address: str, since: dateti
             "interval_in": interval_in,
             "interval_count": interval_count
         },
-        "data": aggregated.to_dict(orient='records')
+        "data": [
+            {
+                "time": datetime.fromtimestamp(row[0], tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                **dict(zip(names, row[1:]))
+            }
+            for row in to_rows(columns, names)
+        ]
     }
     
 async def get_token_creation_info(token_mint_address: str) -> Dict[str, str]:
@@ -354,4 +452,5 @@ async def get_token_creation_info(token_mint_address: str) -> Dict[str, str]:
         "creator": creator_address,
         "creation_time": block_time
     }
-# ===================== NOT USED =====================
\ No newline at end of file
+# ===================== NOT USED =====================
+
@@ -0,0 +1,234 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constant.pumpfun import GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, PUMPFUN_TOKEN_TRADES_SINCE_QUERY
+from app.database.database import session_manager
+from app.database.model import Trade, TradeSync
+from app.service.search.pumpfun import fetch_bitquery_data
+from app.service.single_flight import SingleFlight
+
+LATEST_TRADES = "latest_trades"
+FIRST_BUYERS = "first_buyers"
+
+# since value of the first sync of a token, before any trade
+EPOCH = datetime(1970, 1, 1)
+
+# dialects with INSERT ... ON CONFLICT, the others skip the stored trades with a SELECT first
+ON_CONFLICT_DIALECTS = ("postgresql", "sqlite")
+
+# concurrent requests for the same token and limit share one sync
+trade_history_flight = SingleFlight("trade_history")
+
+
+def parse_block_time(value: str) -> datetime:
+    """Parse a BitQuery time, e.g. 2024-05-01T12:00:00Z, to a naive UTC datetime."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def format_block_time(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def trade_rows(kind: str, mint: str, nodes: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn BitQuery trade nodes into `trades` rows, skipping nodes without a signature or time."""
+    rows = []
+    for node in nodes:
+        signature = (node.get("Transaction") or {}).get("Signature")
+        block = node.get("Block") or {}
+        block_time = block.get("Time") or block.get("allTime")
+        if not signature or not block_time:
+            continue
+        rows.append({
+            "kind": kind,
+            "mint": mint,
+            "signature": signature,
+            "block_time": parse_block_time(block_time),
+            "payload": node,
+        })
+    return rows
+
+
+def insert_statement(dialect: str, table: Any, rows: Any):
+    """INSERT statement supporting ON CONFLICT, which PostgreSQL and SQLite spell the same way."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table).values(rows)
+
+
+class TradeHistory:
+    """Pump Fun trades persisted in the database and fetched from BitQuery incrementally.
+
+    Every request only fetches the trades newer than the last one stored,
+    inserts them, ignoring the signatures already stored, and serves the
+    trades from the database.
+
+    Latest trades are fetched newest first. A page cut by the limit may leave
+    trades missing below it, so `trade_sync` records how many of the newest
+    trades are stored without gaps, and a full page is fetched again when
+    that is fewer than requested. First buyers are fetched oldest first, so
+    every page extends the stored history without gaps and the first buyers
+    never change once stored.
+    """
+
+    def __init__(self, manager=session_manager, fetch=fetch_bitquery_data):
+        """Initialize the history.
+
+        Args:
+            manager: DatabaseSessionManager of the database the trades are stored in
+            fetch: Coroutine function sending a query and its variables to BitQuery
+        """
+        self.manager = manager
+        self.fetch = fetch
+        self.upstream_trades = 0
+        self.inserted_trades = 0
+
+    async def _fetch(self, query: str, path: Tuple[str, ...], mint: str, limit: int, since: datetime) -> Optional[List[Dict[str, Any]]]:
+        data = await self.fetch(query, {"token": mint, "limit": limit, "since": format_block_time(since)})
+        if not data or not isinstance(data.get("data"), dict):
+            return None
+        nodes = data["data"]
+        for key in path:
+            nodes = (nodes or {}).get(key)
+        nodes = nodes or []
+        self.upstream_trades += len(nodes)
+        return nodes
+
+    async def _insert(self, session: AsyncSession, kind: str, mint: str, nodes: Sequence[Dict[str, Any]]) -> int:
+        rows = trade_rows(kind, mint, nodes)
+        if not rows:
+            return 0
+        if self.manager.dialect in ON_CONFLICT_DIALECTS:
+            statement = insert_statement(self.manager.dialect, Trade, rows).on_conflict_do_nothing(index_elements=["kind", "mint", "signature"])
+            result = await session.execute(statement)
+            inserted = max(result.rowcount, 0)
+        else:
+            inserted = await self._insert_new(session, kind, mint, rows)
+        self.inserted_trades += inserted
+        return inserted
+
+    async def _insert_new(self, session: AsyncSession, kind: str, mint: str, rows: List[Dict[str, Any]]) -> int:
+        """Insert the rows whose signature is not stored yet, for databases without ON CONFLICT."""
+        stored = set(await session.scalars(
+            select(Trade.signature).where(
+                Trade.kind == kind,
+                Trade.mint == mint,
+                Trade.signature.in_([row["signature"] for row in rows]),
+            )
+        ))
+        # a page may repeat a signature, e.g. at the since boundary
+        new_rows = list({row["signature"]: row for row in rows if row["signature"] not in stored}.values())
+        if new_rows:
+            await session.execute(insert(Trade), new_rows)
+        return len(new_rows)
+
+    async def _watermark(self, session: AsyncSession, kind: str, mint: str) -> Optional[datetime]:
+        return await session.scalar(
+            select(func.max(Trade.block_time)).where(Trade.kind == kind, Trade.mint == mint)
+        )
+
+    async def _stored(self, session: AsyncSession, kind: str, mint: str, limit: int, descending: bool) -> List[Dict[str, Any]]:
+        order = (Trade.block_time.desc(), Trade.id.desc()) if descending else (Trade.block_time.asc(), Trade.id.asc())
+        result = await session.scalars(
+            select(Trade.payload).where(Trade.kind == kind, Trade.mint == mint).order_by(*order).limit(limit)
+        )
+        return list(result)
+
+    async def _sync_latest_trades(self, mint: str, limit: int) -> List[Dict[str, Any]]:
+        async with self.manager.session() as session:
+            state = await session.get(TradeSync, (LATEST_TRADES, mint))
+            watermark = await self._watermark(session, LATEST_TRADES, mint)
+            depth = state.depth if state else 0
+            complete = state.complete if state else False
+
+            path = ("Solana", "DEXTradeByTokens")
+            nodes = await self._fetch(PUMPFUN_TOKEN_TRADES_SINCE_QUERY, path, mint, limit, watermark or EPOCH)
+            if nodes is not None:
+                inserted = await self._insert(session, LATEST_TRADES, mint, nodes)
+                if watermark is None or len(nodes) >= limit:
+                    # only the page itself is known to be contiguous
+                    depth, complete = len(nodes), len(nodes) < limit
+                else:
+                    depth += inserted
+
+                if depth < limit and not complete:
+                    # the stored history is too shallow for this limit, fetch the newest page in full
+                    nodes = await self._fetch(PUMPFUN_TOKEN_TRADES_SINCE_QUERY, path, mint, limit, EPOCH)
+                    if nodes is not None:
+                        await self._insert(session, LATEST_TRADES, mint, nodes)
+                        depth, complete = len(nodes), len(nodes) < limit
+
+                values = {"kind": LATEST_TRADES, "mint": mint, "depth": depth, "complete": complete, "synced_at": datetime.utcnow()}
+                if self.manager.dialect in ON_CONFLICT_DIALECTS:
+                    statement = insert_statement(self.manager.dialect, TradeSync, values)
+                    await session.execute(statement.on_conflict_do_update(
+                        index_elements=["kind", "mint"],
+                        set_={"depth": depth, "complete": complete, "synced_at": values["synced_at"]},
+                    ))
+                elif state is None:
+                    session.add(TradeSync(**values))
+                else:
+                    state.depth, state.complete, state.synced_at = depth, complete, values["synced_at"]
+                await session.commit()
+
+            # when BitQuery fails, the trades stored so far are served
+            return await self._stored(session, LATEST_TRADES, mint, limit, descending=True)
+
+    async def _sync_first_buyers(self, mint: str, limit: int) -> List[Dict[str, Any]]:
+        async with self.manager.session() as session:
+            stored = await session.scalar(
+                select(func.count()).select_from(Trade).where(Trade.kind == FIRST_BUYERS, Trade.mint == mint)
+            )
+            if stored < limit:
+                # the buys at the watermark time are fetched again, the signature dedupes them
+                watermark = await self._watermark(session, FIRST_BUYERS, mint)
+                nodes = await self._fetch(GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, ("Solana", "DEXTrades"), mint, limit, watermark or EPOCH)
+                if nodes:
+                    await self._insert(session, FIRST_BUYERS, mint, nodes)
+                    await session.commit()
+
+            return await self._stored(session, FIRST_BUYERS, mint, limit, descending=False)
+
+    async def latest_trades(self, mint: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get the latest trades of a token, newest first.
+
+        Args:
+            mint: Token mint address
+            limit: Number of trades to return
+
+        Returns:
+            DEXTradeByTokens nodes of PUMPFUN_TOKEN_LATEST_TRADES_QUERY
+        """
+        return await trade_history_flight.do((LATEST_TRADES, mint, limit), lambda: self._sync_latest_trades(mint, limit))
+
+    async def first_buyers(self, mint: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get the first buys of a token, oldest first.
+
+        Args:
+            mint: Token mint address
+            limit: Number of buys to return
+
+        Returns:
+            DEXTrades nodes of GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY
+        """
+        return await trade_history_flight.do((FIRST_BUYERS, mint, limit), lambda: self._sync_first_buyers(mint, limit))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the counters of trades fetched from BitQuery and actually inserted."""
+        return {
+            "database": self.manager.dialect,
+            "upstream_trades": self.upstream_trades,
+            "inserted_trades": self.inserted_trades,
+        }
+
+
+trade_history = TradeHistory()
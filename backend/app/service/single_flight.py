@@ -0,0 +1,75 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.utils.tracing import span
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers asking for the same key.
+
+    The call runs in its own task and callers await it through
+    `asyncio.shield`, so a caller that is cancelled, e.g. because its client
+    disconnected, does not cancel the call for the others.
+    """
+
+    def __init__(self, name: str):
+        """Initialize the group.
+
+        Args:
+            name: Name reported in the stats
+        """
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the loader, or join the call already running for the key.
+
+        Args:
+            key: Identifies identical calls
+            loader: Coroutine function performing the call
+
+        Returns:
+            The value returned by the loader
+        """
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # the call's own spans are in the trace of the request that started it
+            with span(f"{self.name}-coalesced"):
+                return await asyncio.shield(future)
+        future = asyncio.ensure_future(loader())
+        self._inflight[key] = future
+        future.add_done_callback(functools.partial(self._on_done, key))
+        return await asyncio.shield(future)
+
+    def _on_done(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # retrieving the exception keeps asyncio from logging it when every caller was cancelled
+        if not future.cancelled() and future.exception() is not None:
+            self.errors += 1
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the coalescing counters.
+
+        Returns:
+            Calls, calls that joined one in flight and their ratio, failed and running calls
+        """
+        return {
+            "name": self.name,
+            "inflight": self.inflight,
+            "calls": self.calls,
+            "upstream_calls": self.calls - self.coalesced,
+            "coalesced": self.coalesced,
+            "coalescing_ratio": round(self.coalesced / self.calls, 4) if self.calls else None,
+            "errors": self.errors,
+        }
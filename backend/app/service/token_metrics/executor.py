@@ -0,0 +1,128 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class MethodStats:
+    """Counters for the calls of a single service method."""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = self.completed + self.failed
+        return {
+            "concurrency": self.concurrency,
+            "waiting": self.waiting,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_time": round(self.total_time / calls, 4) if calls else 0.0,
+            "max_time": round(self.max_time, 4),
+        }
+
+
+class BoundedExecutor:
+    """Thread pool for blocking client calls with a concurrency cap per method."""
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        default_concurrency: int,
+        method_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        """Initialize the executor.
+
+        Args:
+            name: Prefix of the worker thread names
+            max_workers: Maximum number of threads in the pool
+            default_concurrency: Maximum concurrent calls of a method without its own cap
+            method_concurrency: Maximum concurrent calls for specific methods
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.default_concurrency = default_concurrency
+        self.method_concurrency = method_concurrency or {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._methods: Dict[str, MethodStats] = {}
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._pool
+
+    def _get_method(self, method: str) -> MethodStats:
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = MethodStats(self.method_concurrency.get(method, self.default_concurrency))
+            self._methods[method] = stats
+        return stats
+
+    async def run(self, method: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking call in the pool without blocking the event loop.
+
+        Args:
+            method: Name of the service method, used for its concurrency cap and stats
+            fn: Blocking callable to run
+            args: Positional arguments for the callable
+            kwargs: Keyword arguments for the callable
+
+        Returns:
+            The value returned by the callable
+        """
+        stats = self._get_method(method)
+        stats.waiting += 1
+        try:
+            await stats.semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+
+        stats.active += 1
+        start_time = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            # the call sees the caller's context variables, e.g. the trace of the request
+            context = contextvars.copy_context()
+            result = await loop.run_in_executor(self._get_pool(), functools.partial(context.run, fn, *args, **kwargs))
+            stats.completed += 1
+            return result
+        except BaseException:
+            stats.failed += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start_time
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.active -= 1
+            stats.semaphore.release()
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, cancelling the queued calls and waiting for the running ones. Blocking."""
+        if self._pool is None:
+            return
+
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get a snapshot of the executor usage.
+
+        Returns:
+            Pool size and the counters of every method called so far
+        """
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "methods": {method: stats.to_dict() for method, stats in self._methods.items()},
+        }
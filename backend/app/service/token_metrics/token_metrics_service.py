@@ -1,17 +1,51 @@
-from tmai_api import TokenMetricsClient
-import os
-from dotenv import load_dotenv
 from fastapi import HTTPException
-from typing import Dict, List, Any, Optional
-import pandas as pd
+from typing import TYPE_CHECKING, Callable, Dict, List, Any, Optional
 from datetime import datetime, timedelta
-import requests
 
-# Load environment variables
-load_dotenv()
+from app.constant.config import (
+    TOKEN_METRICS_AI_AGENT_CONCURRENCY,
+    TOKEN_METRICS_API_KEY,
+    TOKEN_METRICS_BASE_URL,
+    TOKEN_METRICS_MAX_WORKERS,
+    TOKEN_METRICS_METHOD_CONCURRENCY,
+)
+from app.service.http_client import get_tokenmetrics_client
+from app.service.scheduler import (
+    RETRY_STATUSES,
+    RetryableUpstreamError,
+    UpstreamOverloadedError,
+    parse_retry_after,
+    tokenmetrics_scheduler,
+)
+from app.service.token_metrics.executor import BoundedExecutor
+from app.utils.tracing import traced
 
-# Get Token Metrics API key from environment
-TOKEN_METRICS_API_KEY = os.getenv("TOKEN_METRICS_API_KEY")
+# tmai_api pulls in pandas and requests, it is imported when the service is first used
+if TYPE_CHECKING:
+    import pandas as pd
+
+# TokenMetricsClient is blocking, its calls run in this pool so they never stall the event loop
+token_metrics_executor = BoundedExecutor(
+    name="token-metrics",
+    max_workers=TOKEN_METRICS_MAX_WORKERS,
+    default_concurrency=TOKEN_METRICS_METHOD_CONCURRENCY,
+    method_concurrency={"ask_ai_agent": TOKEN_METRICS_AI_AGENT_CONCURRENCY},
+)
+
+# the client uses requests, which has no per-phase hooks, so the request, its
+# decode and any DataFrame conversion are timed as a whole
+@traced("tokenmetrics-request")
+def _call_client(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call a TokenMetricsClient method, raising RetryableUpstreamError when it is throttled."""
+    import requests
+
+    try:
+        return fn(*args, **kwargs)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code not in RETRY_STATUSES:
+            raise
+        retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+        raise RetryableUpstreamError(tokenmetrics_scheduler.name, e.response.status_code, retry_after) from e
 
 class TokenMetricsService:
     """Service for interacting with the Token Metrics AI API."""
@@ -29,9 +63,20 @@ class TokenMetricsService:
             raise ValueError("Token Metrics API key not found. Please set TOKEN_METRICS_API_KEY in .env file.")
         
         # Initialize the Token Metrics client
+        from tmai_api import TokenMetricsClient
+
         self.client = TokenMetricsClient(api_key=self.api_key)
+        for endpoint in vars(self.client).values():
+            if hasattr(endpoint, "base_url"):
+                endpoint.base_url = TOKEN_METRICS_BASE_URL
+
+    async def _run(self, method: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking client call in the executor once the Token Metrics scheduler allows it."""
+        return await tokenmetrics_scheduler.call(
+            lambda: token_metrics_executor.run(method, _call_client, fn, *args, **kwargs)
+        )
     
-    def get_tokens(self, symbols: str) -> Dict[str, Any]:
+    async def get_tokens(self, symbols: str) -> Dict[str, Any]:
         """Get information for specified cryptocurrencies.
         
         Args:
@@ -41,11 +86,13 @@ class TokenMetricsService:
             Token information for the specified symbols
         """
         try:
-            return self.client.tokens.get(symbol=symbols)
+            return await self._run("get_tokens", self.client.tokens.get, symbol=symbols)
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching token data: {str(e)}")
     
-    def get_tokens_dataframe(self, symbols: str) -> pd.DataFrame:
+    async def get_tokens_dataframe(self, symbols: str) -> "pd.DataFrame":
         """Get token information as a DataFrame.
         
         Args:
@@ -55,11 +102,13 @@ class TokenMetricsService:
             DataFrame with token information
         """
         try:
-            return self.client.tokens.get_dataframe(symbol=symbols)
+            return await self._run("get_tokens_dataframe", self.client.tokens.get_dataframe, symbol=symbols)
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching token data: {str(e)}")
     
-    def get_trader_grades(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_trader_grades(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get short-term trading grades for specified tokens.
         
         Args:
@@ -71,15 +120,19 @@ class TokenMetricsService:
             Trader grades for the specified symbols and date range
         """
         try:
-            return self.client.trader_grades.get(
+            return await self._run(
+                "get_trader_grades",
+                self.client.trader_grades.get,
                 symbol=symbols,
                 startDate=start_date,
                 endDate=end_date
             )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching trader grades: {str(e)}")
     
-    def get_investor_grades(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_investor_grades(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get long-term investment grades for specified tokens.
         
         Args:
@@ -91,15 +144,19 @@ class TokenMetricsService:
             Investor grades for the specified symbols and date range
         """
         try:
-            return self.client.investor_grades.get(
+            return await self._run(
+                "get_investor_grades",
+                self.client.investor_grades.get,
                 symbol=symbols,
                 startDate=start_date,
                 endDate=end_date
             )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching investor grades: {str(e)}")
     
-    def get_daily_ohlcv(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_daily_ohlcv(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get daily price data for specified tokens.
         
         Args:
@@ -111,15 +168,19 @@ class TokenMetricsService:
             Daily OHLCV data for the specified symbols and date range
         """
         try:
-            return self.client.daily_ohlcv.get(
+            return await self._run(
+                "get_daily_ohlcv",
+                self.client.daily_ohlcv.get,
                 symbol=symbols,
                 startDate=start_date,
                 endDate=end_date
             )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching daily OHLCV data: {str(e)}")
     
-    def get_hourly_ohlcv(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_hourly_ohlcv(self, symbols: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get hourly price data for specified tokens.
         
         Args:
@@ -131,15 +192,19 @@ class TokenMetricsService:
             Hourly OHLCV data for the specified symbols and date range
         """
         try:
-            return self.client.hourly_ohlcv.get(
+            return await self._run(
+                "get_hourly_ohlcv",
+                self.client.hourly_ohlcv.get,
                 symbol=symbols,
                 startDate=start_date,
                 endDate=end_date
             )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching hourly OHLCV data: {str(e)}")
     
-    def get_market_metrics(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_market_metrics(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get market metrics data.
         
         Args:
@@ -150,14 +215,18 @@ class TokenMetricsService:
             Market metrics data for the specified date range
         """
         try:
-            return self.client.market_metrics.get(
+            return await self._run(
+                "get_market_metrics",
+                self.client.market_metrics.get,
                 startDate=start_date,
                 endDate=end_date
             )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching market metrics: {str(e)}")
     
-    def get_ai_report(self, symbols: str) -> Dict[str, Any]:
+    async def get_ai_report(self, symbols: str) -> Dict[str, Any]:
         """Get AI-generated reports for specified tokens.
         
         Args:
@@ -167,11 +236,13 @@ class TokenMetricsService:
             AI reports for the specified symbols
         """
         try:
-            return self.client.ai_reports.get(symbol=symbols)
+            return await self._run("get_ai_report", self.client.ai_reports.get, symbol=symbols)
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching AI reports: {str(e)}")
     
-    def get_trading_signals(self, symbols: str, start_date: str, end_date: str, signal: str = None) -> Dict[str, Any]:
+    async def get_trading_signals(self, symbols: str, start_date: str, end_date: str, signal: str = None) -> Dict[str, Any]:
         """Get trading signals for specified tokens.
         
         Args:
@@ -185,22 +256,28 @@ class TokenMetricsService:
         """
         try:
             if signal:
-                return self.client.trading_signals.get(
+                return await self._run(
+                    "get_trading_signals",
+                    self.client.trading_signals.get,
                     symbol=symbols,
                     startDate=start_date,
                     endDate=end_date,
                     signal=signal
                 )
             else:
-                return self.client.trading_signals.get(
+                return await self._run(
+                    "get_trading_signals",
+                    self.client.trading_signals.get,
                     symbol=symbols,
                     startDate=start_date,
                     endDate=end_date
                 )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching trading signals: {str(e)}")
     
-    def ask_ai_agent(self, question: str) -> str:
+    async def ask_ai_agent(self, question: str) -> str:
         """Ask the AI agent a question.
         
         Args:
@@ -210,11 +287,13 @@ class TokenMetricsService:
             The AI agent's answer
         """
         try:
-            return self.client.ai_agent.get_answer_text(question)
+            return await self._run("ask_ai_agent", self.client.ai_agent.get_answer_text, question)
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error asking AI agent: {str(e)}")
     
-    def get_trader_indices(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    async def get_trader_indices(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get trader indices data.
         
         Args:
@@ -225,14 +304,18 @@ class TokenMetricsService:
             Trader indices data for the specified date range
         """
         try:
-            return self.client.trader_indices.get(
+            return await self._run(
+                "get_trader_indices",
+                self.client.trader_indices.get,
                 startDate=start_date,
                 endDate=end_date
             )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching trader indices: {str(e)}")
     
-    def get_sentiment(self, symbols: Optional[str] = None, limit: int = 1000, page: int = 0) -> Dict[str, Any]:
+    async def get_sentiment(self, symbols: Optional[str] = None, limit: int = 1000, page: int = 0) -> Dict[str, Any]:
         """Get sentiment data for tokens.
         
         Args:
@@ -244,7 +327,7 @@ class TokenMetricsService:
             Sentiment data for the specified symbols
         """
         try:
-            url = f"https://api.tokenmetrics.com/v2/sentiments"
+            url = f"{TOKEN_METRICS_BASE_URL}/sentiments"
             params = {"limit": limit, "page": page}
             
             if symbols:
@@ -255,7 +338,8 @@ class TokenMetricsService:
                 "api_key": self.api_key
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            client = get_tokenmetrics_client()
+            response = await tokenmetrics_scheduler.call(lambda: client.get(url, headers=headers, params=params))
             
             if response.status_code != 200:
                 raise HTTPException(status_code=response.status_code, 
@@ -264,6 +348,8 @@ class TokenMetricsService:
             data = response.json()
             return {"success": True, "data": data}
             
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching sentiment data: {str(e)}")
 
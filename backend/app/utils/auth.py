@@ -0,0 +1,28 @@
+import secrets
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.constant.config import X_BEARER_TOKEN
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def verify_bearer_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> None:
+    """
+    Allow the request only with an `Authorization: Bearer <X_BEARER_TOKEN>` header.
+
+    Raises:
+        HTTPException: 401 when the token is missing or wrong, or when X_BEARER_TOKEN is not set
+    """
+    if (
+        not X_BEARER_TOKEN
+        or credentials is None
+        or not secrets.compare_digest(credentials.credentials.encode(), X_BEARER_TOKEN.encode())
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing bearer token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,94 @@
+import math
+from typing import Dict, List, Optional, Sequence
+
+# values up to this are counted as zero, e.g. durations rounded down to 0 ms
+MIN_VALUE = 1e-9
+
+
+class DDSketch:
+    """Mergeable quantile sketch with relative accuracy (DDSketch, Masson et al., VLDB 2019).
+
+    Values are counted in logarithmic bins, bin k holding (gamma^(k-1), gamma^k]
+    with gamma = (1 + a) / (1 - a), so every quantile is returned within a
+    relative error a of the exact one. Latencies from 1 ms to 1 hour take at
+    most ~750 bins at a = 1%, whatever the number of values. Sketches with the
+    same accuracy merge exactly by adding their bin counts.
+    """
+
+    __slots__ = ("relative_accuracy", "gamma", "_log_gamma", "bins", "zeros", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """Initialize an empty sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of the quantiles, between 0 and 1
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Count a non-negative value."""
+        if value <= MIN_VALUE:
+            self.zeros += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "DDSketch") -> None:
+        """Add the values counted by another sketch of the same accuracy."""
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """Estimate several quantiles with a single pass over the bins.
+
+        Args:
+            qs: Quantiles between 0 and 1, e.g. (0.5, 0.95, 0.99)
+
+        Returns:
+            The estimates in the order of `qs`, None for an empty sketch
+        """
+        if self.count == 0:
+            return [None] * len(qs)
+        results: List[Optional[float]] = [None] * len(qs)
+        pending = sorted(range(len(qs)), key=lambda i: qs[i])
+        seen = self.zeros
+        position = 0
+        while position < len(pending) and qs[pending[position]] * (self.count - 1) < seen:
+            results[pending[position]] = 0.0
+            position += 1
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            while position < len(pending) and qs[pending[position]] * (self.count - 1) < seen:
+                # the middle of the bin, within the relative accuracy of every value in it
+                estimate = 2 * self.gamma ** key / (self.gamma + 1)
+                results[pending[position]] = min(max(estimate, self.min), self.max)
+                position += 1
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles((q,))[0]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
@@ -0,0 +1,89 @@
+import re
+from typing import Any, Dict, Optional, Tuple
+
+_VARIABLE = re.compile(r"\$(\w+)")
+_ROOT_FIELD = re.compile(r"^\s*(\w+)")
+
+
+def _split_query(query: str) -> Tuple[str, str]:
+    """Split a single-operation query into its variable definitions and selection set."""
+    query = query.strip()
+    if not query.startswith("query"):
+        raise ValueError("Only named or anonymous `query` operations can be merged")
+
+    selection_start = query.index("{")
+    header = query[:selection_start]
+    definitions = ""
+    if "(" in header:
+        definitions = header[header.index("(") + 1:header.rindex(")")].strip()
+
+    selection_end = query.rindex("}")
+    return definitions, query[selection_start + 1:selection_end]
+
+
+def merge_queries(name: str, sections: Dict[str, str]) -> str:
+    """Merge several GraphQL queries into one document using field aliases.
+
+    Each query must select a single root field. That field is aliased with the
+    section name and every variable is prefixed with `<section>_`, so sections
+    sharing a variable name do not collide.
+
+    Args:
+        name: Name of the merged operation
+        sections: Mapping of section name to query
+
+    Returns:
+        The merged GraphQL document
+    """
+    definitions = []
+    selections = []
+    for section, query in sections.items():
+        section_definitions, selection = _split_query(query)
+        prefix = f"${section}_"
+        if section_definitions:
+            definitions.append(_VARIABLE.sub(lambda match: prefix + match.group(1), section_definitions))
+        selection = _VARIABLE.sub(lambda match: prefix + match.group(1), selection)
+        selection = _ROOT_FIELD.sub(lambda match: f"\n  {section}: {match.group(1)}", selection, count=1)
+        selections.append(selection.rstrip())
+
+    variables = f"({', '.join(definitions)})" if definitions else ""
+    return f"query {name}{variables} {{{''.join(selections)}\n}}\n"
+
+
+def merge_variables(sections: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Prefix the variables of each section like `merge_queries` does.
+
+    Args:
+        sections: Mapping of section name to its variables
+
+    Returns:
+        The variables of the merged document
+    """
+    return {
+        f"{section}_{name}": value
+        for section, variables in sections.items()
+        for name, value in (variables or {}).items()
+    }
+
+
+def split_result(result: Optional[Dict[str, Any]], sections: Dict[str, str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Split the result of a merged document back into one result per section.
+
+    Each section result has the shape its original query would return, e.g.
+    `{"data": {"Solana": {...}}}`.
+
+    Args:
+        result: Response of the merged document, None when the request failed
+        sections: The mapping passed to `merge_queries`
+
+    Returns:
+        Mapping of section name to its result, None for failed sections
+    """
+    data = (result or {}).get("data") or {}
+    split = {}
+    for section, query in sections.items():
+        _, selection = _split_query(query)
+        root_field = _ROOT_FIELD.match(selection).group(1)
+        section_data = data.get(section)
+        split[section] = None if section_data is None else {"data": {root_field: section_data}}
+    return split
@@ -0,0 +1,370 @@
+import abc
+import math
+from collections import deque
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.ohlcv import CLOSE, HIGH, LOW, TIMESTAMP, VOLUME
+
+# largest exponent used when scaling an EMA chunk, e**300 is far from float overflow
+_MAX_EXPONENT = 300.0
+
+MAX_PERIOD = 500
+
+
+def ewm(values: np.ndarray, alpha: float, previous: float) -> np.ndarray:
+    """Vectorized recursive smoothing `out[i] = out[i - 1] + alpha * (values[i] - out[i - 1])`.
+
+    The recursion is unrolled to `decay**(i + 1) * previous + alpha * sum(decay**(i - k) * values[k])`
+    and evaluated with a cumulative sum. The series is split into chunks short
+    enough for `decay**-k` to stay finite.
+
+    Args:
+        values: Input series
+        alpha: Smoothing factor in (0, 1]
+        previous: Smoothed value before the first input
+
+    Returns:
+        The smoothed series
+    """
+    values = np.asarray(values, dtype=np.float64)
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.copy()
+
+    chunk = max(1, int(_MAX_EXPONENT / -math.log(decay)))
+    out = np.empty_like(values)
+    for start in range(0, values.size, chunk):
+        part = values[start:start + chunk]
+        powers = decay ** np.arange(part.size)
+        scaled = np.cumsum(part / powers) * powers
+        out[start:start + part.size] = decay * powers * previous + alpha * scaled
+        previous = out[start + part.size - 1]
+    return out
+
+
+def columns_of(rows: Sequence[Sequence[float]]) -> Dict[str, np.ndarray]:
+    """Split candles, oldest first, into NumPy columns."""
+    array = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+    return {
+        "timestamp": array[:, TIMESTAMP].astype(np.int64),
+        "high": array[:, HIGH],
+        "low": array[:, LOW],
+        "close": array[:, CLOSE],
+        "volume": array[:, VOLUME],
+    }
+
+
+class Indicator(abc.ABC):
+    """A technical indicator computed over a whole series, then updated one candle at a time.
+
+    `compute` evaluates the closed candles with NumPy and keeps the state
+    needed to continue. `push` appends a closed candle in O(1). `peek` gives
+    the value for the still open newest candle without changing the state.
+    """
+
+    outputs: Tuple[str, ...] = ()
+    # candles needed before the values are meaningful
+    warmup = 0
+
+    @abc.abstractmethod
+    def compute(self, rows: Sequence[Sequence[float]]) -> Dict[str, np.ndarray]:
+        """Evaluate closed candles, sorted oldest first, and keep the state to continue from the last one."""
+
+    @abc.abstractmethod
+    def push(self, row: Sequence[float]) -> Tuple[float, ...]:
+        """Append a closed candle and get its values."""
+
+    @abc.abstractmethod
+    def peek(self, row: Sequence[float]) -> Tuple[float, ...]:
+        """Get the values of the open candle without changing the state."""
+
+
+class SMA(Indicator):
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.outputs = (f"sma_{period}",)
+        self.warmup = period
+        self.window: deque = deque(maxlen=period)
+        self.total = 0.0
+
+    def compute(self, rows):
+        close = columns_of(rows)["close"]
+        out = np.full(close.size, np.nan)
+        if close.size >= self.period:
+            sums = np.cumsum(np.r_[0.0, close])
+            out[self.period - 1:] = (sums[self.period:] - sums[:-self.period]) / self.period
+        self.window = deque(close[-self.period:].tolist(), maxlen=self.period)
+        self.total = float(sum(self.window))
+        return {self.outputs[0]: out}
+
+    def _next(self, close: float) -> Tuple[float, int]:
+        if len(self.window) == self.period:
+            return self.total - self.window[0] + close, self.period
+        return self.total + close, len(self.window) + 1
+
+    def push(self, row):
+        close = row[CLOSE]
+        self.total, count = self._next(close)
+        self.window.append(close)
+        return (self.total / self.period if count == self.period else math.nan,)
+
+    def peek(self, row):
+        total, count = self._next(row[CLOSE])
+        return (total / self.period if count == self.period else math.nan,)
+
+
+class EMA(Indicator):
+    """Exponential moving average seeded with the SMA of the first `period` closes."""
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.outputs = (f"ema_{period}",)
+        self.warmup = 3 * period
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = math.nan
+
+    def compute(self, rows):
+        close = columns_of(rows)["close"]
+        out = np.full(close.size, np.nan)
+        self.count = close.size
+        if close.size < self.period:
+            self.seed_total = float(close.sum())
+            self.value = math.nan
+            return {self.outputs[0]: out}
+
+        seed = float(close[:self.period].mean())
+        out[self.period - 1] = seed
+        out[self.period:] = ewm(close[self.period:], self.alpha, seed)
+        self.value = float(out[-1])
+        return {self.outputs[0]: out}
+
+    def _next(self, close: float) -> Tuple[float, float]:
+        count = self.count + 1
+        if count < self.period:
+            return math.nan, self.seed_total + close
+        if count == self.period:
+            return (self.seed_total + close) / self.period, self.seed_total + close
+        return self.value + self.alpha * (close - self.value), self.seed_total
+
+    def push(self, row):
+        self.value, self.seed_total = self._next(row[CLOSE])
+        self.count += 1
+        return (self.value,)
+
+    def peek(self, row):
+        return (self._next(row[CLOSE])[0],)
+
+
+def _rsi(average_gain, average_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+    # no losses: 100, no movement at all: 50
+    rsi = np.where(average_loss == 0, np.where(average_gain == 0, 50.0, 100.0), rsi)
+    return rsi
+
+
+class RSI(Indicator):
+    """Relative strength index with Wilder smoothing of gains and losses."""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.outputs = (f"rsi_{period}",)
+        self.warmup = 3 * period + 1
+        self.previous_close = math.nan
+        self.count = 0
+        self.gain_total = 0.0
+        self.loss_total = 0.0
+        self.average_gain = math.nan
+        self.average_loss = math.nan
+
+    def compute(self, rows):
+        close = columns_of(rows)["close"]
+        out = np.full(close.size, np.nan)
+        change = np.diff(close)
+        gain, loss = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+        self.previous_close = float(close[-1]) if close.size else math.nan
+        self.count = change.size
+        if change.size < self.period:
+            self.gain_total, self.loss_total = float(gain.sum()), float(loss.sum())
+            return {self.outputs[0]: out}
+
+        alpha = 1.0 / self.period
+        seed_gain, seed_loss = float(gain[:self.period].mean()), float(loss[:self.period].mean())
+        average_gain = np.r_[seed_gain, ewm(gain[self.period:], alpha, seed_gain)]
+        average_loss = np.r_[seed_loss, ewm(loss[self.period:], alpha, seed_loss)]
+        out[self.period:] = _rsi(average_gain, average_loss)
+        self.average_gain, self.average_loss = float(average_gain[-1]), float(average_loss[-1])
+        return {self.outputs[0]: out}
+
+    def _next(self, close: float):
+        if math.isnan(self.previous_close):
+            return math.nan, (0, 0.0, 0.0, math.nan, math.nan)
+
+        change = close - self.previous_close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        count = self.count + 1
+        gain_total, loss_total = self.gain_total + gain, self.loss_total + loss
+        if count < self.period:
+            return math.nan, (count, gain_total, loss_total, math.nan, math.nan)
+        if count == self.period:
+            average_gain, average_loss = gain_total / self.period, loss_total / self.period
+        else:
+            average_gain = self.average_gain + (gain - self.average_gain) / self.period
+            average_loss = self.average_loss + (loss - self.average_loss) / self.period
+        value = float(_rsi(np.float64(average_gain), np.float64(average_loss)))
+        return value, (count, gain_total, loss_total, average_gain, average_loss)
+
+    def push(self, row):
+        value, state = self._next(row[CLOSE])
+        self.count, self.gain_total, self.loss_total, self.average_gain, self.average_loss = state
+        self.previous_close = row[CLOSE]
+        return (value,)
+
+    def peek(self, row):
+        return (self._next(row[CLOSE])[0],)
+
+
+class VWAP(Indicator):
+    """Volume weighted average of the typical price, reset at the start of every UTC day."""
+
+    outputs = ("vwap",)
+    session_seconds = 86400
+
+    def __init__(self):
+        self.session = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    def compute(self, rows):
+        columns = columns_of(rows)
+        typical = (columns["high"] + columns["low"] + columns["close"]) / 3.0
+        sessions = columns["timestamp"] // self.session_seconds
+        price_volume = np.cumsum(typical * columns["volume"])
+        volume = np.cumsum(columns["volume"])
+        if sessions.size:
+            # subtract the running totals reached before each session started
+            starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+            offsets = np.repeat(starts, np.diff(np.r_[starts, sessions.size]))
+            price_volume = price_volume - np.r_[0.0, price_volume][offsets]
+            volume = volume - np.r_[0.0, volume][offsets]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.where(volume > 0, price_volume / volume, np.nan)
+        self.session = int(sessions[-1]) if sessions.size else None
+        self.price_volume = float(price_volume[-1]) if sessions.size else 0.0
+        self.volume = float(volume[-1]) if sessions.size else 0.0
+        return {"vwap": out}
+
+    def _next(self, row) -> Tuple[int, float, float]:
+        session = int(row[TIMESTAMP] // self.session_seconds)
+        price_volume, volume = (self.price_volume, self.volume) if session == self.session else (0.0, 0.0)
+        typical = (row[HIGH] + row[LOW] + row[CLOSE]) / 3.0
+        return session, price_volume + typical * row[VOLUME], volume + row[VOLUME]
+
+    def push(self, row):
+        self.session, self.price_volume, self.volume = self._next(row)
+        return (self.price_volume / self.volume if self.volume > 0 else math.nan,)
+
+    def peek(self, row):
+        _, price_volume, volume = self._next(row)
+        return (price_volume / volume if volume > 0 else math.nan,)
+
+
+class BollingerBands(Indicator):
+    """SMA of the close with bands `width` population standard deviations away."""
+
+    def __init__(self, period: int = 20, width: float = 2.0):
+        self.period = period
+        self.width = width
+        name = f"bb_{period}_{width:g}"
+        self.outputs = (f"{name}_middle", f"{name}_upper", f"{name}_lower")
+        self.warmup = period
+        self.window: deque = deque(maxlen=period)
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def compute(self, rows):
+        close = columns_of(rows)["close"]
+        middle = np.full(close.size, np.nan)
+        deviation = np.full(close.size, np.nan)
+        if close.size >= self.period:
+            windows = np.lib.stride_tricks.sliding_window_view(close, self.period)
+            middle[self.period - 1:] = windows.mean(axis=1)
+            deviation[self.period - 1:] = windows.std(axis=1)
+        self.window = deque(close[-self.period:].tolist(), maxlen=self.period)
+        self.total = float(sum(self.window))
+        self.total_squares = float(sum(value * value for value in self.window))
+        outputs = dict(zip(self.outputs, (middle, middle + self.width * deviation, middle - self.width * deviation)))
+        return outputs
+
+    def _next(self, close: float):
+        total, total_squares, count = self.total + close, self.total_squares + close * close, len(self.window) + 1
+        if len(self.window) == self.period:
+            oldest = self.window[0]
+            total, total_squares, count = total - oldest, total_squares - oldest * oldest, self.period
+        if count < self.period:
+            return (math.nan, math.nan, math.nan), total, total_squares
+
+        middle = total / self.period
+        deviation = math.sqrt(max(total_squares / self.period - middle * middle, 0.0))
+        return (middle, middle + self.width * deviation, middle - self.width * deviation), total, total_squares
+
+    def push(self, row):
+        values, self.total, self.total_squares = self._next(row[CLOSE])
+        self.window.append(row[CLOSE])
+        return values
+
+    def peek(self, row):
+        return self._next(row[CLOSE])[0]
+
+
+# name: (factory, default parameters)
+INDICATORS: Dict[str, Tuple[Callable[..., Indicator], Tuple[float, ...]]] = {
+    "sma": (SMA, (20,)),
+    "ema": (EMA, (20,)),
+    "rsi": (RSI, (14,)),
+    "vwap": (VWAP, ()),
+    "bbands": (BollingerBands, (20, 2.0)),
+}
+
+
+def parse_indicators(spec: str) -> List[Tuple[str, Callable[[], Indicator]]]:
+    """Parse an indicator list such as "ema:20,rsi:14,vwap,bbands:20:2".
+
+    Args:
+        spec: Comma-separated indicators, each followed by optional colon-separated parameters
+
+    Returns:
+        (canonical spec, factory) per indicator, duplicates removed
+
+    Raises:
+        ValueError: If an indicator is unknown or its parameters are invalid
+    """
+    parsed = {}
+    for item in spec.split(","):
+        name, *arguments = [part.strip() for part in item.strip().lower().split(":")]
+        if not name:
+            continue
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}', expected one of {', '.join(INDICATORS)}")
+
+        factory, defaults = INDICATORS[name]
+        if len(arguments) > len(defaults):
+            raise ValueError(f"Indicator '{name}' takes at most {len(defaults)} parameters")
+        try:
+            parameters = [type(default)(argument) for default, argument in zip(defaults, arguments)]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for indicator '{name}'")
+        parameters += defaults[len(parameters):]
+        if parameters and not 1 <= parameters[0] <= MAX_PERIOD:
+            raise ValueError(f"The period of '{name}' must be between 1 and {MAX_PERIOD}")
+
+        canonical = ":".join([name, *(f"{parameter:g}" for parameter in parameters)])
+        parsed[canonical] = lambda factory=factory, parameters=tuple(parameters): factory(*parameters)
+
+    if not parsed:
+        raise ValueError("At least one indicator is required")
+    return list(parsed.items())
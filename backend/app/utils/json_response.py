@@ -0,0 +1,97 @@
+import functools
+import importlib.util
+import inspect
+import json
+from typing import Any, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.tracing import span
+
+# orjson is optional, the standard library encoder is used when it is not installed
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+
+if HAS_ORJSON:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class RawJSON(bytes):
+    """JSON that is already serialized. Responses send it as is, without validation or re-encoding."""
+
+
+def _default(value: Any) -> Any:
+    # types the encoder does not know, e.g. Decimal or pydantic models
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to compact UTF-8 JSON.
+
+    Args:
+        content: JSON-compatible value, RawJSON is returned unchanged
+
+    Returns:
+        The encoded JSON
+    """
+    if isinstance(content, RawJSON):
+        return bytes(content)
+    if HAS_ORJSON:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Parse JSON, with orjson when available."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when available, and passing RawJSON through."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    """Route returning the endpoint result as a FastJSONResponse.
+
+    FastAPI validates the result against `response_model` and runs it through
+    `jsonable_encoder` before serializing it. For `Dict[str, Any]` models that
+    only walks and copies large upstream payloads, so this route serializes the
+    result directly. `response_model` is still used for the OpenAPI schema.
+    Endpoints returning a Response keep it as is.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, self._wrap(endpoint, kwargs.get("status_code")), **kwargs)
+
+    @staticmethod
+    def _wrap(endpoint: Callable[..., Any], status_code: Any) -> Callable[..., Any]:
+        is_coroutine = inspect.iscoroutinefunction(endpoint)
+
+        # functools.wraps keeps the signature FastAPI reads the parameters from
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if is_coroutine:
+                result = await endpoint(*args, **kwargs)
+            else:
+                result = await run_in_threadpool(endpoint, *args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            with span("serialize"):
+                return FastJSONResponse(result, status_code=status_code or 200)
+
+        return wrapper
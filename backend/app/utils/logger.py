@@ -1,44 +1,354 @@
+import abc
+import asyncio
 import logging
 import sys
 import csv
+import queue
+import threading
+import time
 from datetime import datetime
 import os
+from typing import Any, Dict, List, Optional, TextIO
 
+from app.constant.config import (
+    DB_CONNECTION_URL,
+    LOG_BATCH_SIZE,
+    LOG_BLOCK_TIMEOUT,
+    LOG_DB_BATCH_SIZE,
+    LOG_DB_COPY,
+    LOG_DB_FLUSH_INTERVAL,
+    LOG_FLUSH_INTERVAL,
+    LOG_QUEUE_FULL_POLICY,
+    LOG_QUEUE_MAX_SIZE,
+    LOG_SINKS,
+)
 from app.schema.log import LogModel
 
+LOG_DIR = "app/logs"
+CSV_HEADER = [
+    "action_datetime", "path_name", "method", "ip",
+    "status_response", "response", "description", "request_body",
+    "request_query", "duration"
+]
+
+_logger = logging.getLogger(__name__)
+
 def get_csv_filename(date):
     week = date.isocalendar()[1]
     year = date.year
-    return os.path.join("app/logs", f"log_week_{week}_{year}.csv")
+    return os.path.join(LOG_DIR, f"log_week_{week}_{year}.csv")
+
+class BatchWriter(abc.ABC):
+    """Background thread writing items from a bounded queue in batches.
+
+    Items are flushed when `batch_size` of them are waiting or `flush_interval`
+    seconds passed since the last flush. When the queue is full, `submit` either
+    drops the item or blocks the caller for up to `block_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        queue_full_policy: str = "drop",
+        block_timeout: float = 0.5,
+    ):
+        if queue_full_policy not in ("drop", "block"):
+            raise ValueError(f"Unknown queue full policy: {queue_full_policy}")
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_full_policy = queue_full_policy
+        self.block_timeout = block_timeout
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Flush every queued item and stop the thread."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, item: Any) -> bool:
+        """Queue an item for writing, from a thread that may block.
+
+        With the "block" policy a full queue blocks the calling thread, use
+        `asubmit` on the event loop.
+
+        Returns:
+            False when the item was dropped because the queue is full
+        """
+        if self._thread is None:
+            self.start()
+        try:
+            if self.queue_full_policy == "block":
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    async def asubmit(self, item: Any) -> bool:
+        """Queue an item for writing from the event loop.
+
+        With the "block" policy a full queue is waited on in a worker thread,
+        so only the calling request is held back, not every request on the loop.
+
+        Returns:
+            False when the item was dropped because the queue is full
+        """
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            if self.queue_full_policy != "block":
+                self.dropped += 1
+                return False
+        try:
+            await asyncio.to_thread(self._queue.put, item, True, self.block_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self) -> None:
+        batch: List[Any] = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            stopping = self._stopping.is_set()
+            if stopping:
+                # drain what is left so shutdown loses nothing
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            if batch and (
+                stopping
+                or len(batch) >= self.batch_size
+                or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                self._flush(batch)
+                batch = []
+            if not batch:
+                last_flush = time.monotonic()
+
+            if stopping:
+                self._close()
+                return
+
+    def _flush(self, batch: List[Any]) -> None:
+        try:
+            self._write_batch(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed_batches += 1
+            _logger.error(f"{self.name} failed to write {len(batch)} items: {e}")
+
+    @abc.abstractmethod
+    def _write_batch(self, batch: List[Any]) -> None:
+        """Write a batch of items, called from the writer thread."""
+
+    def _close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "queue_full_policy": self.queue_full_policy,
+        }
+
+class CSVLogWriter(BatchWriter):
+    """Writes access logs to the weekly CSV file, keeping it open between batches."""
+
+    def __init__(self, **kwargs):
+        super().__init__(name="access-log-writer", **kwargs)
+        self._filename: Optional[str] = None
+        self._file: Optional[TextIO] = None
+        self._writer = None
+
+    def _open(self, filename: str) -> None:
+        self._close()
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        is_new = not os.path.exists(filename)
+        self._file = open(filename, mode='a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(CSV_HEADER)
+        self._filename = filename
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._writer = None
+        self._filename = None
+
+    def _write_batch(self, batch: List[LogModel]) -> None:
+        rows: List[list] = []
+        for request in batch:
+            filename = get_csv_filename(request.action_date)
+            if filename != self._filename:
+                # rotate to the new weekly file
+                if rows:
+                    self._writer.writerows(rows)
+                    rows = []
+                self._open(filename)
+            rows.append(to_row(request))
+        self._writer.writerows(rows)
+        self._file.flush()
+
+def to_row(request: LogModel) -> list:
+    return [
+        request.action_date.strftime("%Y-%m-%d %H:%M:%S"),
+        request.path_name,
+        request.method,
+        request.ip,
+        request.status_response,
+        request.response,
+        request.description,
+        request.request_body,
+        request.request_query,
+        request.duration
+    ]
+
+def to_record(request: LogModel) -> Dict[str, Any]:
+    """Turn a log into an `access_logs` row."""
+    record = request.model_dump()
+    if isinstance(record["request_body"], bytes):
+        record["request_body"] = record["request_body"].decode("utf-8", errors="replace")
+    return record
+
+class DatabaseLogWriter(BatchWriter):
+    """Writes access logs to the `access_logs` table, a transaction per batch.
+
+    A batch is sent as one executemany INSERT, which reuses a single prepared
+    statement for every row, or with COPY on PostgreSQL when `use_copy` is
+    set. The thread runs its own event loop and
+    DatabaseSessionManager, since async connections belong to the loop that
+    opened them, so no database work runs on the loop serving requests.
+    """
+
+    def __init__(self, url: str = DB_CONNECTION_URL, use_copy: bool = LOG_DB_COPY, **kwargs):
+        """Initialize the writer. The database is connected on the first batch.
+
+        Args:
+            url: Database URL, sync URLs are switched to their async driver
+            use_copy: Use COPY instead of INSERT on PostgreSQL
+            kwargs: Queue and batch settings of BatchWriter
+        """
+        super().__init__(name="access-log-db-writer", **kwargs)
+        self.url = url
+        self.use_copy = use_copy
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._manager = None
+
+    def _open(self) -> None:
+        # imported here to keep SQLAlchemy out of the boot path
+        from app.database.database import DatabaseSessionManager, async_url
+
+        self._loop = asyncio.new_event_loop()
+        self._manager = DatabaseSessionManager(async_url(self.url))
+
+    def _close(self) -> None:
+        if self._manager is not None:
+            self._loop.run_until_complete(self._manager.close())
+            self._loop.close()
+        self._manager = None
+        self._loop = None
+
+    def _write_batch(self, batch: List[LogModel]) -> None:
+        if self._manager is None:
+            self._open()
+        self._loop.run_until_complete(self._insert([to_record(request) for request in batch]))
+
+    async def _insert(self, records: List[Dict[str, Any]]) -> None:
+        from sqlalchemy import insert
+        from app.database.model import AccessLog
+
+        columns = list(records[0])
+        async with self._manager.connect() as connection:
+            if self.use_copy and connection.dialect.name == "postgresql":
+                raw = await connection.get_raw_connection()
+                # COPY runs on the asyncpg connection under SQLAlchemy's, committed by its own transaction
+                async with raw.driver_connection.transaction():
+                    await raw.driver_connection.copy_records_to_table(
+                        AccessLog.__tablename__,
+                        records=[tuple(record[column] for column in columns) for record in records],
+                        columns=columns,
+                    )
+                return
+            # compiling a multi-row VALUES statement per batch is about 10 times slower
+            await connection.execute(insert(AccessLog), records)
+            await connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "copy": self.use_copy}
+
+log_writer = CSVLogWriter(
+    max_queue_size=LOG_QUEUE_MAX_SIZE,
+    batch_size=LOG_BATCH_SIZE,
+    flush_interval=LOG_FLUSH_INTERVAL,
+    queue_full_policy=LOG_QUEUE_FULL_POLICY,
+    block_timeout=LOG_BLOCK_TIMEOUT,
+)
+
+db_log_writer = DatabaseLogWriter(
+    max_queue_size=LOG_QUEUE_MAX_SIZE,
+    batch_size=LOG_DB_BATCH_SIZE,
+    flush_interval=LOG_DB_FLUSH_INTERVAL,
+    queue_full_policy=LOG_QUEUE_FULL_POLICY,
+    block_timeout=LOG_BLOCK_TIMEOUT,
+)
+
+if "database" in LOG_SINKS and not DB_CONNECTION_URL:
+    _logger.warning("LOG_SINKS includes database but DB_CONNECTION_URL is not set, access logs are not written to a database")
+
+# the writers of the sinks selected by LOG_SINKS
+log_writers = [
+    writer
+    for sink, writer in (("csv", log_writer), ("database", db_log_writer))
+    if sink in LOG_SINKS and (sink != "database" or DB_CONNECTION_URL)
+]
 
-def write_log(
+async def write_log(
     request: LogModel
 ):
-    curr_date = datetime.now()
-    filename = get_csv_filename(curr_date)
-    
-    if not os.path.exists(filename):
-        with open(filename, mode='a', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(
-                [
-                    "action_datetime", "path_name", "method", "ip", 
-                "status_response", "response", "description", "request_body", 
-                "request_query", "duration"
-                ]
-            )
-    
-    with open(filename, mode='a', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            request.action_date.strftime("%Y-%m-%d %H:%M:%S"), 
-            request.path_name, 
-            request.method, 
-            request.ip, 
-            request.status_response, 
-            request.response, 
-            request.description, 
-            request.request_body, 
-            request.request_query, 
-            request.duration
-        ])
\ No newline at end of file
+    for writer in log_writers:
+        await writer.asubmit(request)
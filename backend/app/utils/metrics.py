@@ -0,0 +1,129 @@
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from app.constant.config import PROMETHEUS_MULTIPROC_DIR
+
+T = TypeVar("T")
+
+# with several workers, each one writes its values to memory-mapped files in
+# PROMETHEUS_MULTIPROC_DIR, set by run.py, and /metrics merges them
+MULTIPROCESS = bool(PROMETHEUS_MULTIPROC_DIR)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+# route label of the requests that matched no route, so unknown paths do not create series
+UNMATCHED_ROUTE = "(unmatched)"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 256 B to 16 MiB
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+REQUEST_DURATION = Histogram(
+    "dashmetrics_http_request_duration_seconds",
+    "Time to serve a request, by route template and status",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "dashmetrics_http_response_size_bytes",
+    "Size of the response bodies, by route template",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "dashmetrics_http_requests_in_flight",
+    "Requests being served",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_DURATION = Histogram(
+    "dashmetrics_upstream_request_duration_seconds",
+    "Time of one upstream call attempt until its response headers, by provider",
+    ("provider",),
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "dashmetrics_upstream_errors_total",
+    "Upstream call attempts that failed, by provider and HTTP status or exception",
+    ("provider", "reason"),
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "dashmetrics_upstream_requests_in_flight",
+    "Upstream call attempts waiting for a response, by provider",
+    ("provider",),
+    multiprocess_mode="livesum",
+)
+
+_children: Dict[Tuple[Any, Tuple[str, ...]], Any] = {}
+
+
+def labels(metric: Any, *values: str) -> Any:
+    """The child of a metric for some label values.
+
+    `metric.labels()` takes the metric's lock on every call, so the children
+    are cached here: an update costs a dict lookup and the value's own
+    uncontended lock, or an mmap write with several workers.
+    """
+    key = (metric, values)
+    child = _children.get(key)
+    if child is None:
+        child = _children[key] = metric.labels(*values)
+    return child
+
+
+def observe_request(method: str, route: str, status: int, duration: float, size: int) -> None:
+    """Record a served request."""
+    labels(REQUEST_DURATION, method, route, str(status)).observe(duration)
+    labels(RESPONSE_SIZE, method, route).observe(size)
+
+
+def error_reason(error: BaseException) -> str:
+    """The HTTP status of a failed upstream call when there is one, e.g. "503", else the exception name."""
+    status = getattr(error, "status", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return str(status) if isinstance(status, int) else type(error).__name__
+
+
+async def track_upstream(provider: str, send: Callable[[], Awaitable[T]]) -> T:
+    """Make one upstream call attempt, recording its latency, failures and the attempts in flight.
+
+    Args:
+        provider: Name of the upstream, e.g. geckoterminal
+        send: Coroutine function making the call, returning an httpx or aiohttp response or a result
+
+    Returns:
+        The result of `send`. Responses with a 4xx or 5xx status are counted as errors
+    """
+    in_flight = labels(UPSTREAM_IN_FLIGHT, provider)
+    in_flight.inc()
+    start = time.perf_counter()
+    reason: Optional[str] = None
+    try:
+        result = await send()
+        status = getattr(result, "status_code", None) or getattr(result, "status", None)
+        if isinstance(status, int) and status >= 400:
+            reason = str(status)
+        return result
+    except Exception as e:
+        reason = error_reason(e)
+        raise
+    finally:
+        in_flight.dec()
+        labels(UPSTREAM_DURATION, provider).observe(time.perf_counter() - start)
+        if reason is not None:
+            labels(UPSTREAM_ERRORS, provider, reason).inc()
+
+
+def render() -> bytes:
+    """Metrics in the Prometheus text format, merged over every worker."""
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drop the in-flight gauges of this worker when it exits. Called once from the app lifespan."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
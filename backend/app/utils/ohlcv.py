@@ -0,0 +1,150 @@
+import re
+from typing import TYPE_CHECKING, Dict, Optional, Sequence
+
+# numpy is imported by the functions that need it, parsing intervals stays cheap at boot
+if TYPE_CHECKING:
+    import numpy as np
+
+# columns of a GeckoTerminal candle: [timestamp, open, high, low, close, volume]
+TIMESTAMP, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+INTERVAL_UNITS = {
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+}
+
+_INTERVAL = re.compile(r"^\s*(\d+)\s*([smhdw])\s*$", re.IGNORECASE)
+
+
+def parse_interval(interval: str) -> int:
+    """Parse a candle size such as "3m", "7m", "2h" or "1d".
+
+    Args:
+        interval: Count followed by a unit (s, m, h, d or w)
+
+    Returns:
+        The candle size in seconds
+
+    Raises:
+        ValueError: If the interval is malformed or zero
+    """
+    match = _INTERVAL.match(interval)
+    if match is None:
+        raise ValueError(f"Invalid interval '{interval}', expected e.g. 5m, 2h or 1d")
+
+    seconds = int(match.group(1)) * INTERVAL_UNITS[match.group(2).lower()]
+    if seconds <= 0:
+        raise ValueError(f"Invalid interval '{interval}', it must be greater than zero")
+    return seconds
+
+
+def resample(
+    timestamps: Sequence[float],
+    open: Sequence[float],
+    high: Sequence[float],
+    low: Sequence[float],
+    close: Sequence[float],
+    sums: Optional[Dict[str, Sequence[float]]] = None,
+    bucket_seconds: int = 60,
+    fill_gaps: bool = False,
+    origin: int = 0,
+) -> Dict[str, "np.ndarray"]:
+    """Aggregate candles, or trades, into buckets of any size.
+
+    Rows are grouped by `(timestamp - origin) // bucket_seconds`. Each bucket
+    takes the first open, highest high, lowest low and last close of its
+    rows, and the sum of every column in `sums`. Every column is reduced in
+    one vectorized pass over the sorted rows. Raw trades are resampled by
+    passing their price as open, high, low and close.
+
+    Args:
+        timestamps: Unix timestamps in seconds, in any order
+        open: Open price of each row
+        high: High price of each row
+        low: Low price of each row
+        close: Close price of each row
+        sums: Columns summed per bucket, e.g. {"volume": [...]}
+        bucket_seconds: Size of the output buckets in seconds
+        fill_gaps: Emit empty buckets between the first and the last one. They
+            are flat at the previous close with zero sums
+        origin: Timestamp the buckets are aligned to
+
+    Returns:
+        {"timestamp", "open", "high", "low", "close", *sums} arrays, oldest bucket first
+    """
+    import numpy as np
+
+    sums = sums or {}
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    columns = {"timestamp": np.empty(0, dtype=np.int64)}
+    if timestamps.size == 0:
+        for name in ("open", "high", "low", "close", *sums):
+            columns[name] = np.empty(0, dtype=np.float64)
+        return columns
+
+    # stable sort keeps the original order of rows sharing a timestamp
+    order = np.argsort(timestamps, kind="stable")
+    buckets = (timestamps[order] - origin) // bucket_seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], buckets.size] - 1
+
+    def column(values: Sequence[float]) -> "np.ndarray":
+        return np.asarray(values, dtype=np.float64)[order]
+
+    columns["timestamp"] = buckets[starts] * bucket_seconds + origin
+    columns["open"] = column(open)[starts]
+    columns["high"] = np.maximum.reduceat(column(high), starts)
+    columns["low"] = np.minimum.reduceat(column(low), starts)
+    columns["close"] = column(close)[ends]
+    for name, values in sums.items():
+        columns[name] = np.add.reduceat(column(values), starts)
+
+    if fill_gaps:
+        columns = _fill_gaps(columns, sums, bucket_seconds)
+    return columns
+
+
+def _fill_gaps(columns: Dict[str, "np.ndarray"], sums: Dict[str, Sequence[float]], bucket_seconds: int) -> Dict[str, "np.ndarray"]:
+    import numpy as np
+
+    first = columns["timestamp"][0]
+    slots = (columns["timestamp"] - first) // bucket_seconds
+    size = int(slots[-1]) + 1
+    if size == slots.size:
+        return columns
+
+    present = np.zeros(size, dtype=bool)
+    present[slots] = True
+    # index of the last present bucket at or before each slot
+    previous = np.maximum.accumulate(np.where(present, np.arange(size), 0))
+    source = np.cumsum(present) - 1
+
+    filled = {"timestamp": first + np.arange(size, dtype=np.int64) * bucket_seconds}
+    last_close = columns["close"][source[previous]]
+    for name in ("open", "high", "low", "close"):
+        filled[name] = np.where(present, columns[name][source], last_close)
+    for name in sums:
+        filled[name] = np.zeros(size, dtype=np.float64)
+        filled[name][slots] = columns[name]
+    return filled
+
+
+def to_rows(columns: Dict[str, "np.ndarray"], names: Sequence[str], newest_first: bool = False) -> list:
+    """Convert resampled columns to [[timestamp, *values], ...] rows.
+
+    Args:
+        columns: Output of `resample`
+        names: Columns to include after the timestamp, in order
+        newest_first: Return the newest bucket first, like GeckoTerminal
+
+    Returns:
+        A list of rows with native Python numbers
+    """
+    stacked = [columns["timestamp"].tolist()] + [columns[name].tolist() for name in names]
+    rows = [list(row) for row in zip(*stacked)]
+    if newest_first:
+        rows.reverse()
+    return rows
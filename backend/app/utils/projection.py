@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Getter = Callable[[Any], Any]
+
+
+def _compile_path(path: str) -> Getter:
+    """Compile a dotted path such as "Trade.Account.Address" or "marketcap.0.Currency.Name".
+
+    Numeric segments index into lists. A missing key, index or a null value on
+    the way yields None instead of raising.
+    """
+    keys: Tuple[Any, ...] = tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+    if len(keys) == 1 and isinstance(keys[0], str):
+        key = keys[0]
+        return lambda node: node.get(key) if isinstance(node, dict) else None
+
+    def get(node: Any) -> Any:
+        for key in keys:
+            try:
+                node = node[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return node
+
+    return get
+
+
+def to_float(value: Any) -> Optional[float]:
+    """Convert BitQuery decimal strings to float, keeping nulls."""
+    return None if value is None else float(value)
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    """Convert a BitQuery ISO 8601 time such as "2025-01-31T10:00:00Z" to a Unix timestamp."""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class Projection:
+    """Flattens a GraphQL result into records or columns along paths declared once.
+
+    Replaces `pd.json_normalize` + `rename` + `to_dict(orient='records')` for
+    the small responses of a single query, without building a DataFrame.
+    """
+
+    def __init__(self, root: str, fields: Dict[str, str], converters: Optional[Dict[str, Callable[[Any], Any]]] = None):
+        """Compile the projection.
+
+        Args:
+            root: Path from the response to the rows, e.g. "data.Solana.DEXTradeByTokens".
+                A list yields one record per item, an object a single record
+            fields: Output name to the path of its value inside a row
+            converters: Output name to a function applied to its value
+        """
+        self.root = root
+        self.fields = dict(fields)
+        converters = converters or {}
+        self._root = _compile_path(root)
+        self._getters: List[Tuple[str, Getter, Optional[Callable[[Any], Any]]]] = [
+            (name, _compile_path(path), converters.get(name))
+            for name, path in self.fields.items()
+        ]
+
+    def _rows(self, result: Optional[Dict[str, Any]]) -> List[Any]:
+        node = self._root(result) if result else None
+        if node is None:
+            return []
+        return node if isinstance(node, list) else [node]
+
+    def records(self, result: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extract one flat dict per row.
+
+        Args:
+            result: GraphQL response, None when the request failed
+
+        Returns:
+            [{name: value, ...}, ...] in row order
+        """
+        records = []
+        for row in self._rows(result):
+            record = {}
+            for name, get, convert in self._getters:
+                value = get(row)
+                record[name] = value if convert is None else convert(value)
+            records.append(record)
+        return records
+
+    def columns(self, result: Optional[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """Extract one list per field, e.g. to feed NumPy.
+
+        Args:
+            result: GraphQL response, None when the request failed
+
+        Returns:
+            {name: [value per row], ...}
+        """
+        rows = self._rows(result)
+        columns = {}
+        for name, get, convert in self._getters:
+            values = [get(row) for row in rows]
+            columns[name] = values if convert is None else [convert(value) for value in values]
+        return columns
@@ -0,0 +1,272 @@
+import contextlib
+import functools
+import json
+import os
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, TextIO, TypeVar
+
+from app.constant.config import (
+    LOG_BLOCK_TIMEOUT,
+    LOG_QUEUE_FULL_POLICY,
+    LOG_QUEUE_MAX_SIZE,
+    TRACE_EXPORT_BATCH_SIZE,
+    TRACE_EXPORT_FLUSH_INTERVAL,
+    TRACE_EXPORT_MIN_DURATION_MS,
+    TRACE_EXPORT_PATH,
+)
+from app.utils.logger import BatchWriter
+
+# aiohttp and httpx are imported on first use, they are slow to import and not needed to boot
+if TYPE_CHECKING:
+    import aiohttp
+    import httpx
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    """A timed step of a request, e.g. the connect of an upstream call."""
+
+    __slots__ = ("name", "start", "duration")
+
+    def __init__(self, name: str, start: float, duration: float):
+        self.name = name
+        self.start = start
+        self.duration = duration
+
+
+class Trace:
+    """The spans recorded while serving one request.
+
+    Spans are recorded from the request task, the tasks it starts and the
+    threads its blocking calls run in, appending to a list is safe in all of them.
+    """
+
+    def __init__(self):
+        self.trace_id = os.urandom(8).hex()
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+
+    def add(self, name: str, start: float, duration: float) -> None:
+        """Record a span that started at `start`, a time.perf_counter() value."""
+        self.spans.append(Span(name, start, duration))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """The spans as a Server-Timing header, summed by name, and the time spent so far as `total`.
+
+        Returns:
+            e.g. `bitquery-queue;dur=0.0, bitquery-ttfb;dur=812.4, bitquery-decode;dur=35.1;desc="2 calls", total;dur=902.7`
+        """
+        totals: Dict[str, List[float]] = {}
+        for span in self.spans:
+            total = totals.setdefault(span.name, [0.0, 0])
+            total[0] += span.duration
+            total[1] += 1
+        metrics = [
+            f'{name};dur={duration * 1000:.1f}' + (f';desc="{count} calls"' if count > 1 else "")
+            for name, (duration, count) in totals.items()
+        ]
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def to_record(self, method: str, route: str, status: int, duration: float) -> Dict[str, Any]:
+        """The trace as an exported record, span starts are in milliseconds since the request started."""
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at.isoformat(),
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "start_ms": round((span.start - self.start) * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3),
+                }
+                for span in self.spans
+            ],
+        }
+
+
+# the trace of the request being served, None outside requests, e.g. in background refreshes
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the block as a span of the current request's trace. Does nothing outside a request."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter() - start)
+
+
+def record(name: str, duration: float) -> None:
+    """Record a span measured elsewhere, ending now, e.g. the queue wait returned by a scheduler."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter() - duration, duration)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorate a blocking function so each of its calls is a span."""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+# httpcore trace events starting and ending each phase of a call
+_HTTPCORE_STARTS = {
+    "connection.connect_tcp": "connect",
+    "connection.start_tls": "tls",
+    "http11.send_request_headers": "ttfb",
+    "http2.send_request_headers": "ttfb",
+    "http11.receive_response_body": "body",
+    "http2.receive_response_body": "body",
+}
+_HTTPCORE_ENDS = {
+    "connection.connect_tcp": "connect",
+    "connection.start_tls": "tls",
+    "http11.receive_response_headers": "ttfb",
+    "http2.receive_response_headers": "ttfb",
+    "http11.receive_response_body": "body",
+    "http2.receive_response_body": "body",
+}
+
+
+def httpx_trace_hook(provider: str) -> Callable[["httpx.Request"], Any]:
+    """An httpx request event hook timing the connect, TLS, time to first byte and body read of traced requests.
+
+    The phases come from the httpcore `trace` request extension. It is only
+    set while a request is traced, other calls are left as they are.
+
+    Args:
+        provider: Prefix of the span names, e.g. geckoterminal
+    """
+
+    async def on_request(request: "httpx.Request") -> None:
+        trace = current_trace.get()
+        if trace is None:
+            return
+        started: Dict[str, float] = {}
+
+        async def on_event(event: str, info: Dict[str, Any]) -> None:
+            name, _, stage = event.rpartition(".")
+            if stage == "started":
+                phase = _HTTPCORE_STARTS.get(name)
+                if phase is not None:
+                    started[phase] = time.perf_counter()
+            elif stage in ("complete", "failed"):
+                phase = _HTTPCORE_ENDS.get(name)
+                start = started.pop(phase, None) if phase is not None else None
+                if start is not None:
+                    trace.add(f"{provider}-{phase}", start, time.perf_counter() - start)
+
+        request.extensions["trace"] = on_event
+
+    return on_request
+
+
+def aiohttp_trace_config(provider: str) -> "aiohttp.TraceConfig":
+    """An aiohttp TraceConfig timing the wait for a pooled connection, the connect and the time to first byte of traced requests.
+
+    The body read and decode are timed by the caller, aiohttp reads the body
+    only when it is asked for.
+
+    Args:
+        provider: Prefix of the span names, e.g. bitquery
+    """
+    import aiohttp
+
+    def phase(name: str, start_attr: str) -> Callable[..., Any]:
+        async def on_end(session: Any, ctx: Any, params: Any) -> None:
+            trace = current_trace.get()
+            start = getattr(ctx, start_attr, None)
+            if trace is not None and start is not None:
+                trace.add(f"{provider}-{name}", start, time.perf_counter() - start)
+
+        return on_end
+
+    def mark(start_attr: str) -> Callable[..., Any]:
+        async def on_start(session: Any, ctx: Any, params: Any) -> None:
+            setattr(ctx, start_attr, time.perf_counter())
+
+        return on_start
+
+    config = aiohttp.TraceConfig()
+    config.on_connection_queued_start.append(mark("pool_start"))
+    config.on_connection_queued_end.append(phase("pool", "pool_start"))
+    config.on_connection_create_start.append(mark("connect_start"))
+    config.on_connection_create_end.append(phase("connect", "connect_start"))
+    # on_request_end fires once the response headers are read
+    config.on_request_headers_sent.append(mark("ttfb_start"))
+    config.on_request_end.append(phase("ttfb", "ttfb_start"))
+    return config
+
+
+class TraceWriter(BatchWriter):
+    """Appends the request traces to a JSON Lines file, a trace per line."""
+
+    def __init__(self, path: str, **kwargs):
+        """Initialize the writer. The file is opened on the first batch.
+
+        Args:
+            path: File the traces are appended to
+            kwargs: Queue and batch settings of BatchWriter
+        """
+        super().__init__(name="trace-writer", **kwargs)
+        self.path = path
+        self._file: Optional[TextIO] = None
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, mode="a", encoding="utf-8")
+        self._file.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch))
+        self._file.flush()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "path": self.path, "min_duration_ms": TRACE_EXPORT_MIN_DURATION_MS}
+
+
+# None when TRACE_EXPORT_PATH is not set, the traces are then only sent in the Server-Timing header
+trace_writer: Optional[TraceWriter] = TraceWriter(
+    TRACE_EXPORT_PATH,
+    max_queue_size=LOG_QUEUE_MAX_SIZE,
+    batch_size=TRACE_EXPORT_BATCH_SIZE,
+    flush_interval=TRACE_EXPORT_FLUSH_INTERVAL,
+    queue_full_policy=LOG_QUEUE_FULL_POLICY,
+    block_timeout=LOG_BLOCK_TIMEOUT,
+) if TRACE_EXPORT_PATH else None
+
+
+async def export_trace(trace: Trace, method: str, route: str, status: int, duration: float) -> None:
+    """Queue a finished trace for the export file when there is one and the request was slow enough."""
+    if trace_writer is not None and duration * 1000 >= TRACE_EXPORT_MIN_DURATION_MS:
+        await trace_writer.asubmit(trace.to_record(method, route, status, duration))
@@ -0,0 +1,356 @@
+"""Local stand-ins for GeckoTerminal, BitQuery and Token Metrics.
+
+Each fake answers with payloads shaped like the real API and waits
+`latency_ms` +/- `jitter_ms` before responding, so the benchmark measures the
+backend and not the internet.
+
+Run one fake with:
+    python -m benchmarks.fake_upstreams geckoterminal --port 8802 --latency-ms 50 --jitter-ms 20
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+SERVICES = ("geckoterminal", "bitquery", "tokenmetrics")
+DEFAULT_ROWS = 10
+
+
+class Latency:
+    """Simulated upstream latency."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+
+    async def wait(self):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def fake_address(seed: str, length: int = 44) -> str:
+    """Deterministic base58-looking address for a seed."""
+    alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    digest = hashlib.sha256(seed.encode()).digest() * 2
+    return "".join(alphabet[byte % len(alphabet)] for byte in digest[:length])
+
+
+def iso_time(seconds_ago: float = 0) -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+################################ GeckoTerminal ################################
+
+def gecko_token(address: str, network: str) -> Dict[str, Any]:
+    return {
+        "id": f"{network}_{address}",
+        "type": "token",
+        "attributes": {
+            "address": address,
+            "name": f"Token {address[:6]}",
+            "symbol": address[:4].upper(),
+            "decimals": 18,
+            "image_url": "missing.png",
+            "coingecko_coin_id": None,
+            "total_supply": "1000000000000000000000000000",
+            "price_usd": f"{random.uniform(0.0001, 10):.8f}",
+            "fdv_usd": f"{random.uniform(1e5, 1e9):.2f}",
+            "total_reserve_in_usd": f"{random.uniform(1e4, 1e7):.2f}",
+            "volume_usd": {"h24": f"{random.uniform(1e3, 1e7):.2f}"},
+            "market_cap_usd": None,
+        },
+        "relationships": {
+            "top_pools": {"data": [{"id": f"{network}_{fake_address(address + 'pool', 42)}", "type": "pool"}]},
+        },
+    }
+
+
+def gecko_pool(seed: str, network: str) -> Dict[str, Any]:
+    address = fake_address(seed, 42)
+    base, quote = fake_address(seed + "base", 42), fake_address(seed + "quote", 42)
+    return {
+        "id": f"{network}_{address}",
+        "type": "pool",
+        "attributes": {
+            "address": address,
+            "name": f"{base[:4].upper()} / {quote[:4].upper()}",
+            "pool_created_at": iso_time(86400 * 30),
+            "base_token_price_usd": f"{random.uniform(0.0001, 10):.8f}",
+            "quote_token_price_usd": f"{random.uniform(0.5, 4000):.8f}",
+            "fdv_usd": f"{random.uniform(1e5, 1e9):.2f}",
+            "reserve_in_usd": f"{random.uniform(1e4, 1e7):.2f}",
+            "price_change_percentage": {"m5": "0.1", "h1": "-1.2", "h6": "3.4", "h24": "5.6"},
+            "transactions": {"h1": {"buys": 12, "sells": 9, "buyers": 10, "sellers": 7}},
+            "volume_usd": {"m5": "120.5", "h1": "3400.2", "h6": "21000.7", "h24": "98000.1"},
+        },
+        "relationships": {
+            "base_token": {"data": {"id": f"{network}_{base}", "type": "token"}},
+            "quote_token": {"data": {"id": f"{network}_{quote}", "type": "token"}},
+            "dex": {"data": {"id": "uniswap_v2", "type": "dex"}},
+        },
+    }
+
+
+def gecko_pools_payload(seed: str, network: str, include: Optional[str]) -> Dict[str, Any]:
+    pools = [gecko_pool(f"{seed}{i}", network) for i in range(20)]
+    payload = {"data": pools}
+    if include:
+        payload["included"] = [
+            gecko_token(pool["relationships"]["base_token"]["data"]["id"].split("_", 1)[1], network)
+            for pool in pools
+        ]
+    return payload
+
+
+def geckoterminal_app(latency: Latency) -> Starlette:
+    async def trending_pools(request: Request):
+        await latency.wait()
+        network = request.path_params["network"]
+        return JSONResponse(gecko_pools_payload("trending", network, request.query_params.get("include")))
+
+    async def search_pools(request: Request):
+        await latency.wait()
+        network = request.query_params.get("network", "eth")
+        return JSONResponse(gecko_pools_payload(request.query_params.get("query", ""), network, request.query_params.get("include")))
+
+    async def ohlcv(request: Request):
+        await latency.wait()
+        step = {"minute": 60, "hour": 3600, "day": 86400}.get(request.path_params["timeframe"], 60)
+        step *= int(request.query_params.get("aggregate", 1))
+        limit = min(int(request.query_params.get("limit", 100)), 1000)
+        before = int(request.query_params.get("before_timestamp", time.time()))
+        last = before - before % step
+        price = random.uniform(0.5, 10)
+        rows = []
+        for i in range(limit):
+            open_, close = price, price * random.uniform(0.98, 1.02)
+            rows.append([last - i * step, open_, max(open_, close) * 1.01, min(open_, close) * 0.99, close, random.uniform(100, 1e5)])
+            price = close
+        return JSONResponse({
+            "data": {
+                "id": fake_address(request.path_params["pool"]),
+                "type": "ohlcv_request_response",
+                "attributes": {"ohlcv_list": rows},
+            },
+            "meta": {
+                "base": {"address": request.path_params["pool"], "name": "Base", "symbol": "BASE"},
+                "quote": {"address": fake_address("quote", 42), "name": "Wrapped Ether", "symbol": "WETH"},
+            },
+        })
+
+    async def multi_tokens(request: Request):
+        await latency.wait()
+        network = request.path_params["network"]
+        tokens = [gecko_token(address, network) for address in request.path_params["addresses"].split(",")]
+        return JSONResponse({"data": tokens, "included": [gecko_pool(token["id"], network) for token in tokens]})
+
+    async def token(request: Request):
+        await latency.wait()
+        network = request.path_params["network"]
+        token = gecko_token(request.path_params["address"], network)
+        return JSONResponse({"data": token, "included": [gecko_pool(token["id"], network)]})
+
+    return Starlette(routes=[
+        Route("/api/v2/networks/{network}/trending_pools", trending_pools),
+        Route("/api/v2/search/pools", search_pools),
+        Route("/api/v2/networks/{network}/pools/{pool}/ohlcv/{timeframe}", ohlcv),
+        Route("/api/v2/networks/{network}/tokens/multi/{addresses}", multi_tokens),
+        Route("/api/v2/networks/{network}/tokens/{address}", token),
+    ])
+
+
+################################ BitQuery ################################
+
+_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\.\.\.|[A-Za-z_]\w*|\S')
+
+Selection = List[Tuple[str, Optional["Selection"]]]
+
+
+def parse_selection(query: str) -> Selection:
+    """Parse the selection set of a GraphQL document into (response key, children) pairs.
+
+    Arguments are skipped: only the shape of the response matters to the fake.
+    """
+    tokens = _TOKEN.findall(query)
+    position = tokens.index("{")
+
+    def skip_arguments(i: int) -> int:
+        depth = 0
+        while True:
+            if tokens[i] == "(":
+                depth += 1
+            elif tokens[i] == ")":
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+
+    def parse(i: int) -> Tuple[Selection, int]:
+        fields = []
+        i += 1  # opening brace
+        while tokens[i] != "}":
+            key = tokens[i]
+            i += 1
+            if tokens[i] == ":":
+                i += 2  # aliased field, the alias is the response key
+            if tokens[i] == "(":
+                i = skip_arguments(i)
+            children = None
+            if tokens[i] == "{":
+                children, i = parse(i)
+            fields.append((key, children))
+        return fields, i + 1
+
+    selection, _ = parse(position)
+    return selection
+
+
+def bitquery_leaf(key: str, seed: str) -> Any:
+    lowered = key.lower()
+    if lowered in ("address", "owner", "signer", "mintaddress", "marketaddress", "programaddress", "signature"):
+        return fake_address(seed)
+    if lowered in ("name", "protocolname", "protocolfamily"):
+        return f"Pump {seed[-4:]}"
+    if lowered == "symbol":
+        return seed[-4:].upper()
+    if lowered == "type":
+        return random.choice(("buy", "sell"))
+    if lowered == "fungible":
+        return True
+    if lowered == "decimals":
+        return 6
+    if "time" in lowered:
+        return iso_time(random.uniform(0, 3600))
+    if lowered.endswith("count") or lowered.startswith("num_"):
+        return str(random.randint(1, 5000))
+    # prices, amounts, balances, volumes and market caps are decimal strings
+    return f"{random.uniform(0.001, 1e6):.6f}"
+
+
+def bitquery_value(selection: Selection, seed: str) -> Dict[str, Any]:
+    return {
+        key: bitquery_leaf(key, f"{seed}{key}") if children is None else bitquery_value(children, f"{seed}{key}")
+        for key, children in selection
+    }
+
+
+def bitquery_payload(query: str, rows: int = DEFAULT_ROWS) -> Dict[str, Any]:
+    """Build a response for any query: each dataset (e.g. `Solana`) holds `rows` rows per cube."""
+    data = {}
+    for dataset, cubes in parse_selection(query):
+        data[dataset] = {
+            cube: [bitquery_value(fields or [], f"{cube}{i}") for i in range(rows)]
+            for cube, fields in (cubes or [])
+        }
+    return {"data": data}
+
+
+def bitquery_app(latency: Latency) -> Starlette:
+    async def graphql(request: Request):
+        body = await request.json()
+        await latency.wait()
+        return JSONResponse(bitquery_payload(body["query"]))
+
+    return Starlette(routes=[Route("/eap", graphql, methods=["POST"])])
+
+
+################################ Token Metrics ################################
+
+SYMBOLS = ("BTC", "ETH", "SOL", "DOGE", "PEPE")
+
+
+def tokenmetrics_row(endpoint: str, symbol: str, day: int) -> Dict[str, Any]:
+    row = {
+        "TOKEN_ID": 3375 + SYMBOLS.index(symbol) if symbol in SYMBOLS else 1,
+        "TOKEN_NAME": symbol.title(),
+        "TOKEN_SYMBOL": symbol,
+        "DATE": iso_time(86400 * day),
+    }
+    if endpoint in ("daily-ohlcv", "hourly-ohlcv"):
+        close = random.uniform(0.5, 70000)
+        row.update(OPEN=close * 0.99, HIGH=close * 1.02, LOW=close * 0.97, CLOSE=close, VOLUME=random.uniform(1e5, 1e9))
+    elif endpoint in ("trader-grades", "investor-grades"):
+        row.update(TA_GRADE=random.uniform(0, 100), QUANT_GRADE=random.uniform(0, 100), TM_GRADE=random.uniform(0, 100))
+    elif endpoint == "trading-signals":
+        row.update(TRADING_SIGNAL=random.choice((-1, 0, 1)), TOKEN_TREND=random.choice((-1, 1)), TRADING_SIGNALS_RETURNS=random.uniform(-1, 3))
+    elif endpoint == "ai-reports":
+        row.update(INVESTMENT_ANALYSIS_POINTER="...", INVESTMENT_ANALYSIS="Lorem ipsum " * 200, DEEP_DIVE="Lorem ipsum " * 400)
+    elif endpoint == "sentiments":
+        row.update(SENTIMENT_SCORE=random.uniform(-1, 1), SENTIMENT_SUMMARY="Mostly positive", TWITTER_SENTIMENT=random.uniform(-1, 1))
+    return row
+
+
+def tokenmetrics_app(latency: Latency) -> Starlette:
+    async def listing(request: Request):
+        await latency.wait()
+        endpoint = request.path_params["endpoint"]
+        symbols = request.query_params.get("symbol", ",".join(SYMBOLS)).split(",")
+        if endpoint in ("market-metrics", "trader-indices"):
+            data = [
+                {"DATE": iso_time(86400 * day), "TOTAL_CRYPTO_MCAP": random.uniform(1e12, 3e12), "TM_GRADE_SIGNAL": random.choice((-1, 1))}
+                for day in range(DEFAULT_ROWS)
+            ]
+        else:
+            days = 1 if endpoint in ("tokens", "ai-reports") else DEFAULT_ROWS
+            data = [tokenmetrics_row(endpoint, symbol.strip(), day) for symbol in symbols for day in range(days)]
+        return JSONResponse({"success": True, "message": "Data fetched successfully", "length": len(data), "data": data})
+
+    async def ai_agent(request: Request):
+        await request.body()
+        await latency.wait()
+        return JSONResponse({"success": True, "message": "Answer fetched successfully", "answer": "Bitcoin looks bullish. " * 20, "thread": []})
+
+    return Starlette(routes=[
+        Route("/v2/tmai", ai_agent, methods=["POST"]),
+        Route("/v2/{endpoint}", listing),
+    ])
+
+
+def create_app(service: str, latency_ms: float = 50, jitter_ms: float = 0) -> Starlette:
+    """Create the fake of an upstream service.
+
+    Args:
+        service: One of `geckoterminal`, `bitquery` or `tokenmetrics`
+        latency_ms: Mean simulated upstream latency in milliseconds
+        jitter_ms: Maximum deviation from the mean latency in milliseconds
+
+    Returns:
+        The ASGI app of the fake
+    """
+    factories = {
+        "geckoterminal": geckoterminal_app,
+        "bitquery": bitquery_app,
+        "tokenmetrics": tokenmetrics_app,
+    }
+    return factories[service](Latency(latency_ms, jitter_ms))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a fake upstream API for benchmarks")
+    parser.add_argument("service", choices=SERVICES, help="Upstream API to fake")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to listen on")
+    parser.add_argument("--port", type=int, required=True, help="Port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean simulated latency in milliseconds")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Maximum deviation from the mean latency in milliseconds")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(
+        create_app(args.service, args.latency_ms, args.jitter_ms),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
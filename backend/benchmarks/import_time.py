@@ -0,0 +1,109 @@
+"""Report what importing `main:app` costs, per module and per package.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and
+lists the slowest modules. With `--check` the cold import wall time, the
+median of several fresh interpreters, is compared with
+`IMPORT_TIME_BUDGET_MS` and the command exits with status 1 when over it,
+so it can guard a CI job.
+
+Run from the backend directory:
+    python -m benchmarks.import_time --top 25
+    python -m benchmarks.import_time --check --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from app.constant.config import IMPORT_TIME_BUDGET_MS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that should only be loaded by the requests that need them
+DEFERRED = ("pandas", "tmai_api", "numpy", "httpx", "aiohttp")
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    # placeholders so importing the settings does not fail outside a deployment
+    env.setdefault("SECRET_KEY", "import-time")
+    env.setdefault("TOKEN_METRICS_API_KEY", "import-time")
+    return env
+
+
+def profile(module: str = "main") -> List[Tuple[str, int, int, int]]:
+    """Import a module in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        (module, self µs, cumulative µs, depth) per imported module, in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=_environment(), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def wall_time(module: str = "main") -> float:
+    """Milliseconds a fresh interpreter takes to import a module."""
+    code = f"import time; started = time.perf_counter(); import {module}; print((time.perf_counter() - started) * 1000)"
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=BACKEND_DIR, env=_environment(), text=True)
+    return float(output.strip().splitlines()[-1])
+
+
+def by_package(rows: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    """Sum the self time of every module under its top-level package."""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Report the import cost of main:app")
+    parser.add_argument("--module", type=str, default="main", help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Number of modules and packages listed")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when the cold import exceeds the budget")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters timed by --check")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS, help="Budget for --check, IMPORT_TIME_BUDGET_MS by default")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows = profile(args.module)
+
+    print(f"{'module':<50}{'self ms':>10}{'cumulative ms':>15}")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{name:<50}{self_us / 1000:>10.1f}{cumulative_us / 1000:>15.1f}")
+
+    print(f"\n{'package':<50}{'self ms':>10}")
+    for package, self_us in sorted(by_package(rows).items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<50}{self_us / 1000:>10.1f}")
+
+    loaded = {name for name, _, _, _ in rows}
+    eager = [name for name in DEFERRED if name in loaded]
+    if eager:
+        print(f"\nloaded at import, expected on first use: {', '.join(eager)}")
+
+    if args.check:
+        times = [wall_time(args.module) for _ in range(args.runs)]
+        median = statistics.median(times)
+        print(f"\ncold import of {args.module}: median {median:.0f} ms over {args.runs} runs, budget {args.budget_ms:.0f} ms")
+        if median > args.budget_ms:
+            print("over budget")
+            sys.exit(1)
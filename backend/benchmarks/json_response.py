@@ -0,0 +1,77 @@
+"""Measure the serialization time FastJSONRoute saves per response.
+
+The FastAPI path validates the result against `response_model=Dict[str, Any]`,
+runs it through `jsonable_encoder` and encodes it with `json.dumps`. The fast
+path encodes it directly, with orjson when installed, and RawJSON is sent as
+is. Payloads come from the fake upstreams so they have the shape of real
+responses.
+
+Run from the backend directory:
+    python -m benchmarks.json_response
+"""
+import argparse
+import asyncio
+import timeit
+from typing import Any, Callable, Dict
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.constant.pumpfun import GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, TOP_MARKET_CAP_PUMPFUN_COIN
+from app.utils import json_response
+from app.utils.json_response import FastJSONResponse, RawJSON, dumps
+from benchmarks.fake_upstreams import bitquery_payload, gecko_pools_payload
+
+RESPONSE_FIELD = create_response_field(name="Response_benchmark", type_=Dict[str, Any])
+
+
+def payloads(rows: int) -> Dict[str, Dict[str, Any]]:
+    first_buyers = bitquery_payload(GET_FIST_BUYERS_PUMPFUN_TOKEN_QUERY, rows=rows)
+    top_market_cap = bitquery_payload(TOP_MARKET_CAP_PUMPFUN_COIN, rows=rows)
+    return {
+        "trending_pools (20 pools + included)": gecko_pools_payload("benchmark", "eth", "base_token,quote_token"),
+        f"first_buyers ({rows} rows)": {"data": first_buyers["data"]["Solana"]["DEXTrades"]},
+        f"top_market_cap ({rows} rows)": {"data": top_market_cap},
+    }
+
+
+def fastapi_path(content: Dict[str, Any]) -> bytes:
+    serialized = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=content, is_coroutine=True))
+    return JSONResponse(serialized).body
+
+
+def best_of(function: Callable[[], object], repeat: int = 5) -> float:
+    """Best time per call in microseconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def stdlib_dumps(content: Any) -> bytes:
+    has_orjson, json_response.HAS_ORJSON = json_response.HAS_ORJSON, False
+    try:
+        return dumps(content)
+    finally:
+        json_response.HAS_ORJSON = has_orjson
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the fast JSON response path against FastAPI's default")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows in the BitQuery payloads")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    encoder = "orjson" if json_response.HAS_ORJSON else "json"
+    print(f"{'payload':<40}{'KiB':>7}{'fastapi µs':>12}{'json µs':>10}{encoder + ' µs':>12}{'raw µs':>9}{'saved':>8}")
+    for name, content in payloads(args.rows).items():
+        raw = RawJSON(dumps(content))
+        fastapi_us = best_of(lambda: fastapi_path(content))
+        # asyncio.run costs the same in both paths, it is not part of the serialization
+        fastapi_us -= best_of(lambda: asyncio.run(asyncio.sleep(0)))
+        stdlib_us = best_of(lambda: stdlib_dumps(content))
+        fast_us = best_of(lambda: FastJSONResponse(content).body)
+        raw_us = best_of(lambda: FastJSONResponse(raw).body)
+        print(f"{name:<40}{len(raw) / 1024:>7.0f}{fastapi_us:>12.0f}{stdlib_us:>10.0f}{fast_us:>12.0f}{raw_us:>9.1f}{fastapi_us / fast_us:>7.1f}x")
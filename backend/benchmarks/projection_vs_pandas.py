@@ -0,0 +1,81 @@
+"""Compare the BitQuery result projections with the pandas path they replaced.
+
+The pandas path is `pd.json_normalize` on the rows, `rename` and
+`to_dict(orient='records')`. Payloads come from the BitQuery fake so they
+have the shape of real responses.
+
+Run from the backend directory:
+    python -m benchmarks.projection_vs_pandas --rows 1,10,100,1000
+"""
+import argparse
+import subprocess
+import sys
+import timeit
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from app.constant.pumpfun import (
+    HISTORICAL_PRICE_AND_VOLUME_PROJECTION,
+    HISTORICAL_PRICE_AND_VOLUME_QUERY,
+    LAST_N_TRANSACTIONS_PROJECTION,
+    LAST_N_TRANSACTIONS_QUERY,
+)
+from app.utils.projection import Projection
+from benchmarks.fake_upstreams import bitquery_payload
+
+CASES = {
+    "last_n_transactions": (LAST_N_TRANSACTIONS_QUERY, LAST_N_TRANSACTIONS_PROJECTION),
+    "historical_price_and_volume": (HISTORICAL_PRICE_AND_VOLUME_QUERY, HISTORICAL_PRICE_AND_VOLUME_PROJECTION),
+}
+
+
+def pandas_records(projection: Projection) -> Callable[[Dict], List[Dict]]:
+    renames = {path: name for name, path in projection.fields.items()}
+    root = projection.root.split(".")
+
+    def run(result: Dict) -> List[Dict]:
+        rows = result
+        for key in root:
+            rows = rows[key]
+        df = pd.json_normalize(rows)
+        df.rename(columns=renames, inplace=True)
+        return df[list(projection.fields)].to_dict(orient='records')
+
+    return run
+
+
+def best_of(function: Callable[[], object], repeat: int = 5) -> float:
+    """Best time per call in microseconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def import_time(module: str) -> float:
+    """Seconds a fresh interpreter takes to import a module."""
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    return float(subprocess.check_output([sys.executable, "-c", code], text=True))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark BitQuery result projections against pandas")
+    parser.add_argument("--rows", type=str, default="1,10,100,1000", help="Comma-separated response sizes in rows")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sizes = [int(size) for size in args.rows.split(",")]
+
+    print(f"{'query':<30}{'rows':>6}{'pandas µs':>12}{'records µs':>12}{'columns µs':>12}{'speedup':>9}")
+    for name, (query, projection) in CASES.items():
+        with_pandas = pandas_records(projection)
+        for size in sizes:
+            payload = bitquery_payload(query, rows=size)
+            pandas_us = best_of(lambda: with_pandas(payload))
+            records_us = best_of(lambda: projection.records(payload))
+            columns_us = best_of(lambda: projection.columns(payload))
+            print(f"{name:<30}{size:>6}{pandas_us:>12.1f}{records_us:>12.1f}{columns_us:>12.1f}{pandas_us / records_us:>8.1f}x")
+
+    print(f"\nimport pandas: {import_time('pandas') * 1000:.0f} ms, import app.utils.projection: {import_time('app.utils.projection') * 1000:.0f} ms")
@@ -0,0 +1,323 @@
+"""End-to-end benchmark of `main:app` against local fake upstreams.
+
+Starts the GeckoTerminal, BitQuery and Token Metrics fakes and the backend in
+subprocesses, then drives every router at several concurrency levels and
+reports throughput and latency percentiles. Results are saved as JSON under
+`benchmarks/results/` so runs can be compared across commits.
+
+Run from the backend directory:
+    python -m benchmarks.run_benchmarks --concurrency 1,10,50 --requests 500
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_upstreams import fake_address
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+STARTUP_TIMEOUT = 30
+
+
+def token_addresses(count: int) -> List[str]:
+    return [fake_address(f"token{i}") for i in range(count)]
+
+
+def scenarios(keys: int) -> Dict[str, List[str]]:
+    """Request paths per router. `keys` distinct tokens and pools are cycled, like real traffic."""
+    tokens = token_addresses(keys)
+    pools = [fake_address(f"pool{i}", 42) for i in range(keys)]
+    since = (datetime.now(timezone.utc) - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+    today = datetime.now(timezone.utc).date()
+    start, end = (today - timedelta(days=7)).isoformat(), today.isoformat()
+    symbols = ["BTC", "ETH", "SOL", "DOGE", "PEPE"]
+    return {
+        "/coins": [
+            "/coins/trending_pools",
+            *[f"/coins/ohlcv?network=eth&pool_address={pool}&timeframe=hour&limit=100" for pool in pools],
+            *[f"/coins/ohlcv?network=eth&pool_address={pool}&interval=7m&limit=100" for pool in pools],
+            *[f"/coins/find_pool?token_address={token}" for token in tokens],
+            *[f"/coins/token?token_address={token}" for token in tokens],
+            "/coins/tokens?token_addresses=" + ",".join(tokens[:10]),
+        ],
+        "/tools": [
+            "/tools/pump-top-market-cap",
+            "/tools/pump-top-token-creators",
+            *[f"/tools/pumpfun-top-holders/{token}" for token in tokens],
+            *[f"/tools/pump-info/{token}?before_timestamp={since}" for token in tokens],
+            *[f"/tools/pump-top-traders-token/{token}" for token in tokens],
+            *[f"/tools/pump-first-latest-trades/{token}" for token in tokens],
+            *[f"/tools/pump-token-dashboard/{token}" for token in tokens],
+        ],
+        "/token-metrics": [
+            *[f"/token-metrics/tokens/{symbol}" for symbol in symbols],
+            *[f"/token-metrics/daily-ohlcv/{symbol}?start_date={start}&end_date={end}" for symbol in symbols],
+            *[f"/token-metrics/trader-grades/{symbol}?start_date={start}&end_date={end}" for symbol in symbols],
+            f"/token-metrics/market-metrics?start_date={start}&end_date={end}",
+        ],
+        "/memecoin": [
+            "/memecoin/test",
+        ],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_info() -> Dict[str, Any]:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.check_output(["git", *args], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--", ".")),
+    }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class Stack:
+    """The fake upstreams and the backend, each in its own subprocess."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, app_args: List[str]):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.app_args = app_args
+        self.processes: List[subprocess.Popen] = []
+        self.workdir = tempfile.TemporaryDirectory(prefix="dashmetrics-bench-")
+        self.app_url = ""
+
+    def spawn(self, args: List[str], env: Dict[str, str]) -> None:
+        self.processes.append(subprocess.Popen(
+            [sys.executable, *args],
+            cwd=self.workdir.name,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ))
+
+    def wait_ready(self, url: str) -> None:
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(url, timeout=1)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        raise RuntimeError(f"{url} did not start within {STARTUP_TIMEOUT}s")
+
+    def start(self) -> None:
+        env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+        ports = {}
+        for service in ("geckoterminal", "bitquery", "tokenmetrics"):
+            ports[service] = free_port()
+            self.spawn([
+                "-m", "benchmarks.fake_upstreams", service,
+                "--port", str(ports[service]),
+                "--latency-ms", str(self.latency_ms),
+                "--jitter-ms", str(self.jitter_ms),
+            ], env)
+        for port in ports.values():
+            self.wait_ready(f"http://127.0.0.1:{port}/")
+
+        app_port = free_port()
+        app_env = {
+            **env,
+            "GECKOTERMINAL_BASE_URL": f"http://127.0.0.1:{ports['geckoterminal']}/api/v2",
+            "BITQUERY_URL": f"http://127.0.0.1:{ports['bitquery']}/eap",
+            "TOKEN_METRICS_BASE_URL": f"http://127.0.0.1:{ports['tokenmetrics']}/v2",
+            "BITQUERY_TOKEN": "benchmark",
+            "TOKEN_METRICS_API_KEY": "benchmark",
+            "SECRET_KEY": "benchmark",
+            # measure the backend, not the production rate limits
+            "GECKOTERMINAL_RATE_PER_MINUTE": "0",
+            "BITQUERY_RATE_PER_MINUTE": "0",
+            "TOKEN_METRICS_RATE_PER_MINUTE": "0",
+        }
+        self.spawn([
+            "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1",
+            "--port", str(app_port),
+            "--log-level", "warning",
+            *self.app_args,
+        ], app_env)
+        self.app_url = f"http://127.0.0.1:{app_port}"
+        self.wait_ready(f"{self.app_url}/memecoin/test")
+
+    def stop(self) -> None:
+        for process in reversed(self.processes):
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.workdir.cleanup()
+
+
+async def run_level(base_url: str, paths: List[str], concurrency: int, total: int, warmup: int) -> Dict[str, Any]:
+    """Send `total` requests cycling through `paths` with `concurrency` requests in flight."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for path in paths[:warmup]:
+            await client.get(path)
+
+        cycle = itertools.cycle(paths)
+        remaining = total
+        latencies: List[float] = []
+        errors = 0
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                path = next(cycle)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None) -> None:
+    previous = {
+        (row["router"], row["concurrency"]): row
+        for row in (baseline or {}).get("results", [])
+    }
+    header = f"{'router':<15}{'conc':>6}{'req':>7}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if previous:
+        header += f"{'rps Δ':>9}{'p95 Δ':>9}"
+    print(header)
+    for row in results:
+        line = (
+            f"{row['router']:<15}{row['concurrency']:>6}{row['requests']:>7}{row['errors']:>6}"
+            f"{row['throughput_rps']:>10.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+        before = previous.get((row["router"], row["concurrency"]))
+        if before:
+            rps = (row["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0
+            p95 = (row["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0
+            line += f"{rps:>+8.1f}%{p95:>+8.1f}%"
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Dashmetrics backend against local fake upstreams")
+    parser.add_argument("--routers", type=str, default="/coins,/tools,/token-metrics,/memecoin", help="Comma-separated routers to benchmark")
+    parser.add_argument("--concurrency", type=str, default="1,10,50", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per router and concurrency level")
+    parser.add_argument("--keys", type=int, default=20, help="Distinct tokens and pools cycled through")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean latency of the fake upstreams in milliseconds")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Maximum deviation from the mean upstream latency in milliseconds")
+    parser.add_argument("--output", type=str, default=None, help="Result file (defaults to benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=str, default=None, help="Previous result file to compare against")
+    parser.add_argument("--app-args", type=str, default="", help="Extra arguments passed to uvicorn, e.g. \"--workers 4\"")
+    return parser.parse_args()
+
+
+async def main(args) -> Dict[str, Any]:
+    routers = [router.strip() for router in args.routers.split(",") if router.strip()]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    paths = scenarios(args.keys)
+    unknown = set(routers) - set(paths)
+    if unknown:
+        raise SystemExit(f"Unknown routers: {', '.join(sorted(unknown))}")
+
+    stack = Stack(args.latency_ms, args.jitter_ms, args.app_args.split())
+    stack.start()
+    try:
+        results = []
+        for router in routers:
+            for level in levels:
+                row = await run_level(stack.app_url, paths[router], level, args.requests, warmup=len(paths[router]))
+                results.append({"router": router, **row})
+                print(f"{router} @ {level}: {row['throughput_rps']} req/s, p95 {row['p95_ms']} ms", file=sys.stderr)
+    finally:
+        stack.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_info(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {
+                "requests": args.requests,
+                "keys": args.keys,
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "app_args": args.app_args,
+            },
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+
+    output = args.output
+    if output is None:
+        commit = report["meta"]["git"]["commit"] or "nogit"
+        if report["meta"]["git"]["dirty"]:
+            commit += "-dirty"
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(report["results"], baseline)
+    print(f"\nResults saved to {output}")
@@ -1,22 +1,53 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.constant.config import SECRET_KEY
+from app.constant.config import SECRET_KEY, TRACING_ENABLED
 from app.middleware.log import APIGatewayMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-#from app.database.database import session_manager
 from contextlib import asynccontextmanager
 
-from app.routers import memecoin, tools, coingecko, token_metrics
+from app.routers import memecoin, tools, coingecko, token_metrics, system, admin, metrics
+from app.service.cache import response_cache
+from app.service.http_client import bitquery_session, geckoterminal_client, tokenmetrics_client
+from app.service.refresher import refresher
+from app.service.token_metrics.token_metrics_service import token_metrics_executor
+from app.utils.json_response import FastJSONResponse
+from app.utils.logger import log_writers
+from app.utils.metrics import mark_process_dead
+from app.utils.tracing import trace_writer
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # imported here to keep SQLAlchemy out of the import time of the app
+    from app.database.database import session_manager
+
+    if session_manager is not None:
+        await session_manager.create_tables()
+    for writer in log_writers:
+        writer.start()
+    refresher.start()
+    # upstream clients are created on first use, which keeps httpx and aiohttp out of the boot path
+    yield
+    await refresher.stop()
+    await response_cache.close()
+    await tokenmetrics_client.close()
+    await bitquery_session.close()
+    await geckoterminal_client.close()
+    # waits for the running client calls, e.g. an ask_ai_agent, off the event loop
+    await asyncio.to_thread(token_metrics_executor.shutdown)
+    for writer in log_writers:
+        writer.stop()
+    if trace_writer is not None:
+        trace_writer.stop()
+    mark_process_dead()
+    if session_manager is not None and session_manager._engine is not None:
+        await session_manager.close()
 
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):  
-#     await session_manager.create_tables()
-#     yield
-#     if session_manager._engine is not None:
-#         await session_manager.close()
-        
-# app = FastAPI(lifespan=lifespan)
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     title="Dashmetrics API",
     description="""
     Dashmetrics Backend API provides cryptocurrency market data, meme coin tracking, and trading tools.
@@ -27,6 +58,9 @@ app = FastAPI(
     * **Coingecko**: Access to market data, price information, and liquidity pools
     * **Tools**: Advanced analysis tools for cryptocurrency traders and researchers
     * **Token Metrics**: Professional-grade crypto analytics and AI-powered insights
+    * **System**: Operational statistics for the upstream connection pools
+    * **Admin**: Latency analytics over the access logs, behind bearer token authentication
+    * **Metrics**: Prometheus metrics of the requests and upstream calls at `/metrics`
     
     ## Authentication
     
@@ -50,16 +84,20 @@ app.add_middleware(
 )
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 app.add_middleware(APIGatewayMiddleware)
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+# outermost, so it sees the final status and the time spent in every other middleware
+app.add_middleware(MetricsMiddleware)
 
 router_list = [
     memecoin.router,
     tools.router,
     coingecko.router,
-    token_metrics.router
+    token_metrics.router,
+    system.router,
+    admin.router,
+    metrics.router
 ]
 
 for router in router_list:
     app.include_router(router=router)
-    
-
-#redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
@@ -1,23 +1,100 @@
 #!/usr/bin/env python
 import uvicorn
 import argparse
+import importlib.util
+import glob
+import inspect
+import os
+import socket
+import tempfile
+from uvicorn.supervisors import Multiprocess
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Run the Dashmetrics FastAPI backend server")
     parser.add_argument('--host', type=str, default="0.0.0.0", help="Host to run the server on")
     parser.add_argument('--port', type=int, default=8000, help="Port to run the server on")
-    parser.add_argument('--reload', action='store_true', help="Enable auto-reload for development")
+    parser.add_argument('--reload', action='store_true', help="Enable auto-reload for development, in a single process")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes, the number of CPUs by default (1 with --reload)")
+    parser.add_argument('--keep-alive', type=int, default=5, help="Seconds an idle keep-alive connection stays open")
+    parser.add_argument('--backlog', type=int, default=2048, help="Maximum connections waiting to be accepted")
+    parser.add_argument('--graceful-timeout', type=int, default=30, help="Seconds in-flight requests are given to finish on shutdown")
+    parser.add_argument('--log-level', type=str, default="info", help="Uvicorn log level")
     return parser.parse_args()
 
+def event_loop() -> str:
+    """uvloop when installed, the standard asyncio loop otherwise."""
+    return "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+
+def http_parser() -> str:
+    """The C httptools parser when installed, the pure Python h11 otherwise."""
+    return "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+
+def tcp_socket(host: str, port: int) -> socket.socket:
+    """Bind the socket shared by the workers.
+
+    uvicorn binds it with protocol 0, and asyncio only sets TCP_NODELAY on
+    connections accepted from an IPPROTO_TCP socket. Without it, Nagle's
+    algorithm and delayed ACKs add about 40 ms to every keep-alive request.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+def metrics_dir() -> str:
+    """Directory where the workers share their /metrics values, emptied of a previous run's files."""
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="dashmetrics-metrics-")
+    os.makedirs(path, exist_ok=True)
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)
+    return path
+
 if __name__ == "__main__":
     args = parse_args()
-    
+    workers = 1 if args.reload else (args.workers or os.cpu_count() or 1)
+    # the workers split the upstream rate limits between them, set before the app config is imported
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    from app.constant.config import DB_CONNECTION_URL
+    if workers > 1 and (DB_CONNECTION_URL or "").startswith("sqlite"):
+        print(f"Warning: {workers} workers share the SQLite database {DB_CONNECTION_URL}, writes will fail with "
+              "'database is locked', use PostgreSQL or --workers 1")
+    loop = event_loop()
+    http = http_parser()
+
     print(f"Starting Dashmetrics backend server on {args.host}:{args.port}")
+    print(f"Workers: {workers}, event loop: {loop}, HTTP parser: {http}")
+    print(f"Keep-alive: {args.keep_alive}s, backlog: {args.backlog}, graceful shutdown timeout: {args.graceful_timeout}s")
     print("API documentation will be available at http://localhost:8000/docs")
-    
-    uvicorn.run(
-        "main:app", 
-        host=args.host, 
-        port=args.port, 
-        reload=args.reload
-    ) 
\ No newline at end of file
+
+    if args.reload:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True, loop=loop, http=http, log_level=args.log_level)
+    else:
+        # On SIGTERM or SIGINT every worker stops accepting connections, waits up
+        # to --graceful-timeout for in-flight requests, then runs the app lifespan
+        # shutdown, which flushes the access logs and closes the caches and pools.
+        config = uvicorn.Config(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            loop=loop,
+            http=http,
+            timeout_keep_alive=args.keep_alive,
+            backlog=args.backlog,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            log_level=args.log_level,
+        )
+        server = uvicorn.Server(config)
+        if workers > 1:
+            # set before the workers are spawned, they inherit it and import the metrics in multiprocess mode
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir()
+            sockets = [tcp_socket(args.host, args.port)]
+            # uvicorn < 0.30 takes the worker target, later versions build it from the config
+            if "target" in inspect.signature(Multiprocess).parameters:
+                Multiprocess(config, target=server.run, sockets=sockets).run()
+            else:
+                Multiprocess(config, sockets=sockets).run()
+        else:
+            server.run()
@@ -0,0 +1,87 @@
+"""DDSketch: relative accuracy of the quantiles, zeros and merging."""
+import math
+import random
+
+import pytest
+
+from app.utils.ddsketch import DDSketch
+
+QUANTILES = (0.0, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0)
+
+
+def latencies(count: int, seed: int = 0):
+    """Log-normal durations in ms, roughly 1 ms to a few seconds."""
+    rng = random.Random(seed)
+    return [rng.lognormvariate(3, 1.5) for _ in range(count)]
+
+
+def exact(values, q):
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.05])
+def test_quantiles_are_within_the_relative_accuracy(accuracy):
+    values = latencies(10_000)
+    sketch = DDSketch(accuracy)
+    for value in values:
+        sketch.add(value)
+
+    for q, estimate in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+        expected = exact(values, q)
+        assert abs(estimate - expected) <= accuracy * expected, q
+
+
+def test_quantiles_keep_the_requested_order():
+    sketch = DDSketch()
+    for value in range(1, 101):
+        sketch.add(value)
+    p99, p50 = sketch.quantiles((0.99, 0.5))
+    assert p99 > p50
+    assert sketch.quantile(0.5) == p50
+
+
+def test_zeros_are_counted_apart():
+    sketch = DDSketch()
+    for value in (0, 0, 0, 10):
+        sketch.add(value)
+    assert sketch.quantiles((0.5, 1.0)) == [0.0, 10.0]
+    assert (sketch.zeros, sketch.count, sketch.mean) == (3, 4, 2.5)
+
+
+def test_empty_sketch():
+    sketch = DDSketch()
+    assert sketch.quantiles((0.5, 0.99)) == [None, None]
+    assert sketch.mean is None
+
+
+def test_merge_matches_a_single_sketch():
+    values = latencies(5_000, seed=1)
+    single, left, right = DDSketch(), DDSketch(), DDSketch()
+    for index, value in enumerate(values):
+        single.add(value)
+        (left if index % 3 else right).add(value)
+    left.merge(right)
+
+    assert left.bins == single.bins
+    assert (left.count, left.min, left.max) == (single.count, single.min, single.max)
+    assert left.sum == pytest.approx(single.sum)
+    assert left.quantiles(QUANTILES) == single.quantiles(QUANTILES)
+
+
+def test_merge_with_an_empty_sketch():
+    sketch = DDSketch()
+    sketch.add(5)
+    sketch.merge(DDSketch())
+    assert (sketch.count, sketch.min, sketch.max) == (1, 5, 5)
+
+
+def test_merge_requires_the_same_accuracy():
+    with pytest.raises(ValueError):
+        DDSketch(0.01).merge(DDSketch(0.02))
+
+
+@pytest.mark.parametrize("accuracy", [0, 1, -0.1])
+def test_accuracy_must_be_between_zero_and_one(accuracy):
+    with pytest.raises(ValueError):
+        DDSketch(accuracy)
@@ -0,0 +1,25 @@
+"""Cold import time of `main:app`, kept under IMPORT_TIME_BUDGET_MS.
+
+Each run imports `main` in a fresh interpreter, see benchmarks.import_time.
+The median of several runs is compared so one slow start does not fail it.
+"""
+import statistics
+
+from app.constant.config import IMPORT_TIME_BUDGET_MS
+from benchmarks.import_time import DEFERRED, profile, wall_time
+
+RUNS = 5
+
+
+def test_cold_import_of_main_is_under_budget():
+    times = [wall_time("main") for _ in range(RUNS)]
+    median = statistics.median(times)
+    assert median <= IMPORT_TIME_BUDGET_MS, (
+        f"cold import of main took {median:.0f} ms (median of {RUNS}), "
+        f"over the {IMPORT_TIME_BUDGET_MS:.0f} ms budget, see python -m benchmarks.import_time"
+    )
+
+
+def test_heavy_packages_are_not_imported_at_boot():
+    loaded = {name for name, _, _, _ in profile("main")}
+    assert [name for name in DEFERRED if name in loaded] == []
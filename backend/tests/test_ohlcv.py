@@ -0,0 +1,95 @@
+"""OHLCV resampling: interval parsing, bucketing, gap filling and row conversion."""
+import pytest
+
+from app.service.search.candle_store import max_resampled_limit
+from app.utils.ohlcv import parse_interval, resample, to_rows
+
+
+@pytest.mark.parametrize("interval, seconds", [
+    ("30s", 30),
+    ("7m", 420),
+    ("2H", 7200),
+    (" 1d ", 86400),
+    ("1w", 604800),
+])
+def test_parse_interval(interval, seconds):
+    assert parse_interval(interval) == seconds
+
+
+@pytest.mark.parametrize("interval", ["", "m", "5", "5x", "1.5h", "0m"])
+def test_parse_interval_rejects_malformed_or_zero(interval):
+    with pytest.raises(ValueError):
+        parse_interval(interval)
+
+
+def test_resample_takes_first_open_extremes_last_close_and_sums():
+    # three 1-minute candles into a 3-minute bucket, then one into the next, given out of order
+    columns = resample(
+        timestamps=[180, 60, 0, 120],
+        open=[5.0, 2.0, 1.0, 3.0],
+        high=[6.0, 9.0, 2.0, 4.0],
+        low=[4.0, 1.5, 0.5, 2.5],
+        close=[5.5, 3.0, 2.0, 3.5],
+        sums={"volume": [10.0, 2.0, 1.0, 3.0]},
+        bucket_seconds=180,
+    )
+    assert to_rows(columns, ("open", "high", "low", "close", "volume")) == [
+        [0, 1.0, 9.0, 0.5, 3.5, 6.0],
+        [180, 5.0, 6.0, 4.0, 5.5, 10.0],
+    ]
+
+
+def test_resample_keeps_the_order_of_rows_sharing_a_timestamp():
+    # trades: the price is passed as open, high, low and close
+    prices = [1.0, 3.0, 2.0]
+    columns = resample([5, 5, 5], prices, prices, prices, prices, bucket_seconds=60)
+    assert columns["open"].tolist() == [1.0]
+    assert columns["close"].tolist() == [2.0]
+
+
+def test_resample_aligns_buckets_to_the_origin():
+    prices = [1.0, 2.0]
+    columns = resample([90, 160], prices, prices, prices, prices, bucket_seconds=60, origin=40)
+    assert columns["timestamp"].tolist() == [40, 160]
+
+
+def test_resample_fills_gaps_flat_at_the_previous_close():
+    columns = resample(
+        timestamps=[0, 180],
+        open=[1.0, 4.0],
+        high=[2.0, 5.0],
+        low=[0.5, 3.5],
+        close=[1.5, 4.5],
+        sums={"volume": [7.0, 8.0]},
+        bucket_seconds=60,
+        fill_gaps=True,
+    )
+    assert to_rows(columns, ("open", "high", "low", "close", "volume"), newest_first=True) == [
+        [180, 4.0, 5.0, 3.5, 4.5, 8.0],
+        [120, 1.5, 1.5, 1.5, 1.5, 0.0],
+        [60, 1.5, 1.5, 1.5, 1.5, 0.0],
+        [0, 1.0, 2.0, 0.5, 1.5, 7.0],
+    ]
+
+
+def test_resample_without_rows():
+    columns = resample([], [], [], [], [], sums={"volume": []}, bucket_seconds=60, fill_gaps=True)
+    assert {name: values.size for name, values in columns.items()} == {
+        "timestamp": 0, "open": 0, "high": 0, "low": 0, "close": 0, "volume": 0,
+    }
+
+
+def test_to_rows_returns_native_numbers():
+    prices = [1.0]
+    row = to_rows(resample([0], prices, prices, prices, prices), ("close",))[0]
+    assert [type(value) for value in row] == [int, float]
+
+
+@pytest.mark.parametrize("interval, limit", [
+    ("1h", 1000),
+    ("3m", 332),
+    ("7m", 141),
+    ("2h", 499),
+])
+def test_max_resampled_limit(interval, limit):
+    assert max_resampled_limit(parse_interval(interval)) == limit
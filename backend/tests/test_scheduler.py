@@ -0,0 +1,193 @@
+"""ProviderScheduler: priorities, Retry-After, queue limits and retries.
+
+The schedulers use small, fast rates so every test runs in well under a second.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.service.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    ProviderScheduler,
+    RetryableUpstreamError,
+    UpstreamOverloadedError,
+    parse_retry_after,
+)
+
+
+class FakeResponse:
+    """A response with an HTTP status, closed the aiohttp way (`release`) or the httpx way (`aclose`)."""
+
+    def __init__(self, status_code: int, headers=None, closed_by: str = "release"):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+        if closed_by == "release":
+            self.release = self._close
+        else:
+            self.aclose = self._aclose
+
+    def _close(self):
+        self.closed = True
+
+    async def _aclose(self):
+        self.closed = True
+
+
+def responses(*items):
+    """A `send` returning, or raising, the items in turn."""
+    queue = list(items)
+    calls = []
+
+    async def send():
+        calls.append(time.monotonic())
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    send.calls = calls
+    return send
+
+
+def test_interactive_calls_go_ahead_of_background_ones():
+    async def main():
+        # one token every 50 ms, the first one is taken right away
+        scheduler = ProviderScheduler("test", rate_per_minute=1200, burst=1)
+        await scheduler.acquire(INTERACTIVE)
+        order = []
+
+        async def acquire(name, priority):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        background = [asyncio.create_task(acquire(f"background-{i}", BACKGROUND)) for i in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(acquire("interactive", INTERACTIVE))
+        await asyncio.gather(*background, interactive)
+        return order, scheduler
+
+    order, scheduler = asyncio.run(main())
+    assert order == ["interactive", "background-0", "background-1"]
+    assert scheduler.max_queue_depth == 3
+
+
+def test_retry_after_pauses_the_provider():
+    async def main():
+        scheduler = ProviderScheduler("test", rate_per_minute=0, burst=1, max_retries=2)
+        send = responses(RetryableUpstreamError("test", 429, retry_after=0.2), "ok")
+        result = await scheduler.call(send)
+        return result, send.calls, scheduler
+
+    result, calls, scheduler = asyncio.run(main())
+    assert result == "ok"
+    assert calls[1] - calls[0] >= 0.2
+    assert (scheduler.throttled, scheduler.retries, scheduler.gave_up) == (1, 1, 0)
+
+
+def test_retry_after_holds_back_other_calls():
+    async def main():
+        scheduler = ProviderScheduler("test", rate_per_minute=0, burst=1)
+        scheduler.bucket.pause(0.2)
+        return await scheduler.acquire()
+
+    assert asyncio.run(main()) >= 0.2
+
+
+def test_too_long_retry_after_gives_up():
+    async def main():
+        scheduler = ProviderScheduler("test", rate_per_minute=0, burst=1, max_retry_after=1)
+        send = responses(FakeResponse(429, {"Retry-After": "120"}))
+        return await scheduler.call(send), scheduler
+
+    response, scheduler = asyncio.run(main())
+    assert response.status_code == 429
+    # the throttled response is handed to the caller, not closed
+    assert not response.closed
+    assert (scheduler.throttled, scheduler.retries, scheduler.gave_up) == (1, 0, 1)
+
+
+def test_full_queue_is_rejected():
+    async def main():
+        # a token every 10 s, the only one is taken
+        scheduler = ProviderScheduler("test", rate_per_minute=6, burst=1, max_queue=1)
+        await scheduler.acquire()
+        queued = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(UpstreamOverloadedError) as rejected:
+                await scheduler.acquire()
+        finally:
+            queued.cancel()
+        return rejected.value, scheduler
+
+    error, scheduler = asyncio.run(main())
+    assert error.status_code == 503
+    assert error.reason == "queue full"
+    assert int(error.headers["Retry-After"]) >= 1
+    assert scheduler.rejected_queue_full == 1
+    assert scheduler.stats()["queue_depth"] == 0
+
+
+def test_call_expected_to_wait_past_max_wait_is_rejected():
+    async def main():
+        scheduler = ProviderScheduler("test", rate_per_minute=6, burst=1, max_wait=1)
+        await scheduler.acquire()
+        with pytest.raises(UpstreamOverloadedError) as rejected:
+            await scheduler.acquire()
+        return rejected.value, scheduler
+
+    error, scheduler = asyncio.run(main())
+    assert error.reason == "wait too long"
+    # the next token is about 10 s away
+    assert 9 <= int(error.headers["Retry-After"]) <= 10
+    assert scheduler.rejected_max_wait == 1
+
+
+def test_queued_call_is_rejected_at_max_wait():
+    async def main():
+        scheduler = ProviderScheduler("test", rate_per_minute=1200, burst=1, max_wait=0.2)
+        await scheduler.acquire()
+        # queued in time for the next token, then the provider is paused
+        queued = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        scheduler.bucket.pause(5)
+        scheduler._wake_head()
+        started = time.monotonic()
+        with pytest.raises(UpstreamOverloadedError):
+            await queued
+        return time.monotonic() - started, scheduler
+
+    waited, scheduler = asyncio.run(main())
+    assert waited < 1
+    assert scheduler.rejected_max_wait == 1
+    assert scheduler.stats()["queue_depth"] == 0
+
+
+@pytest.mark.parametrize("closed_by", ["release", "aclose"])
+def test_throttled_responses_are_closed_before_the_retry(closed_by):
+    async def main():
+        scheduler = ProviderScheduler("test", rate_per_minute=0, burst=1, backoff_base=0.01)
+        throttled = [FakeResponse(429, closed_by=closed_by), FakeResponse(503, {"Retry-After": "0"}, closed_by=closed_by)]
+        ok = FakeResponse(200, closed_by=closed_by)
+        result = await scheduler.call(responses(*throttled, ok))
+        return throttled, ok, result, scheduler
+
+    throttled, ok, result, scheduler = asyncio.run(main())
+    assert result is ok
+    assert [response.closed for response in throttled] == [True, True]
+    assert not ok.closed
+    assert (scheduler.calls, scheduler.throttled, scheduler.retries) == (3, 2, 2)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", 120.0),
+    (" 3 ", 3.0),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+    ("soon", None),
+    (None, None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected